@@ -1,21 +1,80 @@
 import os
-import io
 import json
+import time
 import base64
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
 from loguru import logger
 from openai import AzureOpenAI
 from azure.ai.documentintelligence.models import AnalyzeResult
+from actor.aoai_scheduler import RequestScheduler
+from actor.description_cache import DescriptionCache
+from actor.figure_triage import FigureTriage
+from actor.geometry_index import GeometryIndex, polygon_bounds
+from actor.image_budget import ImageBudget
 from actor.markdown_processor import MarkdownProcessor
+from actor.metrics import MetricsRecorder
+from actor.pipeline import BoundedPipeline
+from actor.text_edits import TextEdits
+
+IMAGE_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+
+
+@dataclass
+class FigureJob:
+    """Figure regions of one document between rendering and description."""
+
+    md_content: str
+    # (figure index, regions) in document order
+    figure_regions: list
+    all_regions: list
+    # Regions that passed geometry triage
+    to_render: list
+    rendered: list = field(default_factory=list)
+    # ids of the regions that appear in the outputs
+    kept: set = field(default_factory=set)
+    to_describe: list = field(default_factory=list)
 
 
 class ImageDescriptionProcessor:
     """Handles image description generation using Azure OpenAI Vision."""
 
-    def __init__(self, aoai_client: AzureOpenAI, pdf_processor, output_dir: str):
+    # Rough per-request token estimates used to budget against the TPM quota
+    ESTIMATED_IMAGE_TOKENS = 765
+    ESTIMATED_COMPLETION_TOKENS = 300
+
+    def __init__(
+        self,
+        aoai_client: AzureOpenAI,
+        pdf_processor,
+        output_dir: str,
+        max_concurrency: int = 4,
+        cache: Optional[DescriptionCache] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        image_budget: Optional[ImageBudget] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        figures_per_call: int = 1,
+        triage: Optional[FigureTriage] = None,
+        queue_size: int = 8,
+    ):
         self.aoai_client = aoai_client
         self.pdf_processor = pdf_processor
         self.output_dir = output_dir
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.metrics = metrics or MetricsRecorder()
+        # Encoding of images sent to the model; defaults to lossless PNG
+        self.image_budget = image_budget or ImageBudget(image_format="png")
+        # Shared RPM/TPM budgets and retries; calls go straight through if None
+        self.scheduler = scheduler
+        # More than one packs regions from the same page into one request
+        self.figures_per_call = max(1, figures_per_call)
+        # Local pre-filter for trivial and duplicate figures; disabled if None
+        self.triage = triage
+        # Items each pipeline stage may fall behind the one feeding it
+        self.queue_size = queue_size
+        # Documents whose last run left some figures without a description
+        self.incomplete: set[str] = set()
         self.md_processor = MarkdownProcessor()
 
     def process_figures(
@@ -30,31 +89,88 @@ class ImageDescriptionProcessor:
             file_name: Base filename for output files
 
         Returns:
-            Updated markdown content with figure descriptions
+            Updated markdown content with figure descriptions. When some
+            descriptions failed, file_name is also added to self.incomplete.
         """
+        if not self._is_supported(input_file_path):
+            return None
+
+        logger.info("Processing figure descriptions...")
+
+        job = self._collect_figures(result, input_file_path, file_name)
+        if job is None:
+            return getattr(result, "content", "")
+
+        # Rendering, model calls and image writes overlap
+        with self.metrics.stage(
+            "figure_pipeline",
+            regions=len(job.to_render),
+            max_concurrency=self.max_concurrency,
+        ) as stage:
+            stats = self._run_figure_pipeline(job, input_file_path, describe=True)
+            stage["described"] = len(job.to_describe)
+            stage["skipped"] = len(job.all_regions) - len(job.to_describe)
+            stage.update(BoundedPipeline.flatten(stats))
+
+        return self._finish_figures(job, file_name)
+
+    @staticmethod
+    def _is_supported(input_file_path: str) -> bool:
         # Check file extension
         file_extension = os.path.splitext(input_file_path)[1].lower()
         if file_extension not in [".pdf"]:
             logger.warning(f"Unsupported file extension: {file_extension}")
-            return None
+            return False
+        return True
 
-        logger.info("Processing figure descriptions...")
+    def _prepare_figures(
+        self, result: AnalyzeResult, input_file_path: str, file_name: str
+    ) -> Optional[FigureJob]:
+        """
+        Collect, render and triage every figure region of a document, leaving
+        the descriptions to the caller.
 
-        descriptions_output = []
+        Returns:
+            The regions to describe, or None if the document has no figures
+        """
+        job = self._collect_figures(result, input_file_path, file_name)
+        if job is not None:
+            with self.metrics.stage(
+                "figure_render", regions=len(job.to_render)
+            ) as stage:
+                stats = self._run_figure_pipeline(job, input_file_path, describe=False)
+                stage.update(BoundedPipeline.flatten(stats))
+        return job
+
+    def _collect_figures(
+        self, result: AnalyzeResult, input_file_path: str, file_name: str
+    ) -> Optional[FigureJob]:
+        """
+        Collect every figure region of a document and drop those too small to
+        render.
+
+        Returns:
+            The regions to render, or None if the document has no figures
+        """
         md_content = getattr(result, "content", "")
 
         if not (hasattr(result, "figures") and result.figures):
             logger.info("No figures found in document")
-            return md_content
+            return None
 
         logger.info(f"Found {len(result.figures)} figures in document")
 
+        # Boxes of captions and paragraphs, for lookups by region
+        geometry = GeometryIndex.from_result(result)
+
+        # Collect every region first, so the PDF is rendered in a single pass
+        figure_regions = []
         for figure_idx, figure in enumerate(result.figures):
             try:
                 logger.info(f"Processing Figure #{figure_idx + 1}")
 
                 # Extract caption information
-                caption_content, caption_polygons = self._extract_caption_info(figure)
+                caption_content = self._extract_caption_info(figure)
 
                 # Process bounding regions
                 figure_data_list = self._process_figure_regions(
@@ -63,43 +179,179 @@ class ImageDescriptionProcessor:
                     input_file_path,
                     file_name,
                     caption_content,
-                    caption_polygons,
+                    geometry,
                 )
-
-                descriptions_output.extend(figure_data_list)
-
-                # Update markdown with descriptions
-                for figure_data in figure_data_list:
-                    md_content = self.md_processor.update_figure_description(
-                        md_content, figure_data["description"], figure_idx + 1
-                    )
+                figure_regions.append((figure_idx, figure_data_list))
 
             except Exception as e:
                 logger.error(f"Error processing figure {figure_idx + 1}: {str(e)}")
                 continue
 
+        all_regions = [
+            figure_data for _, data_list in figure_regions for figure_data in data_list
+        ]
+
+        # Drop regions too small to be worth rendering
+        to_render = all_regions
+        if self.triage:
+            to_render = []
+            for figure_data in all_regions:
+                decision = self.triage.check_geometry(figure_data["bounding_box"])
+                if decision:
+                    figure_data["triage"] = decision.to_dict()
+                    figure_data["image_path"] = None
+                else:
+                    to_render.append(figure_data)
+
+        return FigureJob(
+            md_content=md_content,
+            figure_regions=figure_regions,
+            all_regions=all_regions,
+            to_render=to_render,
+        )
+
+    def _run_figure_pipeline(
+        self, job: FigureJob, input_file_path: str, describe: bool
+    ) -> dict:
+        """
+        Render, triage, describe and save the job's regions through bounded
+        queues, filling job.rendered, job.kept and job.to_describe.
+
+        The calling thread renders and encodes regions page by page (PyMuPDF
+        documents cannot be shared across threads) and triages them in document
+        order. Regions to describe are grouped and handed to max_concurrency
+        model workers, and encoded images to a writer thread, so CPU, network
+        and disk work overlap. Without describe, regions are only rendered,
+        triaged and saved.
+
+        Returns:
+            Pipeline stats, with queue depths and per-stage utilization
+        """
+        pipeline = BoundedPipeline(queue_size=self.queue_size)
+        write = pipeline.add_stage("write", self._save_image, workers=1)
+        describe_group = (
+            pipeline.add_stage(
+                "describe", self._describe_group_logged, workers=self.max_concurrency
+            )
+            if describe
+            else None
+        )
+        # Figures seen in this document, for duplicate detection
+        seen: dict = {}
+
+        def render():
+            group: list = []
+            # Regions that fail to render are skipped by render_regions; this
+            # only catches failures of the whole document, e.g. opening it
+            try:
+                for figure_data, img_bytes in self._iter_rendered(
+                    input_file_path, job.to_render
+                ):
+                    job.rendered.append(figure_data)
+                    write((figure_data, img_bytes))
+
+                    # Only regions that pass triage are sent to the model
+                    if self.triage and not self._triage_region(figure_data, seen):
+                        continue
+                    job.to_describe.append(figure_data)
+                    if describe_group is None:
+                        continue
+
+                    # Regions from the same page share a request, up to
+                    # figures_per_call
+                    if group and (
+                        len(group) == self.figures_per_call
+                        or group[0]["page_number"] != figure_data["page_number"]
+                    ):
+                        describe_group(group)
+                        group = []
+                    group.append(figure_data)
+            except Exception as e:
+                logger.error(
+                    f"Error rendering figures from {input_file_path}: {str(e)}"
+                )
+            if group:
+                describe_group(group)
+
+        pipeline.run("render", render)
+
+        # Regions that failed to render are left out of the outputs
+        job.kept = {id(figure_data) for figure_data in job.rendered} | {
+            id(figure_data)
+            for figure_data in job.all_regions
+            if "triage" in figure_data
+        }
+        return pipeline.stats()
+
+    def _finish_figures(self, job: FigureJob, file_name: str) -> str:
+        """Inject the descriptions into the markdown and save the outputs."""
+        if self.triage:
+            self._resolve_duplicates(job.rendered)
+
+        # Update markdown with descriptions in figure order, in a single pass.
+        # Figures without any description keep their original content.
+        descriptions_output = []
+        figure_descriptions = {}
+        for figure_idx, figure_data_list in job.figure_regions:
+            figure_data_list = [
+                figure_data
+                for figure_data in figure_data_list
+                if id(figure_data) in job.kept
+            ]
+            for figure_data in figure_data_list:
+                figure_data.pop("_img_base64", None)
+                figure_data.pop("_img_mime", None)
+            descriptions_output.extend(figure_data_list)
+
+            descriptions = [
+                figure_data["description"]
+                for figure_data in figure_data_list
+                if figure_data["description"]
+            ]
+            if descriptions:
+                figure_descriptions[figure_idx + 1] = f"{os.linesep}{os.linesep}".join(
+                    descriptions
+                )
+        edits = TextEdits()
+        md_content = self.md_processor.update_figure_descriptions(
+            job.md_content, figure_descriptions, edits
+        )
+
         # Save outputs
         self._save_descriptions(descriptions_output, file_name)
-        self._save_updated_markdown(md_content, file_name)
+        self._save_updated_markdown(md_content, file_name, edits)
 
         logger.info(f"Processed {len(descriptions_output)} figure descriptions")
+        failed = [
+            figure_data
+            for figure_data in job.to_describe
+            if id(figure_data) in job.kept and not figure_data["description"]
+        ]
+        if failed:
+            logger.warning(
+                f"{len(failed)} figure descriptions failed for {file_name}; "
+                "they are requested again on the next run"
+            )
+            self.incomplete.add(file_name)
+        else:
+            self.incomplete.discard(file_name)
+        if self.cache:
+            self.cache.flush()
+            logger.info(f"Description cache stats: {self.cache.stats}")
+        if self.scheduler:
+            logger.info(f"Request scheduler stats: {self.scheduler.stats}")
         return md_content
 
-    def _extract_caption_info(self, figure) -> tuple[str, list]:
-        """Extract caption content and polygons from figure."""
+    def _extract_caption_info(self, figure) -> str:
+        """Extract caption content from figure."""
         caption_content = ""
-        caption_polygons = []
 
         if hasattr(figure, "caption") and figure.caption:
             caption_content = figure.caption.get("content", "")
             if caption_content:
                 logger.info(f"Caption: {caption_content}")
 
-            caption_bounding_regions = figure.caption.get("boundingRegions", [])
-            for caption_region in caption_bounding_regions:
-                caption_polygons.append(caption_region.get("polygon", []))
-
-        return caption_content, caption_polygons
+        return caption_content
 
     def _process_figure_regions(
         self,
@@ -108,7 +360,7 @@ class ImageDescriptionProcessor:
         input_file_path: str,
         file_name: str,
         caption_content: str,
-        caption_polygons: list,
+        geometry: GeometryIndex,
     ) -> list:
         """Process all regions of a figure."""
         figure_data_list = []
@@ -119,10 +371,12 @@ class ImageDescriptionProcessor:
             return figure_data_list
 
         for region_idx, region in enumerate(bounding_regions):
-            polygon = region.get("polygon", [])
+            bounding_box = polygon_bounds(region.get("polygon", []))
 
-            # Skip caption regions and empty polygons
-            if polygon in caption_polygons or not polygon:
+            # Skip empty polygons and regions that match a caption's box
+            if bounding_box is None or geometry.is_caption(
+                region.get("pageNumber", 1), bounding_box
+            ):
                 continue
 
             try:
@@ -134,6 +388,7 @@ class ImageDescriptionProcessor:
                     file_name,
                     caption_content,
                     figure,
+                    geometry,
                 )
                 if figure_data:
                     figure_data_list.append(figure_data)
@@ -153,38 +408,27 @@ class ImageDescriptionProcessor:
         file_name: str,
         caption_content: str,
         figure,
+        geometry: GeometryIndex,
     ) -> Optional[dict]:
-        """Process a single figure region."""
+        """Build the figure data for a single region; cropping happens later."""
         polygon = region.get("polygon", [])
         page_number = region.get("pageNumber", 1) - 1  # Convert to 0-indexed
 
-        # Create bounding box
-        bounding_box = (
-            polygon[0],  # x0 (left)
-            polygon[1],  # y0 (top)
-            polygon[4],  # x1 (right)
-            polygon[5],  # y1 (bottom)
-        )
+        # Enclose every point, so rotated polygons are not cut off
+        bounding_box = polygon_bounds(polygon)
 
-        # Crop image
-        cropped_image = self.pdf_processor.crop_image_from_pdf_page(
-            input_file_path, page_number, bounding_box
-        )
-
-        # Convert to base64
-        buffered = io.BytesIO()
-        cropped_image.save(buffered, format="PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode()
-
-        # Generate description
-        description = self.generate_description(img_base64, caption_content)
+        # Figures without elements get the paragraphs drawn inside them
+        elements = figure.get("elements") or [
+            f"/paragraphs/{paragraph_id}"
+            for paragraph_id in geometry.paragraphs_within(
+                page_number + 1, bounding_box
+            )
+        ]
 
-        # Save cropped image
         image_filename = (
             f"{file_name}_figure_{figure_idx + 1}_region_{region_idx + 1}.png"
         )
         image_path = os.path.join(self.output_dir, image_filename)
-        cropped_image.save(image_path)
 
         # Create figure data
         return {
@@ -193,50 +437,494 @@ class ImageDescriptionProcessor:
             "page_number": page_number + 1,
             "image_path": image_path,
             "bounding_box": bounding_box,
-            "polygon": polygon,
-            "description": description,
+            "polygon": list(polygon),
+            "description": "",
             "caption": caption_content,
-            "elements": (
-                figure.get("elements", []) if hasattr(figure, "elements") else []
-            ),
+            "elements": elements,
         }
 
-    def generate_description(self, img_base64: str, caption: str = "") -> str:
-        """Generate description for an image using Azure OpenAI Vision."""
+    def _iter_rendered(
+        self, input_file_path: str, figure_data_list: list
+    ) -> Iterator[tuple[dict, bytes]]:
+        """
+        Crop all regions in a single pass over the PDF and encode each rendered
+        pixmap once, according to the image budget. The encoded image is kept as
+        "_img_base64"/"_img_mime" entries for the description step.
+
+        Yields:
+            (figure_data, encoded image bytes) in page order
+        """
+
+        def encode(pix):
+            encode_start = time.perf_counter()
+            img_bytes, mime_type = self.image_budget.encode_pixmap(pix)
+            seconds = time.perf_counter() - encode_start
+            signature = self.triage.inspect(pix) if self.triage else None
+            return img_bytes, mime_type, pix.width, pix.height, seconds, signature
+
+        rendered = self.pdf_processor.render_regions(
+            input_file_path,
+            [
+                (figure_data["page_number"] - 1, figure_data["bounding_box"])
+                for figure_data in figure_data_list
+            ],
+            encoder=encode,
+        )
+
+        for position, encoded in rendered:
+            figure_data = figure_data_list[position]
+            img_bytes, mime_type, width, height, seconds, signature = encoded
+            if signature:
+                figure_data["_signature"] = signature
+
+            # Name the file after the format actually used
+            figure_data["image_path"] = (
+                os.path.splitext(figure_data["image_path"])[0]
+                + IMAGE_EXTENSIONS[mime_type]
+            )
+
+            img_base64 = base64.b64encode(img_bytes).decode()
+            figure_data["_img_base64"] = img_base64
+            figure_data["_img_mime"] = mime_type
+            self.metrics.record(
+                "image_encode",
+                figure_index=figure_data["figure_index"],
+                region_index=figure_data["region_index"],
+                format=mime_type,
+                width=width,
+                height=height,
+                bytes=len(img_bytes),
+                bytes_sent=len(img_base64),
+                seconds=seconds,
+            )
+            yield figure_data, img_bytes
+
+    def _save_image(self, item: tuple[dict, bytes]):
+        """Write a rendered region's image; errors are logged, not raised."""
+        figure_data, img_bytes = item
         try:
-            response = self.aoai_client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                # "text": "Analyze this figure/image from a document and provide a detailed description. Focus on key elements, any text or labels visible in the image.",
-                                "text": (
-                                    f"Describe this image (note: it has image caption: {caption}):"
-                                    if caption
-                                    else "Describe this image:"
-                                ),
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{img_base64}"
-                                },
-                            },
-                        ],
-                    }
-                ],
+            self._write_image(figure_data["image_path"], img_bytes)
+        except Exception as e:
+            logger.error(
+                f"Error saving figure {figure_data['figure_index']} "
+                f"region {figure_data['region_index']}: {str(e)}"
             )
-            description = response.choices[0].message.content.strip()
-            logger.info(f"Generated description: {description}")
 
-            return description
+    def _write_image(self, image_path: str, img_bytes: bytes):
+        """Write encoded image bytes to disk."""
+        with open(image_path, "wb") as f:
+            f.write(img_bytes)
+        self.metrics.record("bytes_written", path=image_path, bytes=len(img_bytes))
+
+    def _triage_region(self, figure_data: dict, seen: dict) -> bool:
+        """
+        Classify a rendered region, in document order, and record the decision
+        as its "triage" entry.
+
+        Returns:
+            True if the region still needs a description
+        """
+        decision = self.triage.classify(
+            figure_data.pop("_signature"), self._figure_label(figure_data), seen
+        )
+        figure_data["triage"] = decision.to_dict()
+        if decision.action == "describe":
+            return True
+        logger.info(
+            f"Skipping figure {figure_data['figure_index']} region "
+            f"{figure_data['region_index']}: {decision.reason}"
+        )
+        return False
+
+    def _resolve_duplicates(self, figure_data_list: list):
+        """Copy descriptions to duplicates and add new ones to the corpus index."""
+        by_label = {
+            self._figure_label(figure_data): figure_data
+            for figure_data in figure_data_list
+        }
+        for figure_data in figure_data_list:
+            triage = figure_data["triage"]
+            if triage["action"] == "describe":
+                self.triage.remember(triage["phash"], figure_data["description"])
+            elif triage["action"] == "duplicate":
+                if triage["duplicate_of"] == "corpus":
+                    description = self.triage.corpus_description(triage["phash"])
+                else:
+                    description = by_label[triage["duplicate_of"]]["description"]
+                figure_data["description"] = description or ""
+
+    def _describe_group_logged(self, group: list):
+        """Describe a group of regions in place, logging instead of raising."""
+        try:
+            self._describe_group(group)
         except Exception as e:
-            logger.error(f"Error generating image description: {str(e)}")
+            logger.error(
+                f"Error describing figures "
+                f"{[figure_data['figure_index'] for figure_data in group]}: "
+                f"{str(e)}"
+            )
+
+    def _group_regions(self, figure_data_list: list) -> list[list]:
+        """Split regions into groups of up to figures_per_call from the same page."""
+        groups = []
+        for figure_data in figure_data_list:
+            if (
+                groups
+                and len(groups[-1]) < self.figures_per_call
+                and groups[-1][0]["page_number"] == figure_data["page_number"]
+            ):
+                groups[-1].append(figure_data)
+            else:
+                groups.append([figure_data])
+        return groups
+
+    @staticmethod
+    def _figure_ref(figure_data: dict) -> dict:
+        return {
+            "figure_index": figure_data["figure_index"],
+            "region_index": figure_data["region_index"],
+        }
+
+    @staticmethod
+    def _figure_label(figure_data: dict) -> str:
+        return (
+            f"figure_{figure_data['figure_index']}_region_{figure_data['region_index']}"
+        )
+
+    @staticmethod
+    def _take_images(group: list) -> list:
+        """Remove the encoded images from a group of regions and return them."""
+        return [
+            (figure_data.pop("_img_base64"), figure_data.pop("_img_mime"))
+            for figure_data in group
+        ]
+
+    def _describe_group(self, group: list):
+        """
+        Describe a group of regions with a single multi-image request, falling
+        back to one request per region for anything that cannot be parsed.
+        """
+        images = self._take_images(group)
+
+        if len(group) > 1:
+            pending = self._describe_batch(group, images)
+        else:
+            pending = [(group[0], images[0])]
+
+        for figure_data, (img_base64, mime_type) in pending:
+            figure_data["description"] = self.generate_description(
+                img_base64,
+                figure_data["caption"],
+                self._figure_ref(figure_data),
+                mime_type,
+            )
+
+    @staticmethod
+    def _build_batch_prompt(labels: list[str]) -> str:
+        """Build the instructions for a multi-image request."""
+        return (
+            f"Describe each of the following {len(labels)} images from a document. "
+            "Each image is preceded by its id and, when available, its caption. "
+            "Respond with a JSON object whose keys are exactly these ids "
+            f"({', '.join(labels)}) and whose values are the descriptions."
+        )
+
+    def _batch_request(self, group: list, images: list) -> tuple:
+        """
+        Resolve cached regions of a group and build one request for the rest.
+
+        Returns:
+            Tuple of (uncached (figure_data, label, image, cache_key) entries,
+            request keyword arguments or None if fewer than two regions remain,
+            estimated tokens)
+        """
+        deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+        labels = [self._figure_label(figure_data) for figure_data in group]
+        prompt = self._build_batch_prompt(labels)
+
+        # Regions already in the cache are resolved without a request. Keys
+        # depend on content only, not on labels or the group, and match the
+        # single-image keys so both paths share entries
+        uncached = []
+        for figure_data, label, (img_base64, mime_type) in zip(group, labels, images):
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(
+                    base64.b64decode(img_base64),
+                    figure_data["caption"],
+                    self._build_prompt(figure_data["caption"]),
+                    deployment or "",
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    figure_data["description"] = cached
+                    self.metrics.record(
+                        "model_call", **self._figure_ref(figure_data), cached=True
+                    )
+                    continue
+            uncached.append((figure_data, label, (img_base64, mime_type), cache_key))
+
+        if len(uncached) <= 1:
+            return uncached, None, 0
+
+        content = [{"type": "text", "text": prompt}]
+        for figure_data, label, (img_base64, mime_type), _ in uncached:
+            caption = figure_data["caption"]
+            content.append(
+                {
+                    "type": "text",
+                    "text": f'Image id "{label}"'
+                    + (f" (caption: {caption})" if caption else ""),
+                }
+            )
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{mime_type};base64,{img_base64}"},
+                }
+            )
+
+        request = {
+            "model": deployment,
+            "messages": [{"role": "user", "content": content}],
+            "response_format": {"type": "json_object"},
+        }
+        estimated_tokens = len(prompt) // 4 + len(uncached) * (
+            self.ESTIMATED_IMAGE_TOKENS + self.ESTIMATED_COMPLETION_TOKENS
+        )
+        return uncached, request, estimated_tokens
+
+    def _batch_results(self, uncached: list, response, start: float) -> list:
+        """
+        Apply a multi-image response to its regions.
+
+        Returns:
+            (figure_data, image) pairs missing from the response
+        """
+        descriptions = json.loads(response.choices[0].message.content)
+        if not isinstance(descriptions, dict):
+            raise ValueError("Response is not a JSON object")
+
+        usage = getattr(response, "usage", None)
+        self.metrics.record(
+            "model_batch_call",
+            figures=len(uncached),
+            seconds=time.perf_counter() - start,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+        )
+
+        fallback = []
+        for figure_data, label, image, cache_key in uncached:
+            description = descriptions.get(label)
+            if not isinstance(description, str) or not description.strip():
+                fallback.append((figure_data, image))
+                continue
+
+            figure_data["description"] = description.strip()
+            self.metrics.record(
+                "model_call",
+                **self._figure_ref(figure_data),
+                cached=False,
+                batched=True,
+            )
+            if cache_key:
+                self.cache.set(cache_key, figure_data["description"])
+
+        if fallback:
+            logger.warning(
+                f"{len(fallback)} figures missing from batched response, "
+                "describing them individually"
+            )
+        return fallback
+
+    def _describe_batch(self, group: list, images: list) -> list:
+        """
+        Describe several regions in one chat completion.
+
+        Returns:
+            (figure_data, image) pairs that still need a per-region request
+        """
+        uncached, request, estimated_tokens = self._batch_request(group, images)
+        if request is None:
+            return [(figure_data, image) for figure_data, _, image, _ in uncached]
+
+        start = time.perf_counter()
+        try:
+            response = self._create_completion(estimated_tokens, **request)
+            return self._batch_results(uncached, response, start)
+        except Exception as e:
+            logger.warning(
+                f"Batched description failed ({str(e)}), "
+                f"falling back to {len(uncached)} single requests"
+            )
+            return [(figure_data, image) for figure_data, _, image, _ in uncached]
+
+    def params(self) -> dict:
+        """Parameters that affect the descriptions, used to detect changes."""
+        return {
+            "prompt": self._build_prompt(),
+            "caption_prompt": self._build_prompt("{caption}"),
+            "deployment": os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+            "dpi": getattr(self.pdf_processor, "dpi", None),
+            "render_budget": asdict(self.pdf_processor.budget)
+            if getattr(self.pdf_processor, "budget", None)
+            else None,
+            "image_budget": asdict(self.image_budget),
+            "figures_per_call": self.figures_per_call,
+            "triage": self.triage.params() if self.triage else None,
+        }
+
+    @staticmethod
+    def _build_prompt(caption: str = "") -> str:
+        """Build the text prompt sent along with the image."""
+        # "Analyze this figure/image from a document and provide a detailed description. Focus on key elements, any text or labels visible in the image."
+        return (
+            f"Describe this image (note: it has image caption: {caption}):"
+            if caption
+            else "Describe this image:"
+        )
+
+    def _cached_description(
+        self, img_base64: str, caption: str, figure_ref: dict
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Look up a single-image description in the cache.
+
+        Returns:
+            Tuple of (cache key, cached description or None)
+        """
+        if not self.cache:
+            return None, None
+
+        cache_key = self.cache.make_key(
+            base64.b64decode(img_base64),
+            caption,
+            self._build_prompt(caption),
+            os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME") or "",
+        )
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached description")
+            self.metrics.record("model_call", **figure_ref, cached=True)
+        return cache_key, cached
+
+    def _description_request(
+        self, img_base64: str, caption: str, mime_type: str
+    ) -> tuple[dict, int]:
+        """
+        Build a single-image chat completion request.
+
+        Returns:
+            Tuple of (request keyword arguments, estimated tokens)
+        """
+        prompt = self._build_prompt(caption)
+        request = {
+            "model": os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt,
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type};base64,{img_base64}"
+                            },
+                        },
+                    ],
+                }
+            ],
+        }
+        estimated_tokens = (
+            len(prompt) // 4
+            + self.ESTIMATED_IMAGE_TOKENS
+            + self.ESTIMATED_COMPLETION_TOKENS
+        )
+        return request, estimated_tokens
+
+    def _description_result(
+        self,
+        response,
+        img_base64: str,
+        cache_key: Optional[str],
+        figure_ref: dict,
+        start: float,
+    ) -> str:
+        """Read, record and cache the description from a completion."""
+        description = response.choices[0].message.content.strip()
+        logger.info(f"Generated description: {description}")
+
+        usage = getattr(response, "usage", None)
+        self.metrics.record(
+            "model_call",
+            **figure_ref,
+            cached=False,
+            seconds=time.perf_counter() - start,
+            image_base64_bytes=len(img_base64),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+        )
+
+        if cache_key:
+            self.cache.set(cache_key, description)
+
+        return description
+
+    def _description_failed(self, error: Exception, figure_ref: dict, start: float):
+        logger.error(f"Error generating image description: {str(error)}")
+        self.metrics.record(
+            "model_call",
+            **figure_ref,
+            cached=False,
+            failed=True,
+            seconds=time.perf_counter() - start,
+        )
+
+    def generate_description(
+        self,
+        img_base64: str,
+        caption: str = "",
+        figure_ref: Optional[dict] = None,
+        mime_type: str = "image/png",
+    ) -> str:
+        """
+        Generate description for an image using Azure OpenAI Vision.
+
+        figure_ref (e.g. figure and region index) is attached to the recorded
+        per-call metrics.
+        """
+        figure_ref = figure_ref or {}
+        cache_key, cached = self._cached_description(img_base64, caption, figure_ref)
+        if cached is not None:
+            return cached
+
+        request, estimated_tokens = self._description_request(
+            img_base64, caption, mime_type
+        )
+        start = time.perf_counter()
+        try:
+            response = self._create_completion(estimated_tokens, **request)
+            return self._description_result(
+                response, img_base64, cache_key, figure_ref, start
+            )
+        except Exception as e:
+            self._description_failed(e, figure_ref, start)
             return ""
 
+    def _create_completion(self, estimated_tokens: int, **kwargs):
+        """Create a chat completion, through the scheduler when one is set."""
+
+        def request():
+            return self.aoai_client.chat.completions.create(**kwargs)
+
+        if self.scheduler:
+            return self.scheduler.call(request, estimated_tokens)
+        return request()
+
     def _save_descriptions(self, descriptions: list, file_name: str):
         """Save figure descriptions to JSON file."""
         descriptions_file = os.path.join(
@@ -244,11 +932,25 @@ class ImageDescriptionProcessor:
         )
         with open(descriptions_file, "w", encoding="utf-8") as f:
             json.dump(descriptions, f, indent=2, ensure_ascii=False)
+        self.metrics.record(
+            "bytes_written",
+            path=descriptions_file,
+            bytes=os.path.getsize(descriptions_file),
+        )
         logger.info(f"Descriptions saved to {descriptions_file}")
 
-    def _save_updated_markdown(self, md_content: str, file_name: str):
-        """Save updated markdown with figure descriptions."""
+    def _save_updated_markdown(
+        self, md_content: str, file_name: str, edits: TextEdits
+    ):
+        """
+        Save updated markdown with figure descriptions, and the edits that map
+        its offsets back to result.content.
+        """
         md_file = os.path.join(self.output_dir, f"{file_name}_updated.md")
         with open(md_file, "w", encoding="utf-8") as f:
             f.write(md_content)
+        edits_file = os.path.join(self.output_dir, f"{file_name}_updated_edits.json")
+        edits.save(edits_file)
+        for path in (md_file, edits_file):
+            self.metrics.record("bytes_written", path=path, bytes=os.path.getsize(path))
         logger.info(f"Updated markdown saved to {md_file}")
@@ -0,0 +1,221 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+from loguru import logger
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Continuously refilling budget of `capacity` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(
+            self.capacity, self.available + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float):
+        # May go negative when a response used more than estimated
+        self.available -= amount
+
+
+class RequestScheduler:
+    """
+    Shared scheduler for Azure OpenAI calls.
+
+    Callers are queued until both the requests-per-minute and tokens-per-minute
+    budgets allow the request. Throttled or transient failures are retried with
+    jittered exponential backoff, honoring Retry-After headers, and a 429 pauses
+    every caller until the server's cooldown has passed, so work is delayed
+    rather than dropped. Synchronous callers use call(), coroutines use acall();
+    both draw from the same budgets.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 90_000,
+        max_retries: int = 8,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def _try_acquire(self, estimated_tokens: int) -> float:
+        """
+        Take one request and estimated_tokens from the budgets if both fit.
+
+        Returns:
+            0 if acquired, otherwise the seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(estimated_tokens, now),
+            )
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self.stats["requests"] += 1
+                return 0.0
+            return wait
+
+    def _acquire(self, estimated_tokens: int):
+        """Block until one request and estimated_tokens fit in the budgets."""
+        while wait := self._try_acquire(estimated_tokens):
+            time.sleep(wait)
+
+    async def _aacquire(self, estimated_tokens: int):
+        """Wait, without blocking the event loop, until the budgets allow a call."""
+        while wait := self._try_acquire(estimated_tokens):
+            await asyncio.sleep(wait)
+
+    def _settle(self, estimated_tokens: int, used_tokens: Optional[int]):
+        """Correct the token budget once the actual usage is known."""
+        if used_tokens is None:
+            return
+        with self._lock:
+            self.tokens.take(used_tokens - estimated_tokens)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Read Retry-After (or retry-after-ms) from an error's response headers."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(
+                    0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+                )
+            except (TypeError, ValueError):
+                return None
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        status_code = getattr(error, "status_code", None)
+        if status_code is not None:
+            return status_code in RETRYABLE_STATUS_CODES
+        # Connection errors and timeouts carry no status code
+        return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed request, or None if it should
+        not be retried. A 429 also pauses every other caller for that long.
+        """
+        if not self._is_retryable(error) or attempt == self.max_retries:
+            with self._lock:
+                self.stats["failures"] += 1
+            return None
+
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        delay = random.uniform(0, backoff)
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        with self._lock:
+            self.stats["retries"] += 1
+            if getattr(error, "status_code", None) == 429:
+                self.stats["throttled"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+        logger.warning(
+            f"Request failed ({str(error)}), retry {attempt + 1}/"
+            f"{self.max_retries} in {delay:.1f}s"
+        )
+        return delay
+
+    def call(self, request: Callable[[], Any], estimated_tokens: int = 1000) -> Any:
+        """
+        Run request() within the budgets, retrying throttled and transient errors.
+
+        Args:
+            request: Zero-argument callable performing the API call
+            estimated_tokens: Expected prompt + completion tokens for budgeting
+
+        Returns:
+            The value returned by request()
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(estimated_tokens)
+            try:
+                response = request()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage", None)
+            self._settle(estimated_tokens, getattr(usage, "total_tokens", None))
+            return response
+
+    async def acall(
+        self, request: Callable[[], Awaitable[Any]], estimated_tokens: int = 1000
+    ) -> Any:
+        """
+        Coroutine version of call().
+
+        Args:
+            request: Zero-argument callable returning an awaitable API call
+            estimated_tokens: Expected prompt + completion tokens for budgeting
+
+        Returns:
+            The value awaited from request()
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._aacquire(estimated_tokens)
+            try:
+                response = await request()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage", None)
+            self._settle(estimated_tokens, getattr(usage, "total_tokens", None))
+            return response
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Optional
+from loguru import logger
+from azure.ai.documentintelligence.models import AnalyzeResult
+from actor.aoai_img_desc_processor import ImageDescriptionProcessor
+
+
+class AsyncImageDescriptionProcessor(ImageDescriptionProcessor):
+    """
+    Image description processor for an AsyncAzureOpenAI client.
+
+    Rendering, triage and saving run in worker threads, while model calls are
+    awaited on the event loop. One semaphore bounds the calls in flight across
+    every document handled by the processor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def aprocess_figures(
+        self, result: AnalyzeResult, input_file_path: str, file_name: str
+    ) -> Optional[str]:
+        """
+        Coroutine version of process_figures().
+
+        Args:
+            result: Document Intelligence analysis result
+            input_file_path: Path to the input PDF file
+            file_name: Base filename for output files
+
+        Returns:
+            Updated markdown content with figure descriptions
+        """
+        if not self._is_supported(input_file_path):
+            return None
+
+        logger.info("Processing figure descriptions...")
+
+        job = await asyncio.to_thread(
+            self._prepare_figures, result, input_file_path, file_name
+        )
+        if job is None:
+            return getattr(result, "content", "")
+
+        with self.metrics.stage(
+            "figure_description",
+            document=file_name,
+            regions=len(job.to_describe),
+            skipped=len(job.all_regions) - len(job.to_describe),
+            max_concurrency=self.max_concurrency,
+        ):
+            await self._adescribe_regions(job.to_describe)
+
+        return await asyncio.to_thread(self._finish_figures, job, file_name)
+
+    async def _adescribe_regions(self, figure_data_list: list):
+        """Describe regions concurrently; each figure_data is updated in place."""
+        if not figure_data_list:
+            return
+
+        groups = self._group_regions(figure_data_list)
+        logger.info(
+            f"Generating {len(figure_data_list)} descriptions in {len(groups)} "
+            f"requests"
+        )
+
+        async def describe(group: list):
+            async with self._semaphore:
+                try:
+                    await self._adescribe_group(group)
+                except Exception as e:
+                    logger.error(
+                        f"Error describing figures "
+                        f"{[figure_data['figure_index'] for figure_data in group]}: "
+                        f"{str(e)}"
+                    )
+
+        await asyncio.gather(*(describe(group) for group in groups))
+
+    async def _adescribe_group(self, group: list):
+        """Coroutine version of _describe_group()."""
+        images = self._take_images(group)
+
+        if len(group) > 1:
+            pending = await self._adescribe_batch(group, images)
+        else:
+            pending = [(group[0], images[0])]
+
+        for figure_data, (img_base64, mime_type) in pending:
+            figure_data["description"] = await self.agenerate_description(
+                img_base64,
+                figure_data["caption"],
+                self._figure_ref(figure_data),
+                mime_type,
+            )
+
+    async def _adescribe_batch(self, group: list, images: list) -> list:
+        """Coroutine version of _describe_batch()."""
+        uncached, request, estimated_tokens = self._batch_request(group, images)
+        if request is None:
+            return [(figure_data, image) for figure_data, _, image, _ in uncached]
+
+        start = time.perf_counter()
+        try:
+            response = await self._acreate_completion(estimated_tokens, **request)
+            return self._batch_results(uncached, response, start)
+        except Exception as e:
+            logger.warning(
+                f"Batched description failed ({str(e)}), "
+                f"falling back to {len(uncached)} single requests"
+            )
+            return [(figure_data, image) for figure_data, _, image, _ in uncached]
+
+    async def agenerate_description(
+        self,
+        img_base64: str,
+        caption: str = "",
+        figure_ref: Optional[dict] = None,
+        mime_type: str = "image/png",
+    ) -> str:
+        """Coroutine version of generate_description()."""
+        figure_ref = figure_ref or {}
+        cache_key, cached = self._cached_description(img_base64, caption, figure_ref)
+        if cached is not None:
+            return cached
+
+        request, estimated_tokens = self._description_request(
+            img_base64, caption, mime_type
+        )
+        start = time.perf_counter()
+        try:
+            response = await self._acreate_completion(estimated_tokens, **request)
+            return self._description_result(
+                response, img_base64, cache_key, figure_ref, start
+            )
+        except Exception as e:
+            self._description_failed(e, figure_ref, start)
+            return ""
+
+    async def _acreate_completion(self, estimated_tokens: int, **kwargs):
+        """Await a chat completion, through the scheduler when one is set."""
+
+        def request():
+            return self.aoai_client.chat.completions.create(**kwargs)
+
+        if self.scheduler:
+            return await self.scheduler.acall(request, estimated_tokens)
+        return await request()
@@ -1,37 +1,258 @@
+import os
+import re
+import numpy as np
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from loguru import logger
 from langchain_core.documents import Document
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from abc import ABC, abstractmethod
-from actor.data_process_model import ChunkingType
+from actor.data_process_model import ChunkerConfig, ChunkingType, ChunkSource
+from actor.embedding_backend import EmbeddingBackend, HashingEmbeddingBackend
+from actor.geometry_index import span_extent
+
+if TYPE_CHECKING:
+    from azure.ai.documentintelligence.models import AnalyzeResult
+
+PAGE_BREAK_PATTERN = re.compile(r"<!--\s*PageBreak\s*-->")
+
+# (offset, length) of a chunk in the content it was split from
+Span = Tuple[int, int]
+
+
+class _SourceMap:
+    """
+    Maps offsets in chunked markdown to offsets in result.content, and those to
+    page numbers from the pages' spans.
+
+    Offsets are mapped through source.edits, the replacements that turned
+    result.content into the markdown (figure descriptions). Text inserted by an
+    edit maps to the text it replaced. Without pages, page numbers are counted
+    from <!-- PageBreak --> markers in the markdown instead.
+    """
+
+    def __init__(self, source: ChunkSource):
+        self.source = source
+        # Offsets are in result.content as they are, or through the edits
+        self.mapped = (
+            source.source_content is None
+            or source.edits is not None
+            or source.content == source.source_content
+        )
+        if not self.mapped:
+            logger.warning(
+                f"Content of {source.source or 'document'} differs from the "
+                "analysis result without recorded edits, chunk spans are only "
+                "reported in the markdown"
+            )
+
+        self._span_starts: List[int] = []
+        self._span_pages: List[int] = []
+        if source.pages and self.mapped:
+            page_spans = sorted(
+                (span.get("offset"), page.get("pageNumber"))
+                for page in source.pages
+                for span in page.get("spans") or []
+            )
+            self._span_starts = [offset for offset, _ in page_spans]
+            self._span_pages = [page_number for _, page_number in page_spans]
+        self._page_starts = [0] + [
+            match.end() for match in PAGE_BREAK_PATTERN.finditer(source.content)
+        ]
+
+    def to_source(self, span: Span) -> Optional[Span]:
+        """Span in result.content of a span in the markdown, if it can be mapped."""
+        if not self.mapped:
+            return None
+        if self.source.edits is None:
+            return span
+        return self.source.edits.to_span(*span)
+
+    def page_number(self, offset: int, source_offset: Optional[int]) -> int:
+        """Page of a chunk starting at offset in the markdown."""
+        if self._span_starts and source_offset is not None:
+            position = max(0, bisect_right(self._span_starts, source_offset) - 1)
+            return self._span_pages[position]
+        return self.source.first_page + bisect_right(self._page_starts, offset) - 1
 
 
 class ContentChunker(ABC):
-    """Abstract base class for content chunkers."""
+    """
+    Abstract base class for content chunkers.
+
+    A chunker is configured once and can be reused for any number of documents:
+    the underlying splitter is built on first use and kept, and chunk_many()
+    spreads a corpus over a process pool. Every chunk is annotated with its
+    source file, page number and character span.
+    """
 
-    def __init__(self, content: str):
+    def __init__(self, content: str = "", config: Optional[ChunkerConfig] = None):
         self.content = content
+        self.config = config or ChunkerConfig()
+        self._splitter = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Splitters are rebuilt in each worker process rather than pickled
+        state = self.__dict__.copy()
+        state["_splitter"] = None
+        return state
+
+    def _build_splitter(self) -> Any:
+        """Create the text splitter. Called once per chunker and process."""
+        return None
+
+    @property
+    def splitter(self) -> Any:
+        if self._splitter is None:
+            self._splitter = self._build_splitter()
+        return self._splitter
 
     @abstractmethod
-    def chunk(self) -> List[Dict[str, Any]]:
-        """Chunk the content and return list of chunks."""
+    def split(self, source: ChunkSource) -> Iterator[Tuple[Document, Optional[Span]]]:
+        """Yield chunks of one document with their spans, when known."""
         raise NotImplementedError("Subclasses must implement this method.")
 
+    def params(self) -> Dict[str, Any]:
+        """Parameters that affect the output, used to detect configuration changes."""
+        return {}
+
+    def _default_source(self) -> ChunkSource:
+        return ChunkSource(content=self.content)
+
+    @staticmethod
+    def _locate(content: str, text: str, cursor: int) -> Optional[Span]:
+        """Find a chunk whose whitespace was normalized by its splitter."""
+        start = content.find(text, cursor)
+        if start >= 0:
+            return start, len(text)
+
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if not lines:
+            return None
+        start = content.find(lines[0], cursor)
+        if start < 0:
+            return None
+        end = content.find(lines[-1], start)
+        end = start + len(lines[0]) if end < 0 else end + len(lines[-1])
+        return start, end - start
+
+    def iter_chunks(self, source: Optional[ChunkSource] = None) -> Iterator[Document]:
+        """
+        Yield the chunks of a document with provenance metadata.
+
+        Args:
+            source: Document to chunk, by default the content given to the
+                constructor
+
+        Returns:
+            Iterator of Documents whose metadata includes "source" and, when the
+            chunk could be located, "page_number", "span" (offset and length in
+            source.source_content, i.e. result.content, when given) and
+            "markdown_span" (offset and length in the chunked content). Text
+            that is not in result.content, such as figure descriptions, maps to
+            the figure content it replaced. "span" is left out when content
+            differs from source.source_content and source.edits is not given.
+        """
+        source = source or self._default_source()
+        source_map = _SourceMap(source)
+
+        cursor = 0
+        for document, span in self.split(source):
+            if span is None:
+                span = self._locate(source.content, document.page_content, cursor)
+
+            document.metadata["source"] = source.source
+            if span is not None:
+                offset, length = span
+                cursor = offset
+                source_span = source_map.to_source(span)
+                document.metadata["page_number"] = source_map.page_number(
+                    offset, source_span[0] if source_span else None
+                )
+                if source_span is not None:
+                    document.metadata["span"] = {
+                        "offset": source_span[0],
+                        "length": source_span[1],
+                    }
+                document.metadata["markdown_span"] = {
+                    "offset": offset,
+                    "length": length,
+                }
+            yield document
+
+    def chunk(self) -> List[Document]:
+        """Chunk the content and return list of chunks."""
+        return list(self.iter_chunks())
+
+    def chunk_many(
+        self, sources: Iterable[ChunkSource], max_workers: Optional[int] = None
+    ) -> Iterator[List[Document]]:
+        """
+        Chunk many documents on a process pool.
+
+        The chunker is sent to each worker once, and only a few documents per
+        worker are in flight, so arbitrarily large corpora can be streamed.
+
+        Args:
+            sources: Documents to chunk
+            max_workers: Worker processes, by default the number of CPUs
+
+        Returns:
+            Iterator of chunk lists, in the order of sources
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        in_flight = 4 * max_workers
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_chunk_worker,
+            initargs=(self,),
+        ) as executor:
+            pending: deque = deque()
+            for source in sources:
+                pending.append(executor.submit(_chunk_in_worker, source))
+                if len(pending) >= in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+# Chunker of the current worker process, set by chunk_many()
+_worker_chunker: Optional[ContentChunker] = None
+
+
+def _init_chunk_worker(chunker: ContentChunker):
+    global _worker_chunker
+    _worker_chunker = chunker
+
+
+def _chunk_in_worker(source: ChunkSource) -> List[Document]:
+    return list(_worker_chunker.iter_chunks(source))
+
 
 class RecursiveContentChunker(ContentChunker):
     """Recursive text chunker."""
 
-    def __init__(self, content: str = ""):
-        super().__init__(content)
+    def params(self) -> Dict[str, Any]:
+        return {
+            "chunk_size": self.config.chunk_size,
+            "chunk_overlap": self.config.chunk_overlap,
+        }
 
-    def chunk(self) -> List[Document]:
+    def _build_splitter(self) -> Any:
         from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-        chunk_size = 250
-        chunk_overlap = 30
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        return RecursiveCharacterTextSplitter(
+            chunk_size=self.config.chunk_size,
+            chunk_overlap=self.config.chunk_overlap,
+            add_start_index=True,
         )
-        splits = text_splitter.split_text(self.content)
-        return splits
+
+    def split(self, source: ChunkSource) -> Iterator[Tuple[Document, Optional[Span]]]:
+        for document in self.splitter.create_documents([source.content]):
+            start = document.metadata.pop("start_index", -1)
+            span = (start, len(document.page_content)) if start >= 0 else None
+            yield document, span
 
 
 class MarkdownContentChunker(ContentChunker):
@@ -39,52 +260,344 @@ class MarkdownContentChunker(ContentChunker):
     Content-Aware Splitting for Markdown Documents
     """
 
-    def __init__(self, content: str = ""):
-        super().__init__(content)
-        self.headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-        ]
+    def params(self) -> Dict[str, Any]:
+        return {"headers_to_split_on": self.config.headers_to_split_on}
 
-    def chunk(self) -> List[Document]:
+    def _build_splitter(self) -> Any:
         from langchain_text_splitters import MarkdownHeaderTextSplitter
 
-        # Markdown Splits
-        markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=self.headers_to_split_on, strip_headers=False
+        return MarkdownHeaderTextSplitter(
+            headers_to_split_on=list(self.config.headers_to_split_on),
+            strip_headers=False,
         )
-        md_header_splits = markdown_splitter.split_text(self.content)
-        return md_header_splits
+
+    def split(self, source: ChunkSource) -> Iterator[Tuple[Document, Optional[Span]]]:
+        # Markdown Splits; lines are re-joined, so spans are located afterwards
+        for document in self.splitter.split_text(source.content):
+            yield document, None
 
 
 class SemanticContentChunker(ContentChunker):
-    def __init__(self, content: str = ""):
-        super().__init__(content)
+    """
+    Splits content where the meaning shifts between adjacent sentences.
 
-    def chunk(self) -> List[Document]:
-        raise NotImplementedError("Not implemented yet.")
+    Each sentence is embedded together with its neighbours (buffer_size on each
+    side), and a chunk boundary is placed wherever the cosine distance between
+    consecutive windows exceeds the breakpoint. All windows are embedded in
+    batches, so a document needs only a handful of embedding calls.
+    """
+
+    _sentence_pattern = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+    def __init__(
+        self,
+        content: str = "",
+        config: Optional[ChunkerConfig] = None,
+        embedding_backend: Optional[EmbeddingBackend] = None,
+    ):
+        super().__init__(content, config)
+        self.embedding_backend = embedding_backend or HashingEmbeddingBackend()
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "embedding_backend": self.embedding_backend.params(),
+            "buffer_size": self.config.buffer_size,
+            "breakpoint_percentile": self.config.breakpoint_percentile,
+            "breakpoint_threshold": self.config.breakpoint_threshold,
+            "max_chunk_size": self.config.max_chunk_size,
+        }
+
+    def _split_sentences(self, content: str) -> List[Span]:
+        """(offset, length) of each non-empty sentence in content."""
+        bounds, start = [], 0
+        for match in self._sentence_pattern.finditer(content):
+            bounds.append((start, match.start()))
+            start = match.end()
+        bounds.append((start, len(content)))
+
+        sentences = []
+        for start, end in bounds:
+            text = content[start:end]
+            stripped = text.strip()
+            if stripped:
+                offset = start + len(text) - len(text.lstrip())
+                sentences.append((offset, len(stripped)))
+        return sentences
+
+    def _breakpoints(self, sentences: List[str]) -> np.ndarray:
+        """Indices of sentences that start a new chunk."""
+        buffer_size = self.config.buffer_size
+        windows = [
+            " ".join(sentences[max(0, i - buffer_size) : i + buffer_size + 1])
+            for i in range(len(sentences))
+        ]
+        embeddings = self.embedding_backend.embed(windows)
+
+        # Rows are unit length, so the row-wise dot product is the cosine similarity
+        distances = 1.0 - np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        threshold = (
+            self.config.breakpoint_threshold
+            if self.config.breakpoint_threshold is not None
+            else np.percentile(distances, self.config.breakpoint_percentile)
+        )
+        return np.flatnonzero(distances > threshold) + 1
+
+    def _limit_size(self, sentences: List[str], start: int, end: int) -> List[Span]:
+        """
+        Pack sentences[start:end] into runs of at most max_chunk_size characters.
+
+        Returns:
+            (first, stop) sentence index ranges
+        """
+        runs, first, size = [], start, 0
+        for index in range(start, end):
+            length = len(sentences[index])
+            if index > first and size + 1 + length > self.config.max_chunk_size:
+                runs.append((first, index))
+                first, size = index, 0
+            size += length + (1 if index > first else 0)
+        if end > start:
+            runs.append((first, end))
+        return runs
+
+    def split(self, source: ChunkSource) -> Iterator[Tuple[Document, Optional[Span]]]:
+        spans = self._split_sentences(source.content)
+        sentences = [
+            source.content[offset : offset + length] for offset, length in spans
+        ]
+        if len(sentences) < 2:
+            for sentence, span in zip(sentences, spans):
+                yield Document(page_content=sentence), span
+            return
+
+        bounds = [0, *self._breakpoints(sentences).tolist(), len(sentences)]
+        for start, end in zip(bounds, bounds[1:]):
+            for first, stop in self._limit_size(sentences, start, end):
+                offset = spans[first][0]
+                last_offset, last_length = spans[stop - 1]
+                yield (
+                    Document(page_content=" ".join(sentences[first:stop])),
+                    (offset, last_offset + last_length - offset),
+                )
+
+
+class TableAwareContentChunker(RecursiveContentChunker):
+    """
+    Recursive text chunker that keeps Document Intelligence tables intact.
+
+    Tables are located from the spans in result.tables rather than by parsing
+    markup. A table of up to max_table_size characters becomes a single chunk,
+    and larger tables are split into groups of rows that each repeat the table's
+    header rows. Text between tables is split recursively.
+    """
+
+    def __init__(
+        self,
+        content: str = "",
+        config: Optional[ChunkerConfig] = None,
+        tables: Optional[List[Any]] = None,
+        source_content: Optional[str] = None,
+    ):
+        """
+        Args:
+            content: Markdown to chunk
+            config: Chunking parameters
+            tables: Tables of the analysis result (result.tables)
+            source_content: Text the table spans refer to (result.content), when
+                content has been modified since, e.g. by figure descriptions
+        """
+        super().__init__(content, config)
+        self.tables = tables
+        self.source_content = source_content
+
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "max_table_size": self.config.max_table_size}
+
+    def _default_source(self) -> ChunkSource:
+        return ChunkSource(
+            content=self.content,
+            tables=self.tables,
+            source_content=self.source_content,
+        )
+
+    @staticmethod
+    def _locate_tables(source: ChunkSource) -> List[Tuple[int, int, int, Any, int]]:
+        """
+        Find each table in the content, through source.edits when content was
+        edited, and by searching for the table's text otherwise.
+
+        Returns:
+            Sorted (start, end, table index, table, offset delta) tuples, where
+            delta converts the table's span offsets into positions in content
+        """
+        spanned = []
+        for index, table in enumerate(source.tables or []):
+            extent = span_extent(table)
+            if extent:
+                spanned.append((*extent, index, table))
+        spanned.sort(key=lambda item: item[0])
+
+        located, cursor = [], 0
+        for start, end, index, table in spanned:
+            if source.source_content is None:
+                position = start
+            elif source.edits is not None:
+                position = source.edits.to_edited(start)
+                # A table inside replaced text, e.g. a figure's body, is gone
+                text = source.source_content[start:end]
+                if source.content[position : position + end - start] != text:
+                    position = -1
+            else:
+                # Text inserted before a table moves it, so search forward for it
+                position = source.content.find(
+                    source.source_content[start:end], cursor
+                )
+            if position < 0:
+                logger.warning(f"Table #{index} not found in content, chunked as text")
+                continue
+            if position < cursor:
+                continue
+            located.append(
+                (position, position + end - start, index, table, position - start)
+            )
+            cursor = position + end - start
+        return located
+
+    @staticmethod
+    def _row_starts(
+        content: str, table: Any, start: int, end: int, delta: int
+    ) -> List[Tuple[int, int]]:
+        """(row index, position) of the start of each row that has content."""
+        first_offsets: Dict[int, int] = {}
+        for cell in table.cells:
+            if cell.spans:
+                offset = cell.spans[0].offset + delta
+                if offset < first_offsets.get(cell.row_index, end):
+                    first_offsets[cell.row_index] = offset
+
+        starts: List[Tuple[int, int]] = []
+        for row in sorted(first_offsets):
+            offset = first_offsets[row]
+            row_start = content.rfind("<tr>", start, offset)
+            if row_start < 0:
+                row_start = content.rfind("\n", start, offset) + 1
+            row_start = max(row_start, start)
+            if not starts or row_start > starts[-1][1]:
+                starts.append((row, row_start))
+        return starts
+
+    def _table_chunks(
+        self, content: str, start: int, end: int, index: int, table: Any, delta: int
+    ) -> Iterator[Tuple[Document, Span]]:
+        """Yield a table as one chunk, or as row groups with repeated headers."""
+        metadata = {"type": "table", "table_index": index}
+        starts = self._row_starts(content, table, start, end, delta)
+        if end - start <= self.config.max_table_size or len(starts) < 2:
+            yield (
+                Document(page_content=content[start:end], metadata=metadata),
+                (start, end - start),
+            )
+            return
+
+        header_rows = set()
+        for cell in table.cells:
+            if cell.kind == "columnHeader":
+                header_rows.update(
+                    range(cell.row_index, cell.row_index + (cell.row_span or 1))
+                )
+        header_count = 0
+        while (
+            header_count < len(starts) - 1 and starts[header_count][0] in header_rows
+        ):
+            header_count += 1
+
+        closing = content.rfind("</table>", starts[-1][1], end)
+        closing = closing if closing >= 0 else end
+        positions = [position for _, position in starts] + [closing]
+
+        opening = content[start : positions[0]]
+        header = content[positions[0] : positions[header_count]]
+        ending = content[closing:end]
+        budget = self.config.max_table_size - len(opening) - len(header) - len(ending)
+
+        group_start = header_count
+        for row in range(header_count, len(starts)):
+            if row + 1 < len(starts) and (
+                positions[row + 2] - positions[group_start] <= budget
+            ):
+                continue
+            body_start, body_end = positions[group_start], positions[row + 1]
+            body = content[body_start:body_end]
+            yield (
+                Document(
+                    page_content=f"{opening}{header}{body}{ending}",
+                    metadata={
+                        **metadata,
+                        "rows": f"{starts[group_start][0]}-{starts[row][0]}",
+                    },
+                ),
+                (body_start, body_end - body_start),
+            )
+            group_start = row + 1
+
+    def _text_chunks(
+        self, content: str, start: int, end: int
+    ) -> Iterator[Tuple[Document, Span]]:
+        text = content[start:end]
+        if not text.strip():
+            return
+        for document in self.splitter.create_documents([text]):
+            offset = document.metadata.pop("start_index", -1)
+            document.metadata["type"] = "text"
+            span = (start + offset, len(document.page_content)) if offset >= 0 else None
+            yield document, span
+
+    def split(self, source: ChunkSource) -> Iterator[Tuple[Document, Optional[Span]]]:
+        content = source.content
+        cursor = 0
+        for start, end, index, table, delta in self._locate_tables(source):
+            yield from self._text_chunks(content, cursor, start)
+            yield from self._table_chunks(content, start, end, index, table, delta)
+            cursor = end
+        yield from self._text_chunks(content, cursor, len(content))
 
 
 class ContentChunkerFactory:
     """Factory for creating content chunkers."""
 
     @staticmethod
-    def create(chunking_type: ChunkingType, content: str) -> ContentChunker:
+    def create(
+        chunking_type: ChunkingType,
+        content: str = "",
+        result: Optional["AnalyzeResult"] = None,
+        config: Optional[ChunkerConfig] = None,
+    ) -> ContentChunker:
         """
         Create a content chunker based on the specified type.
 
         Args:
             chunking_type: Type of chunking to perform
-            content: Content to chunk
+            content: Content to chunk; may be left empty for a chunker that is
+                reused through iter_chunks(source) or chunk_many()
+            result: Analysis result the content was generated from, used by
+                table-aware chunking to locate tables
+            config: Chunking parameters
 
         Returns:
             ContentChunker instance
         """
         if chunking_type == ChunkingType.MARKDOWN_CHUNKING:
-            return MarkdownContentChunker(content)
+            return MarkdownContentChunker(content, config)
         elif chunking_type == ChunkingType.RECURSIVE_CHUNKING:
-            return RecursiveContentChunker(content)
+            return RecursiveContentChunker(content, config)
+        elif chunking_type == ChunkingType.SEMANTIC_CHUNKING:
+            return SemanticContentChunker(content, config)
+        elif chunking_type == ChunkingType.TABLE_AWARE_CHUNKING:
+            return TableAwareContentChunker(
+                content,
+                config,
+                tables=getattr(result, "tables", None),
+                source_content=getattr(result, "content", None),
+            )
         else:
             raise ValueError(f"Unsupported chunking type: {chunking_type}")
-
@@ -1,16 +1,70 @@
 from dataclasses import dataclass, field
 from enum import Enum
-from azure.ai.documentintelligence.models import AnalyzeResult
+from typing import Any, Optional
+from actor.result_projection import ResultProjection
+from actor.text_edits import TextEdits
 
 
 class AnalyzeType(str, Enum):
     TABLE_PARSE = "table_parse"
     IMG_DESCRIPTION = "img_description"
+    # Chunk the described markdown of an earlier run, or else the raw markdown
+    CHUNKING = "chunking"
 
 
 class ChunkingType(str, Enum):
     MARKDOWN_CHUNKING = "markdown_chunking"
     RECURSIVE_CHUNKING = "recursive_chunking"
+    SEMANTIC_CHUNKING = "semantic_chunking"
+    TABLE_AWARE_CHUNKING = "table_aware_chunking"
+
+
+class BatchStatus(str, Enum):
+    ANALYZED = "analyzed"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ChunkerConfig:
+    """Chunking parameters, shared by every document a chunker is reused for."""
+
+    chunk_size: int = 250
+    chunk_overlap: int = 30
+    headers_to_split_on: tuple[tuple[str, str], ...] = (
+        ("#", "Header 1"),
+        ("##", "Header 2"),
+        ("###", "Header 3"),
+    )
+    # Table-aware chunking
+    max_table_size: int = 2000
+    # Semantic chunking
+    buffer_size: int = 1
+    breakpoint_percentile: float = 95.0
+    breakpoint_threshold: Optional[float] = None
+    max_chunk_size: int = 2000
+
+
+@dataclass
+class ChunkSource:
+    """One document to chunk, with what is needed to attach provenance."""
+
+    content: str = ""
+    # Source file name recorded on every chunk
+    source: str = ""
+    # Page number of the content before its first <!-- PageBreak -->, used
+    # when pages is not given
+    first_page: int = 1
+    # result.tables, for table-aware chunking
+    tables: Optional[list[Any]] = None
+    # result.content, which chunk spans and table spans refer to when content
+    # has been modified since, e.g. by figure descriptions
+    source_content: Optional[str] = None
+    # result.pages, to number chunks from the pages' spans
+    pages: Optional[list[Any]] = None
+    # Replacements that turned source_content into content, e.g. figure
+    # descriptions, to map chunk offsets back to source_content
+    edits: Optional[TextEdits] = None
 
 
 @dataclass
@@ -18,6 +72,14 @@ class AnalyzeOptions:
     input_file_location: str = ""
     file_name: str = ""
     analyze_type: list[AnalyzeType] = field(default_factory=list)
-    chunking_type: ChunkingType = ChunkingType.MARKDOWN_CHUNKING
+    # None skips chunking after figure descriptions
+    chunking_type: Optional[ChunkingType] = ChunkingType.MARKDOWN_CHUNKING
+    chunker_config: ChunkerConfig = field(default_factory=ChunkerConfig)
     output_content_format: str = "markdown"
-    result: AnalyzeResult | None = None
+    reuse_analysis: bool = True
+    incremental: bool = True
+    # Analyze PDFs in windows of this many pages (0 sends the whole document)
+    pages_per_window: int = 0
+    # Any of "xlsx", "csv", "jsonl" and "parquet"
+    table_formats: list[str] = field(default_factory=lambda: ["xlsx"])
+    result: ResultProjection | None = None
@@ -0,0 +1,193 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+from loguru import logger
+
+
+class DescriptionCache:
+    """
+    Persistent, content-addressed cache for generated figure descriptions.
+
+    Entries are keyed by a hash of the encoded image together with the caption,
+    prompt and deployment name, so the same figure is only described once across
+    runs and documents. Entries are evicted by age and by total size (least
+    recently used first). Access times of hits are kept in memory and written
+    in batches, so a hit does not commit a transaction.
+    """
+
+    EVICT_EVERY = 100
+    TOUCH_EVERY = 100
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 50_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_days: Optional[float] = 90,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        # Access times of hits not yet written, by key
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            db_path, timeout=30, check_same_thread=False
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS descriptions (
+                key TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_accessed_at ON descriptions (accessed_at)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(image_data: str | bytes, caption: str, prompt: str, model: str) -> str:
+        """Build a cache key from the encoded image and request parameters."""
+        digest = hashlib.sha256()
+        for part in (image_data, caption, prompt, model):
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            digest.update(hashlib.sha256(part or b"").digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached description for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT description, created_at FROM descriptions WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row and self.max_age_seconds and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM descriptions WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_EVERY:
+                self._write_touches()
+            self.hits += 1
+            return row[0]
+
+    def _write_touches(self):
+        """Write pending access times; the caller holds the lock."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE descriptions SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._touched.items()],
+        )
+        self._conn.commit()
+        self._touched = {}
+
+    def flush(self):
+        """Write the access times of recent hits."""
+        with self._lock:
+            self._write_touches()
+
+    def set(self, key: str, description: str):
+        """Store a description. Empty descriptions are never cached."""
+        if not description:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO descriptions
+                    (key, description, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, description, len(description.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % self.EVICT_EVERY == 0
+
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the limits."""
+        with self._lock:
+            # Recency decides what is evicted, so pending hits are written first
+            self._write_touches()
+            removed = 0
+            if self.max_age_seconds:
+                removed += self._conn.execute(
+                    "DELETE FROM descriptions WHERE created_at < ?",
+                    (time.time() - self.max_age_seconds,),
+                ).rowcount
+
+            count, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions"
+            ).fetchone()
+
+            if count > self.max_entries or total_size > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM descriptions ORDER BY accessed_at ASC"
+                ).fetchall()
+                stale_keys = []
+                for key, size in rows:
+                    if count <= self.max_entries and total_size <= self.max_bytes:
+                        break
+                    stale_keys.append((key,))
+                    count -= 1
+                    total_size -= size
+                self._conn.executemany(
+                    "DELETE FROM descriptions WHERE key = ?", stale_keys
+                )
+                removed += len(stale_keys)
+
+            self._conn.commit()
+
+        if removed:
+            logger.info(f"Evicted {removed} cached figure descriptions")
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters and current cache size."""
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total_size,
+        }
+
+    def close(self):
+        """Write pending access times and close the database connection."""
+        with self._lock:
+            self._write_touches()
+            self._conn.close()
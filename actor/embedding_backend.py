@@ -0,0 +1,104 @@
+import os
+import re
+import zlib
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+
+class EmbeddingBackend(ABC):
+    """Abstract base class for embedding backends used by semantic chunking."""
+
+    def __init__(self, batch_size: int = 256):
+        self.batch_size = batch_size
+
+    def params(self) -> Dict[str, Any]:
+        """Parameters that affect the embeddings, used to detect changes."""
+        return {"backend": type(self).__name__}
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts into a (len(texts), dim) array."""
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed all texts in batches of batch_size and return L2-normalized rows."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        batches = [
+            self.embed_batch(texts[start : start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        logger.info(f"Embedded {len(texts)} texts in {len(batches)} calls")
+
+        vectors = np.vstack(batches).astype(np.float32, copy=False)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Local, deterministic embeddings using the hashing trick over word unigrams
+    and bigrams. Needs no network access, which makes it suitable for offline runs
+    and tests.
+    """
+
+    _token_pattern = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dimensions: int = 1024, batch_size: int = 4096):
+        super().__init__(batch_size)
+        self.dimensions = dimensions
+
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "dimensions": self.dimensions}
+
+    def _features(self, text: str) -> List[int]:
+        tokens = self._token_pattern.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        # crc32 is stable across processes, unlike the built-in hash()
+        return [zlib.crc32(gram.encode("utf-8")) % self.dimensions for gram in grams]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            cols.extend(features)
+
+        counts = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(
+            counts,
+            (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+            1.0,
+        )
+        # Sublinear term frequency keeps long windows from dominating
+        return np.log1p(counts)
+
+
+class AzureOpenAIEmbeddingBackend(EmbeddingBackend):
+    """Embeddings from an Azure OpenAI embedding deployment, many texts per call."""
+
+    def __init__(
+        self,
+        aoai_client,
+        deployment: Optional[str] = None,
+        batch_size: int = 256,
+    ):
+        super().__init__(batch_size)
+        self.aoai_client = aoai_client
+        self.deployment = deployment or os.getenv(
+            "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME"
+        )
+
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "deployment": self.deployment}
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        response = self.aoai_client.embeddings.create(
+            model=self.deployment, input=texts
+        )
+        data = sorted(response.data, key=lambda item: item.index)
+        return np.asarray([item.embedding for item in data], dtype=np.float32)
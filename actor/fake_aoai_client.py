@@ -0,0 +1,133 @@
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import Optional
+
+
+class FakeRateLimitError(Exception):
+    """429 raised by FakeAzureOpenAI, shaped like openai.RateLimitError."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.2f}s")
+        self.response = SimpleNamespace(headers={"retry-after": f"{retry_after:.3f}"})
+
+
+class FakeServerError(Exception):
+    """Transient 503 raised by FakeAzureOpenAI."""
+
+    status_code = 503
+
+    def __init__(self):
+        super().__init__("Service unavailable")
+        self.response = SimpleNamespace(headers={})
+
+
+class FakeAzureOpenAI:
+    """
+    Local stand-in for the AzureOpenAI client's chat completions endpoint.
+
+    Responses are deterministic descriptions of the image payload, returned after
+    a configurable latency. An optional requests-per-minute quota is enforced over
+    a sliding window and answered with 429s carrying Retry-After, so throughput and
+    retry behavior can be exercised offline.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        requests_per_minute: Optional[int] = None,
+        error_rate: float = 0.0,
+        completion_tokens: int = 150,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_per_minute = requests_per_minute
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self.throttled = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._window: deque[float] = deque()
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _admit(self):
+        """Apply the sliding-window quota and random failures."""
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+
+            if (
+                self.requests_per_minute
+                and len(self._window) >= self.requests_per_minute
+            ):
+                self.throttled += 1
+                raise FakeRateLimitError(60 - (now - self._window[0]))
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                raise FakeServerError()
+
+            self._window.append(now)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+
+        time.sleep(delay)
+
+    def _create(
+        self, model: Optional[str] = None, messages: Optional[list] = None, **kwargs
+    ):
+        self._admit()
+
+        text_parts, image_urls = [], []
+        for message in messages or []:
+            content = message.get("content", "")
+            if isinstance(content, str):
+                text_parts.append(content)
+                continue
+            for part in content:
+                if part.get("type") == "text":
+                    text_parts.append(part["text"])
+                elif part.get("type") == "image_url":
+                    image_urls.append(part["image_url"]["url"])
+
+        digests = [hashlib.sha1(url.encode()).hexdigest()[:8] for url in image_urls]
+        response_format = kwargs.get("response_format") or {}
+        if response_format.get("type") == "json_object":
+            # Multi-image requests label each image with an id in the text parts
+            ids = [
+                match
+                for text in text_parts
+                for match in re.findall(r'Image id "([^"]+)"', text)
+            ]
+            content = json.dumps(
+                {
+                    image_id: f"Fake description of image {digest}."
+                    for image_id, digest in zip(ids, digests)
+                }
+            )
+        else:
+            content = f"Fake description of image {', '.join(digests) or 'none'}."
+
+        prompt_tokens = sum(len(text) for text in text_parts) // 4 + 765 * len(
+            image_urls
+        )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=self.completion_tokens,
+                total_tokens=prompt_tokens + self.completion_tokens,
+            ),
+        )
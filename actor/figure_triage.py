@@ -0,0 +1,232 @@
+import os
+import json
+import threading
+import fitz
+import numpy as np
+from PIL import Image
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+from loguru import logger
+
+
+@dataclass
+class ImageSignature:
+    """Cheap pixel statistics computed from a small thumbnail of a region."""
+
+    stddev: float
+    entropy: float
+    phash: int
+
+
+@dataclass
+class TriageDecision:
+    """Outcome of triage for one figure region."""
+
+    # "describe", "skip" or "duplicate"
+    action: str
+    reason: str = ""
+    phash: Optional[str] = None
+    # Label of the region (or "corpus") whose description is reused
+    duplicate_of: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value}
+
+
+class FigureTriage:
+    """
+    CPU-only pre-filter that decides which figure regions are worth a vision call.
+
+    Regions that are too small, nearly uniform (blank areas, rules, dividers) or
+    perceptually identical to a figure seen earlier in the document or corpus are
+    not sent to the model. Near-duplicates are matched with a 64-bit difference
+    hash (dHash) within a Hamming distance.
+
+    The default distance is calibrated on crops rendered from data/contoso.pdf:
+    the two renderings of its logo are 5 bits apart, the closest distinct
+    figures 13 bits.
+    """
+
+    THUMBNAIL_SIZE = 64
+
+    def __init__(
+        self,
+        min_area: float = 0.25,
+        min_side: float = 0.2,
+        min_stddev: float = 4.0,
+        min_entropy: float = 1.0,
+        max_hash_distance: int = 8,
+        corpus_index_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            min_area: Minimum region area in square inches
+            min_side: Minimum width and height in inches
+            min_stddev: Minimum grayscale standard deviation (0-255)
+            min_entropy: Minimum grayscale histogram entropy in bits
+            max_hash_distance: Maximum dHash Hamming distance for a duplicate
+            corpus_index_path: Optional JSON Lines file of hashes and descriptions
+                shared across documents. Descriptions are reused for any figure
+                with a similar hash, so only set it for a corpus whose repeated
+                figures mean the same thing everywhere (e.g. logos)
+        """
+        self.min_area = min_area
+        self.min_side = min_side
+        self.min_stddev = min_stddev
+        self.min_entropy = min_entropy
+        self.max_hash_distance = max_hash_distance
+        self.corpus_index_path = corpus_index_path
+        self._lock = threading.Lock()
+        self._corpus: dict[int, str] = {}
+        self._load_corpus()
+
+    def _load_corpus(self):
+        if not self.corpus_index_path or not os.path.exists(self.corpus_index_path):
+            return
+
+        with open(self.corpus_index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._corpus[int(entry["phash"], 16)] = entry["description"]
+                except (ValueError, KeyError):
+                    continue
+        logger.info(f"Loaded {len(self._corpus)} known figures from corpus index")
+
+    def params(self) -> dict:
+        """Thresholds that affect triage decisions, used to detect changes."""
+        return {
+            "min_area": self.min_area,
+            "min_side": self.min_side,
+            "min_stddev": self.min_stddev,
+            "min_entropy": self.min_entropy,
+            "max_hash_distance": self.max_hash_distance,
+        }
+
+    def check_geometry(
+        self, bounding_box: Tuple[float, float, float, float]
+    ) -> Optional[TriageDecision]:
+        """Reject regions too small to be informative, before rendering them."""
+        x0, y0, x1, y1 = bounding_box
+        width, height = abs(x1 - x0), abs(y1 - y0)
+        if width < self.min_side or height < self.min_side:
+            return TriageDecision(
+                action="skip",
+                reason=f"side {min(width, height):.2f}in below {self.min_side}in",
+            )
+        if width * height < self.min_area:
+            return TriageDecision(
+                action="skip",
+                reason=f"area {width * height:.2f}sq in below {self.min_area}sq in",
+            )
+        return None
+
+    def inspect(self, pix: fitz.Pixmap) -> ImageSignature:
+        """Compute thumbnail statistics and a perceptual hash for a rendered region."""
+        thumbnail = fitz.Pixmap(pix)
+        factor = 0
+        while max(thumbnail.width, thumbnail.height) >> factor > self.THUMBNAIL_SIZE:
+            factor += 1
+        if factor:
+            thumbnail.shrink(factor)
+
+        mode = "RGBA" if thumbnail.alpha else "RGB"
+        image = Image.frombytes(
+            mode, (thumbnail.width, thumbnail.height), thumbnail.samples
+        ).convert("L")
+        pixels = np.asarray(image, dtype=np.uint8)
+
+        histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+        probabilities = histogram[histogram > 0] / pixels.size
+        entropy = float(-(probabilities * np.log2(probabilities)).sum())
+
+        # dHash: compare horizontally adjacent pixels of a 9x8 grayscale image
+        small = np.asarray(image.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        bits = (small[:, 1:] > small[:, :-1]).ravel()
+        phash = int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+        return ImageSignature(float(pixels.std()), entropy, phash)
+
+    def _find_similar(self, phash: int, known: dict[int, str]) -> Optional[int]:
+        if phash in known:
+            return phash
+        for other in known:
+            if (phash ^ other).bit_count() <= self.max_hash_distance:
+                return other
+        return None
+
+    def classify(
+        self,
+        signature: ImageSignature,
+        label: str,
+        seen: dict[int, str],
+    ) -> TriageDecision:
+        """
+        Decide whether a rendered region should be described.
+
+        The region is registered under label in seen, the figures of its
+        document, so later regions with a similar hash are reported as
+        duplicates of it.
+        """
+        phash_hex = f"{signature.phash:016x}"
+
+        if signature.stddev < self.min_stddev:
+            return TriageDecision(
+                action="skip",
+                reason=f"pixel stddev {signature.stddev:.1f} below {self.min_stddev}",
+                phash=phash_hex,
+            )
+        if signature.entropy < self.min_entropy:
+            return TriageDecision(
+                action="skip",
+                reason=f"entropy {signature.entropy:.2f} below {self.min_entropy}",
+                phash=phash_hex,
+            )
+
+        with self._lock:
+            match = self._find_similar(signature.phash, seen)
+            if match is not None:
+                return TriageDecision(
+                    action="duplicate",
+                    reason="similar to a figure in this document",
+                    phash=phash_hex,
+                    duplicate_of=seen[match],
+                )
+
+            seen[signature.phash] = label
+
+            match = self._find_similar(signature.phash, self._corpus)
+            if match is not None:
+                return TriageDecision(
+                    action="duplicate",
+                    reason="similar to a previously described figure",
+                    phash=phash_hex,
+                    duplicate_of="corpus",
+                )
+
+        return TriageDecision(action="describe", phash=phash_hex)
+
+    def corpus_description(self, phash_hex: str) -> Optional[str]:
+        """Description of the closest corpus figure for a hash, if any."""
+        with self._lock:
+            match = self._find_similar(int(phash_hex, 16), self._corpus)
+            return self._corpus.get(match) if match is not None else None
+
+    def remember(self, phash_hex: str, description: str):
+        """Add a described figure to the corpus index."""
+        if not description or not self.corpus_index_path:
+            return
+
+        with self._lock:
+            phash = int(phash_hex, 16)
+            if phash in self._corpus:
+                return
+            self._corpus[phash] = description
+            with open(self.corpus_index_path, "a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        {"phash": phash_hex, "description": description},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
@@ -0,0 +1,187 @@
+import numpy as np
+from collections import defaultdict
+from typing import Any, Iterable, Optional, Tuple
+
+# (x0, y0, x1, y1) in page units
+Box = Tuple[float, float, float, float]
+
+# How far apart two edges may be and still be considered the same, per page unit
+DEFAULT_TOLERANCE = {"inch": 0.05, "pixel": 4.0}
+
+
+def polygon_bounds(polygon: Iterable[float]) -> Optional[Box]:
+    """
+    Axis-aligned bounding box of a polygon given as [x0, y0, x1, y1, ...].
+
+    Every point is taken into account, so rotated or skewed polygons are fully
+    enclosed.
+    """
+    points = list(polygon or [])
+    if len(points) < 4:
+        return None
+    xs, ys = points[0::2], points[1::2]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def span_extent(element: Any) -> Optional[Tuple[int, int]]:
+    """(start, end) offsets in the content covered by an element's spans."""
+    spans = element.get("spans") or []
+    if not spans:
+        return None
+    start = min(span.get("offset") for span in spans)
+    end = max(span.get("offset") + span.get("length") for span in spans)
+    return start, end
+
+
+class GeometryIndex:
+    """
+    Per-document index of element boxes.
+
+    Boxes of figures, figure captions, paragraphs and tables are kept per page
+    and kind in float32 arrays of (x0, y0, x1, y1), next to the positions of the
+    elements in the result, so spatial queries are vectorized over one page
+    instead of scanning every polygon of the document.
+
+    Works with AnalyzeResult models and with their as_dict() form.
+    """
+
+    KINDS = ("figure", "caption", "paragraph", "table")
+
+    def __init__(self):
+        self._boxes: dict[tuple[int, str], np.ndarray] = {}
+        self._ids: dict[tuple[int, str], np.ndarray] = {}
+        self._units: dict[int, str] = {}
+
+    @classmethod
+    def from_result(cls, result: Any) -> "GeometryIndex":
+        """
+        Build the index for an analysis result.
+
+        Caption boxes are indexed under the position of the figure they belong
+        to; other kinds under their own position in the result.
+        """
+        index = cls()
+        boxes = defaultdict(list)
+        ids = defaultdict(list)
+
+        def add(kind: str, element_id: int, element: Any):
+            for region in element.get("boundingRegions") or []:
+                box = polygon_bounds(region.get("polygon"))
+                if box is not None:
+                    key = (region.get("pageNumber", 1), kind)
+                    boxes[key].append(box)
+                    ids[key].append(element_id)
+
+        for page in _get(result, "pages"):
+            index._units[page.get("pageNumber")] = page.get("unit") or "inch"
+        for figure_id, figure in enumerate(_get(result, "figures")):
+            add("figure", figure_id, figure)
+            if figure.get("caption"):
+                add("caption", figure_id, figure.get("caption"))
+        for paragraph_id, paragraph in enumerate(_get(result, "paragraphs")):
+            add("paragraph", paragraph_id, paragraph)
+        for table_id, table in enumerate(_get(result, "tables")):
+            add("table", table_id, table)
+
+        for key, page_boxes in boxes.items():
+            index._boxes[key] = np.asarray(page_boxes, dtype=np.float32)
+            index._ids[key] = np.asarray(ids[key], dtype=np.int32)
+        return index
+
+    def tolerance(self, page_number: int) -> float:
+        """Default tolerance for a page, according to its unit."""
+        return DEFAULT_TOLERANCE.get(self._units.get(page_number, "inch"), 0.05)
+
+    def boxes(self, page_number: int, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(boxes, element ids) of one kind on a page; pages are 1-indexed."""
+        key = (page_number, kind)
+        if key not in self._boxes:
+            return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32)
+        return self._boxes[key], self._ids[key]
+
+    def matching(
+        self,
+        page_number: int,
+        box: Box,
+        kind: str,
+        tolerance: Optional[float] = None,
+    ) -> list[int]:
+        """
+        Ids of elements whose box equals box, with every edge within tolerance.
+
+        Args:
+            page_number: 1-indexed page
+            box: (x0, y0, x1, y1) in page units
+            kind: One of KINDS
+            tolerance: Allowed edge difference; defaults to tolerance(page)
+
+        Returns:
+            Element ids in index order
+        """
+        boxes, ids = self.boxes(page_number, kind)
+        if tolerance is None:
+            tolerance = self.tolerance(page_number)
+        close = np.all(
+            np.abs(boxes - np.asarray(box, dtype=np.float32)) <= tolerance, axis=1
+        )
+        return ids[close].tolist()
+
+    def overlapping(
+        self,
+        page_number: int,
+        box: Box,
+        kind: str,
+        tolerance: Optional[float] = None,
+        min_coverage: float = 0.0,
+    ) -> list[int]:
+        """
+        Ids of elements whose box overlaps box grown by tolerance.
+
+        Args:
+            page_number: 1-indexed page
+            box: (x0, y0, x1, y1) in page units
+            kind: One of KINDS
+            tolerance: Margin added around box; defaults to tolerance(page)
+            min_coverage: Minimum share of each element's area that must lie
+                inside the grown box, e.g. 0.5 for elements mostly within it
+
+        Returns:
+            Element ids in index order
+        """
+        boxes, ids = self.boxes(page_number, kind)
+        if tolerance is None:
+            tolerance = self.tolerance(page_number)
+        x0, y0, x1, y1 = box
+        width = np.minimum(boxes[:, 2], x1 + tolerance) - np.maximum(
+            boxes[:, 0], x0 - tolerance
+        )
+        height = np.minimum(boxes[:, 3], y1 + tolerance) - np.maximum(
+            boxes[:, 1], y0 - tolerance
+        )
+        overlap = (width >= 0) & (height >= 0)
+        if min_coverage > 0:
+            area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+            inside = np.clip(width, 0, None) * np.clip(height, 0, None)
+            overlap &= inside >= min_coverage * np.maximum(area, 1e-9)
+        return ids[overlap].tolist()
+
+    def is_caption(
+        self, page_number: int, box: Box, tolerance: Optional[float] = None
+    ) -> bool:
+        """Whether box is the region of a figure caption on the page."""
+        return bool(self.matching(page_number, box, "caption", tolerance))
+
+    def paragraphs_within(
+        self, page_number: int, box: Box, min_coverage: float = 0.5
+    ) -> list[int]:
+        """Ids of paragraphs lying mostly inside box, e.g. the text of a figure."""
+        return self.overlapping(
+            page_number, box, "paragraph", min_coverage=min_coverage
+        )
+
+
+def _get(result: Any, name: str) -> list:
+    """A collection of a result model or dict, empty when missing."""
+    if isinstance(result, dict):
+        return result.get(name) or []
+    return getattr(result, name, None) or []
@@ -0,0 +1,78 @@
+import io
+import fitz
+from dataclasses import dataclass
+from typing import Tuple
+from PIL import Image
+
+
+@dataclass
+class ImageBudget:
+    """
+    Policy for how figure regions are rendered and encoded for vision calls.
+
+    The DPI is chosen per region so the longest side stays within max_dimension
+    pixels. Regions with many distinct colors (photographs, gradients) are sent
+    as JPEG or WebP, while line art and text keep lossless PNG.
+    """
+
+    max_dimension: int = 2048
+    max_dpi: int = 300
+    min_dpi: int = 72
+    # "auto" picks photo_format or PNG per image; otherwise "png", "jpeg" or "webp"
+    image_format: str = "auto"
+    photo_format: str = "jpeg"
+    quality: int = 85
+    # Distinct colors on a 128px thumbnail above which an image counts as a photo
+    photo_color_threshold: int = 512
+
+    def choose_dpi(self, bounding_box: Tuple[float, float, float, float]) -> float:
+        """Pick a DPI for a region given its (x0, y0, x1, y1) box in inches."""
+        x0, y0, x1, y1 = bounding_box
+        longest_inches = max(abs(x1 - x0), abs(y1 - y0))
+        if longest_inches <= 0:
+            return self.max_dpi
+        dpi = self.max_dimension / longest_inches
+        return max(self.min_dpi, min(self.max_dpi, dpi))
+
+    def is_photographic_pixmap(self, pix: fitz.Pixmap) -> bool:
+        """Whether the image has too many colors to compress well as PNG."""
+        thumbnail = fitz.Pixmap(pix)
+        factor = 0
+        while max(thumbnail.width, thumbnail.height) >> factor > 128:
+            factor += 1
+        if factor:
+            thumbnail.shrink(factor)
+        return thumbnail.color_count() > self.photo_color_threshold
+
+    def encode_pixmap(self, pix: fitz.Pixmap) -> Tuple[bytes, str]:
+        """
+        Encode a rendered pixmap according to the policy.
+
+        Returns:
+            Tuple of (encoded bytes, MIME type)
+        """
+        if self.image_format != "auto":
+            image_format = self.image_format.lower()
+        elif self.is_photographic_pixmap(pix):
+            image_format = self.photo_format
+        else:
+            image_format = "png"
+
+        if image_format == "jpeg":
+            return pix.tobytes("jpeg", jpg_quality=self.quality), "image/jpeg"
+        if image_format == "webp":
+            # PyMuPDF cannot write WebP; wrap the samples in place for PIL instead
+            mode = "RGBA" if pix.alpha else "RGB"
+            image = Image.frombuffer(
+                mode,
+                (pix.width, pix.height),
+                pix.samples_mv,
+                "raw",
+                mode,
+                pix.stride,
+                1,
+            )
+            buffered = io.BytesIO()
+            image.save(buffered, format="WEBP", quality=self.quality)
+            return buffered.getvalue(), "image/webp"
+        return pix.tobytes("png"), "image/png"
@@ -1,8 +1,12 @@
+import io
 import os
+import gzip
 import json
 import uuid
+import tempfile
 from langchain_core.documents import Document
-from typing import List
+from typing import Dict, Iterable, List, Optional
+from actor.text_edits import TextEdits
 
 
 class MarkdownProcessor:
@@ -13,29 +17,86 @@ class MarkdownProcessor:
         md_content: str, img_description: str, idx: int
     ) -> str:
         """
-        Updates the idx-th <figure>…</figure> block in the Markdown with a comment containing the image description.
+        Updates the idx-th (1-based) <figure>…</figure> block in the Markdown with the image description.
         """
+        return MarkdownProcessor.update_figure_descriptions(
+            md_content, {idx: img_description}
+        )
+
+    @staticmethod
+    def update_figure_descriptions(
+        md_content: str,
+        descriptions: Dict[int, str],
+        edits: Optional[TextEdits] = None,
+    ) -> str:
+        """
+        Updates many <figure>…</figure> blocks in a single scan of the Markdown.
+
+        Args:
+            md_content: Markdown content from Document Intelligence
+            descriptions: Mapping of 1-based figure index, in document order as
+                reported in result.figures, to its description
+            edits: Receives each replacement, to map offsets in the returned
+                Markdown back to md_content
+
+        Returns:
+            Markdown with each selected figure body replaced by its description
+        """
+        if not descriptions:
+            return md_content
+
         start_tag = "<figure>"
         end_tag = "</figure>"
-        insert = f'{os.linesep}{os.linesep} #### FigureContent {os.linesep}{os.linesep} "{img_description}"'
-
-        # Find the start of the idx-th <figure>
-        pos = 0
-        for _ in range(idx + 1):
-            start = md_content.find(start_tag, pos)
-            if start == -1:  # Return -1 on failure.
-                return md_content
-            pos = start + len(start_tag)
-
-        # Find the corresponding </figure>
-        end = md_content.find(end_tag, pos)
-        if end == -1:
-            return md_content
+        last_idx = max(descriptions)
+
+        parts = []
+        copied_until = 0  # Everything before this offset is already in parts
+        search_from = 0
+        figure_idx = 0
+
+        while figure_idx < last_idx:
+            start = md_content.find(start_tag, search_from)
+            if start == -1:
+                break
+            figure_idx += 1
+            search_from = start + len(start_tag)
+
+            if figure_idx not in descriptions:
+                continue
+
+            # Find the corresponding </figure>
+            end = md_content.find(end_tag, search_from)
+            if end == -1:
+                break
+
+            # Keep the <figure> tag and replace its body with the description
+            parts.append(md_content[copied_until:search_from])
+            figure_content = (
+                f"{os.linesep}{os.linesep} #### FigureContent "
+                f'{os.linesep}{os.linesep} "{descriptions[figure_idx]}"'
+            )
+            parts.append(figure_content)
+            if edits is not None:
+                edits.record(search_from, end - search_from, len(figure_content))
+            copied_until = end
+            search_from = end + len(end_tag)
+
+        parts.append(md_content[copied_until:])
+        return "".join(parts)
 
-        # Inject the description comment immediately after the <figure> tag
-        before = md_content[:pos]
-        after = md_content[end:]
-        return before + insert + after
+    @staticmethod
+    def _document_to_dict(doc) -> dict:
+        """Convert a Document, raw string, or dict to a JSON-serializable dict."""
+        # Documents → use model_dump()
+        if isinstance(doc, Document):
+            return doc.model_dump()
+        # Plain text → wrap with id & content
+        if isinstance(doc, str):
+            return {"id": str(uuid.uuid4()), "content": doc}
+        # Already dicts → assume ready to dump
+        if isinstance(doc, dict):
+            return doc
+        raise TypeError(f"Unsupported document type: {type(doc)}")
 
     @staticmethod
     def save_documents(docs: list, file_path: str):
@@ -45,18 +106,56 @@ class MarkdownProcessor:
         if not docs:
             raise ValueError("No documents to save")
 
-        first = docs[0]
-        # Documents → use model_dump()
-        if isinstance(first, Document):
-            docs_as_dicts = [doc.model_dump() for doc in docs]
-        # Plain text → wrap with id & content
-        elif isinstance(first, str):
-            docs_as_dicts = [{"id": str(uuid.uuid4()), "content": doc} for doc in docs]
-        # Already dicts → assume ready to dump
-        elif isinstance(first, dict):
-            docs_as_dicts = docs
-        else:
-            raise TypeError(f"Unsupported document type: {type(first)}")
+        docs_as_dicts = [MarkdownProcessor._document_to_dict(doc) for doc in docs]
 
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(docs_as_dicts, f, ensure_ascii=False, indent=4)
+
+    @staticmethod
+    def stream_documents(
+        docs: Iterable, file_path: str, compress: Optional[bool] = None
+    ) -> int:
+        """
+        Write Documents, raw strings, or dicts to a JSON Lines file as they arrive.
+
+        Only one document is held at a time, so chunkers can yield lazily. Output
+        goes to a temporary file that replaces file_path once every document has
+        been written, so readers never see a partial file.
+
+        Args:
+            docs: Iterable of Documents, strings, or dicts
+            file_path: Destination path
+            compress: Gzip the output; defaults to True when file_path ends in .gz
+
+        Returns:
+            Number of documents written
+        """
+        if compress is None:
+            compress = file_path.endswith(".gz")
+
+        out_dir = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+        count = 0
+        try:
+            raw = os.fdopen(fd, "wb")
+            stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+            try:
+                with io.TextIOWrapper(stream, encoding="utf-8") as f:
+                    for doc in docs:
+                        f.write(
+                            json.dumps(
+                                MarkdownProcessor._document_to_dict(doc),
+                                ensure_ascii=False,
+                            )
+                        )
+                        f.write("\n")
+                        count += 1
+            finally:
+                raw.close()
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return count
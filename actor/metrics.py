@@ -0,0 +1,107 @@
+import os
+import json
+import math
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+from loguru import logger
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class MetricsRecorder:
+    """
+    Collects per-stage timings and per-item measurements for a workflow run.
+
+    Stages are timed with the stage() context manager; individual items such as
+    a rendered page or a model call are added with record(). When tracing is
+    enabled and OpenTelemetry is installed, every stage is also emitted as a span.
+    """
+
+    def __init__(self, enable_tracing: bool = False):
+        self._lock = threading.Lock()
+        self._tracer = None
+        if enable_tracing:
+            try:
+                from opentelemetry import trace
+
+                self._tracer = trace.get_tracer("doc-intelli-preprocessing")
+            except ImportError:
+                logger.warning("opentelemetry is not installed, tracing disabled")
+        self.reset()
+
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self.stages: list[dict] = []
+            self.items: dict[str, list[dict]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[dict]:
+        """
+        Time a stage. The yielded dict can be filled with extra attributes, which
+        end up in the report and on the span.
+        """
+        span_context = (
+            self._tracer.start_as_current_span(name) if self._tracer else None
+        )
+        span = span_context.__enter__() if span_context else None
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            attributes["seconds"] = time.perf_counter() - start
+            with self._lock:
+                self.stages.append({"stage": name, **attributes})
+            if span is not None:
+                for key, value in attributes.items():
+                    if isinstance(value, (str, bool, int, float)):
+                        span.set_attribute(key, value)
+                span_context.__exit__(None, None, None)
+
+    def record(self, category: str, **values: Any):
+        """Record one measurement, e.g. record("page_render", page=1, seconds=0.2)."""
+        with self._lock:
+            self.items[category].append(values)
+
+    def report(self) -> dict:
+        """Summarize stage timings and numeric item fields (count, total, p50, p95)."""
+        with self._lock:
+            stages = list(self.stages)
+            items = {category: list(entries) for category, entries in self.items.items()}
+
+        summary = {}
+        for category, entries in items.items():
+            numeric = defaultdict(list)
+            for entry in entries:
+                for key, value in entry.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        numeric[key].append(value)
+            summary[category] = {
+                "count": len(entries),
+                **{
+                    key: {
+                        "total": sum(values),
+                        "p50": percentile(values, 50),
+                        "p95": percentile(values, 95),
+                        "max": max(values),
+                    }
+                    for key, values in numeric.items()
+                },
+            }
+
+        return {"stages": stages, "summary": summary, "items": items}
+
+    def save(self, file_path: str):
+        """Write the report as JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False, default=str)
+        logger.info(f"Metrics saved to {file_path}")
@@ -1,6 +1,11 @@
+import time
 import fitz
 from PIL import Image
-from typing import Tuple
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+from loguru import logger
+from actor.image_budget import ImageBudget
+from actor.metrics import MetricsRecorder
 
 
 class PDFImageProcessor:
@@ -8,6 +13,117 @@ class PDFImageProcessor:
     A class to process images from PDF files.
     """
 
+    def __init__(
+        self,
+        dpi: int = 300,
+        metrics: Optional[MetricsRecorder] = None,
+        budget: Optional[ImageBudget] = None,
+    ):
+        self.dpi = dpi
+        self.metrics = metrics or MetricsRecorder()
+        # Without a budget every region is rendered at the fixed dpi
+        self.budget = budget
+
+    def _matrix_for(self, bounding_box: Tuple[float, float, float, float]):
+        """Scaling matrix for a region, using the budget's DPI choice if set."""
+        dpi = self.budget.choose_dpi(bounding_box) if self.budget else self.dpi
+        return fitz.Matrix(dpi / 72, dpi / 72)
+
+    def render_regions(
+        self,
+        pdf_path: str,
+        regions: Iterable[Tuple[int, Tuple[float, float, float, float]]],
+        as_png: bool = False,
+        encoder: Optional[Callable[[fitz.Pixmap], Any]] = None,
+    ) -> Iterator[Tuple[int, Union[Image.Image, bytes, Any]]]:
+        """
+        Render many regions of a PDF while opening the document only once.
+
+        Regions are grouped by page so each page is loaded a single time and all
+        of its clips are rendered before moving on to the next page.
+
+        Args:
+            pdf_path: Path to the PDF file
+            regions: Iterable of (page_number, bounding_box) with 0-indexed pages
+                and (x0, y0, x1, y1) coordinates in inches
+            as_png: Yield PNG-encoded bytes instead of PIL images
+            encoder: Callable applied to each rendered Pixmap, whose return
+                value is yielded instead; takes precedence over as_png
+
+        Yields:
+            Tuples of (position in regions, image), ordered by page. Regions
+            that fail to render or encode (e.g. on a page missing from the PDF)
+            are logged and skipped.
+        """
+        regions_by_page = defaultdict(list)
+        for position, (page_number, bounding_box) in enumerate(regions):
+            regions_by_page[page_number].append((position, bounding_box))
+
+        if not regions_by_page:
+            return
+
+        open_start = time.perf_counter()
+        doc = fitz.open(pdf_path)
+        self.metrics.record(
+            "pdf_open", path=pdf_path, seconds=time.perf_counter() - open_start
+        )
+        try:
+            for page_number in sorted(regions_by_page):
+                # Time spent in the consumer between yields is not counted
+                page_seconds = 0.0
+                render_start = time.perf_counter()
+                try:
+                    page = doc.load_page(page_number)
+                except Exception as e:
+                    logger.error(
+                        f"Error loading page {page_number + 1} of {pdf_path}, "
+                        f"skipping {len(regions_by_page[page_number])} regions: "
+                        f"{str(e)}"
+                    )
+                    continue
+                for position, bounding_box in regions_by_page[page_number]:
+                    try:
+                        image = self._render_region(
+                            page, bounding_box, as_png, encoder
+                        )
+                    except Exception as e:
+                        image = None
+                        logger.error(
+                            f"Error rendering region {bounding_box} on page "
+                            f"{page_number + 1} of {pdf_path}: {str(e)}"
+                        )
+                    page_seconds += time.perf_counter() - render_start
+
+                    if image is not None:
+                        yield position, image
+                    render_start = time.perf_counter()
+
+                self.metrics.record(
+                    "page_render",
+                    page=page_number + 1,
+                    regions=len(regions_by_page[page_number]),
+                    seconds=page_seconds,
+                )
+        finally:
+            doc.close()
+
+    def _render_region(
+        self,
+        page: fitz.Page,
+        bounding_box: Tuple[float, float, float, float],
+        as_png: bool,
+        encoder: Optional[Callable[[fitz.Pixmap], Any]],
+    ) -> Union[Image.Image, bytes, Any]:
+        # The rect requires the coordinates in the format (x0, y0, x1, y1).
+        rect = fitz.Rect([x * 72 for x in bounding_box])
+        pix = page.get_pixmap(matrix=self._matrix_for(bounding_box), clip=rect)
+
+        if encoder:
+            return encoder(pix)
+        if as_png:
+            return pix.tobytes("png")
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
     def crop_image_from_pdf_page(
         self,
         pdf_path: str,
@@ -25,16 +141,14 @@ class PDFImageProcessor:
         Returns:
             PIL Image of the cropped region
         """
-        doc = fitz.open(pdf_path)
-        page = doc.load_page(page_number)
-
-        # Cropping the page. The rect requires the coordinates in the format (x0, y0, x1, y1).
-        bbx = [x * 72 for x in bounding_box]
-        rect = fitz.Rect(bbx)
-        pix = page.get_pixmap(matrix=fitz.Matrix(300 / 72, 300 / 72), clip=rect)
-
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-        doc.close()
-
+        rendered = self.render_regions(pdf_path, [(page_number, bounding_box)])
+        try:
+            _, img = next(rendered)
+        except StopIteration:
+            raise ValueError(
+                f"Region {bounding_box} on page {page_number + 1} of {pdf_path} "
+                "could not be rendered"
+            ) from None
+        finally:
+            rendered.close()
         return img
@@ -0,0 +1,190 @@
+import time
+import queue
+import threading
+from typing import Any, Callable, Optional
+from loguru import logger
+
+# Put on a stage's queue once per worker to stop it
+_STOP = object()
+
+
+class _Stage:
+    """Worker threads consuming one bounded queue, with their timings."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Optional[Callable[[Any], None]],
+        workers: int,
+        queue_size: int,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.threads: list[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        # Time this stage's threads spent waiting for room in a downstream queue
+        self.blocked_seconds = 0.0
+        self.puts = 0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def add(self, **values: float):
+        with self.lock:
+            for key, value in values.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def stats(self, wall_seconds: float) -> dict:
+        with self.lock:
+            working = max(0.0, self.busy_seconds - self.blocked_seconds)
+            stats = {
+                "workers": self.workers,
+                "busy_seconds": self.busy_seconds,
+                "blocked_seconds": self.blocked_seconds,
+                "utilization": (
+                    working / (self.workers * wall_seconds) if wall_seconds else 0.0
+                ),
+            }
+            # The source stage has no queue of its own
+            if self.handler is not None:
+                stats.update(
+                    items=self.items,
+                    errors=self.errors,
+                    queue_depth=self.queue.qsize(),
+                    queue_max=self.depth_max,
+                    queue_mean=self.depth_total / self.puts if self.puts else 0.0,
+                )
+        return stats
+
+
+class BoundedPipeline:
+    """
+    Stages connected by bounded queues, each served by its own worker threads.
+
+    A source function runs in the calling thread and feeds the first stages
+    through the submit functions returned by add_stage(); handlers may submit to
+    other stages in turn. A full queue blocks the submitter, so a fast stage
+    cannot run ahead of a slow one by more than queue_size items.
+
+    Stages are stopped in the reverse order they were added, once the source
+    has returned, so add downstream stages first.
+
+        pipeline = BoundedPipeline(queue_size=8)
+        write = pipeline.add_stage("write", save, workers=1)
+        describe = pipeline.add_stage("describe", call_model, workers=4)
+        pipeline.run("render", render_and_submit)
+        pipeline.stats()
+
+    Handler errors are logged and counted, and do not stop the stage.
+    """
+
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = max(1, queue_size)
+        self._stages: list[_Stage] = []
+        self._current = threading.local()
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+
+    def add_stage(
+        self, name: str, handler: Callable[[Any], None], workers: int = 1
+    ) -> Callable[[Any], None]:
+        """
+        Start a stage and return the function that submits items to it.
+
+        Args:
+            name: Stage name used in stats and logs
+            handler: Called with each submitted item
+            workers: Threads serving the stage
+
+        Returns:
+            Submit function, blocking while the stage's queue is full
+        """
+        stage = _Stage(name, handler, max(1, workers), self.queue_size)
+        for worker in range(stage.workers):
+            thread = threading.Thread(
+                target=self._work, args=(stage,), name=f"{name}-{worker}", daemon=True
+            )
+            stage.threads.append(thread)
+            thread.start()
+        self._stages.append(stage)
+        if self._start is None:
+            self._start = time.perf_counter()
+
+        def submit(item: Any):
+            wait_start = time.perf_counter()
+            stage.queue.put(item)
+            waited = time.perf_counter() - wait_start
+            depth = stage.queue.qsize()
+            with stage.lock:
+                stage.puts += 1
+                stage.depth_total += depth
+                stage.depth_max = max(stage.depth_max, depth)
+            submitter = getattr(self._current, "stage", None)
+            if submitter is not None:
+                submitter.add(blocked_seconds=waited)
+
+        return submit
+
+    def _work(self, stage: _Stage):
+        self._current.stage = stage
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            start = time.perf_counter()
+            try:
+                stage.handler(item)
+            except Exception as e:
+                logger.error(f"Error in pipeline stage {stage.name}: {str(e)}")
+                stage.add(errors=1)
+            stage.add(items=1, busy_seconds=time.perf_counter() - start)
+
+    def run(self, name: str, source: Callable[[], None]):
+        """
+        Run source in the calling thread as stage name, then drain and stop
+        every stage. Exceptions from source are raised once all stages stopped.
+        """
+        stage = _Stage(name, None, 1, 1)
+        self._stages.insert(0, stage)
+        if self._start is None:
+            self._start = time.perf_counter()
+
+        self._current.stage = stage
+        start = time.perf_counter()
+        try:
+            source()
+        finally:
+            stage.add(busy_seconds=time.perf_counter() - start)
+            self._current.stage = None
+            for downstream in reversed(self._stages[1:]):
+                for _ in downstream.threads:
+                    downstream.queue.put(_STOP)
+                for thread in downstream.threads:
+                    thread.join()
+            self._end = time.perf_counter()
+
+    def stats(self) -> dict:
+        """
+        Wall time and per-stage items, busy time, utilization and queue depths.
+        Can be called while the pipeline runs.
+        """
+        if self._start is None:
+            return {"seconds": 0.0, "stages": {}}
+        wall_seconds = (self._end or time.perf_counter()) - self._start
+        return {
+            "seconds": wall_seconds,
+            "stages": {stage.name: stage.stats(wall_seconds) for stage in self._stages},
+        }
+
+    @staticmethod
+    def flatten(stats: dict) -> dict:
+        """Stats as flat <stage>_<name> scalars, e.g. for metrics stage attributes."""
+        return {
+            f"{name}_{key}": value
+            for name, stage in stats["stages"].items()
+            for key, value in stage.items()
+        }
@@ -0,0 +1,132 @@
+import re
+from typing import Any, Iterable
+
+# Top-level AnalyzeResult collections whose items can be referenced by elements
+COLLECTIONS = (
+    "pages",
+    "paragraphs",
+    "tables",
+    "figures",
+    "sections",
+    "lists",
+    "keyValuePairs",
+    "styles",
+    "languages",
+)
+
+ELEMENT_REF = re.compile(r"^/(\w+)/(\d+)$")
+
+WINDOW_SEPARATOR = "\n\n<!-- PageBreak -->\n\n"
+
+
+def _shift(node: Any, offset: int, bases: dict[str, int]) -> Any:
+    """Copy a result node, shifting span offsets and re-indexing element refs."""
+    if isinstance(node, list):
+        return [_shift(item, offset, bases) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    shifted = {}
+    for key, value in node.items():
+        if key == "offset" and "length" in node and isinstance(value, int):
+            shifted[key] = value + offset
+        elif key == "elements" and isinstance(value, list):
+            elements = []
+            for ref in value:
+                match = ELEMENT_REF.match(ref) if isinstance(ref, str) else None
+                if match and match.group(1) in bases:
+                    collection, position = match.group(1), int(match.group(2))
+                    ref = f"/{collection}/{position + bases[collection]}"
+                elements.append(ref)
+            shifted[key] = elements
+        else:
+            shifted[key] = _shift(value, offset, bases)
+    return shifted
+
+
+def renumber_pages(node: Any, first_page: int) -> Any:
+    """
+    Copy a result node of a sub-document, numbering its pages from first_page.
+
+    Windows are analyzed as separate PDFs holding only their own pages, so the
+    service numbers them from 1.
+    """
+    if isinstance(node, list):
+        return [renumber_pages(item, first_page) for item in node]
+    if not isinstance(node, dict):
+        return node
+    return {
+        key: (
+            value + first_page - 1
+            if key == "pageNumber" and isinstance(value, int)
+            else renumber_pages(value, first_page)
+        )
+        for key, value in node.items()
+    }
+
+
+def _renumber_figures(figures: list[dict]):
+    """
+    Give figures ids of the form "<page>.<n>", numbered in order on each page.
+
+    Each window numbers its figures on its own, so ids such as "1.1" would
+    repeat across windows of the merged result.
+    """
+    counts: dict[int, int] = {}
+    for figure in figures:
+        regions = figure.get("boundingRegions") or [{}]
+        page_number = regions[0].get("pageNumber", 1)
+        counts[page_number] = counts.get(page_number, 0) + 1
+        figure["id"] = f"{page_number}.{counts[page_number]}"
+
+
+def merge_analyze_results(results: Iterable[dict]) -> dict:
+    """
+    Merge AnalyzeResult dicts of consecutive page windows into one result.
+
+    Window contents are joined with a page break, every span offset is shifted
+    by the length of the content before it, and element references such as
+    "/paragraphs/3" are re-indexed into the merged collections. Page numbers are
+    kept as reported, so window results must already use the original
+    document's numbering (see renumber_pages); figure ids are renumbered from
+    them.
+
+    Args:
+        results: Window results (as from AnalyzeResult.as_dict()) in page order
+
+    Returns:
+        A single result dict covering all windows
+    """
+    merged: dict[str, Any] = {}
+    content_parts: list[str] = []
+    content_length = 0
+    bases = {collection: 0 for collection in COLLECTIONS}
+
+    for index, result in enumerate(results):
+        if index == 0:
+            merged = {
+                key: value
+                for key, value in result.items()
+                if key not in COLLECTIONS and key != "content"
+            }
+        elif content_parts:
+            content_parts.append(WINDOW_SEPARATOR)
+            content_length += len(WINDOW_SEPARATOR)
+
+        for collection in COLLECTIONS:
+            items = result.get(collection)
+            if items:
+                merged.setdefault(collection, []).extend(
+                    _shift(items, content_length, bases)
+                )
+
+        for collection in COLLECTIONS:
+            bases[collection] += len(result.get(collection) or [])
+
+        content = result.get("content", "")
+        content_parts.append(content)
+        content_length += len(content)
+
+    _renumber_figures(merged.get("figures") or [])
+    merged["content"] = "".join(content_parts)
+    return merged
@@ -0,0 +1,263 @@
+import re
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Optional
+from actor.result_stream import iter_json_items
+
+_CAMEL_BOUNDARY = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def _snake_case(name: str) -> str:
+    return _CAMEL_BOUNDARY.sub("_", name).lower()
+
+
+def _camel_case(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def _plain(value: Any) -> Any:
+    """Convert records, arrays and tuples back to JSON-compatible values."""
+    if isinstance(value, _Record):
+        return value.as_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, array):
+        return value.tolist()
+    return value
+
+
+class _Record:
+    """
+    Base of the projection records.
+
+    Fields use the SDK's attribute names (table.row_count), and get() accepts
+    the service's JSON names (figure.get("boundingRegions")), so records can be
+    handed to code written against AnalyzeResult models.
+    """
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, _snake_case(key), None)
+        return default if value is None else value
+
+    def as_dict(self) -> dict:
+        """JSON form with the service's names, omitting empty fields."""
+        return {
+            _camel_case(field.name): _plain(getattr(self, field.name))
+            for field in fields(self)
+            if getattr(self, field.name) is not None
+        }
+
+
+@dataclass(slots=True)
+class SpanRecord(_Record):
+    offset: int
+    length: int
+
+
+@dataclass(slots=True)
+class RegionRecord(_Record):
+    page_number: int
+    # Flat [x0, y0, x1, y1, ...] in page units
+    polygon: array
+
+
+@dataclass(slots=True)
+class PageRecord(_Record):
+    page_number: int
+    width: Optional[float]
+    height: Optional[float]
+    unit: Optional[str]
+    spans: tuple[SpanRecord, ...]
+
+
+@dataclass(slots=True)
+class ParagraphRecord(_Record):
+    content: str
+    role: Optional[str]
+    bounding_regions: tuple[RegionRecord, ...]
+    spans: tuple[SpanRecord, ...]
+
+
+@dataclass(slots=True)
+class CaptionRecord(_Record):
+    content: str
+    bounding_regions: tuple[RegionRecord, ...]
+    spans: tuple[SpanRecord, ...]
+
+
+@dataclass(slots=True)
+class FigureRecord(_Record):
+    id: Optional[str]
+    bounding_regions: tuple[RegionRecord, ...]
+    spans: tuple[SpanRecord, ...]
+    elements: Optional[tuple[str, ...]]
+    caption: Optional[CaptionRecord]
+
+
+@dataclass(slots=True)
+class TableCellRecord(_Record):
+    kind: Optional[str]
+    row_index: int
+    column_index: int
+    row_span: Optional[int]
+    column_span: Optional[int]
+    content: str
+    spans: tuple[SpanRecord, ...]
+
+
+@dataclass(slots=True)
+class TableRecord(_Record):
+    row_count: int
+    column_count: int
+    cells: tuple[TableCellRecord, ...]
+    bounding_regions: tuple[RegionRecord, ...]
+    spans: tuple[SpanRecord, ...]
+
+
+@dataclass(slots=True)
+class ResultProjection(_Record):
+    """
+    The parts of an AnalyzeResult used by post-processing.
+
+    Words, lines, selection marks, styles, sections and the polygons of table
+    cells are dropped; page, paragraph, figure and table records keep their
+    content, spans and bounding regions, with polygons stored as float arrays.
+    """
+
+    content: str = ""
+    content_format: Optional[str] = None
+    model_id: Optional[str] = None
+    api_version: Optional[str] = None
+    string_index_type: Optional[str] = None
+    pages: tuple[PageRecord, ...] = ()
+    paragraphs: tuple[ParagraphRecord, ...] = ()
+    tables: tuple[TableRecord, ...] = ()
+    figures: tuple[FigureRecord, ...] = ()
+
+
+def _spans(element: Any) -> tuple[SpanRecord, ...]:
+    return tuple(
+        SpanRecord(span.get("offset"), span.get("length"))
+        for span in element.get("spans") or []
+    )
+
+
+def _regions(element: Any) -> tuple[RegionRecord, ...]:
+    return tuple(
+        RegionRecord(
+            region.get("pageNumber", 1), array("d", region.get("polygon") or [])
+        )
+        for region in element.get("boundingRegions") or []
+    )
+
+
+def project_page(page: Any) -> PageRecord:
+    return PageRecord(
+        page_number=page.get("pageNumber"),
+        width=page.get("width"),
+        height=page.get("height"),
+        unit=page.get("unit"),
+        spans=_spans(page),
+    )
+
+
+def project_paragraph(paragraph: Any) -> ParagraphRecord:
+    return ParagraphRecord(
+        content=paragraph.get("content", ""),
+        role=paragraph.get("role"),
+        bounding_regions=_regions(paragraph),
+        spans=_spans(paragraph),
+    )
+
+
+def project_figure(figure: Any) -> FigureRecord:
+    caption = figure.get("caption")
+    elements = figure.get("elements")
+    return FigureRecord(
+        id=figure.get("id"),
+        bounding_regions=_regions(figure),
+        spans=_spans(figure),
+        elements=tuple(elements) if elements else None,
+        caption=(
+            CaptionRecord(
+                content=caption.get("content", ""),
+                bounding_regions=_regions(caption),
+                spans=_spans(caption),
+            )
+            if caption
+            else None
+        ),
+    )
+
+
+def project_table(table: Any) -> TableRecord:
+    return TableRecord(
+        row_count=table.get("rowCount"),
+        column_count=table.get("columnCount"),
+        cells=tuple(
+            TableCellRecord(
+                kind=cell.get("kind"),
+                row_index=cell.get("rowIndex"),
+                column_index=cell.get("columnIndex"),
+                row_span=cell.get("rowSpan"),
+                column_span=cell.get("columnSpan"),
+                content=cell.get("content", ""),
+                spans=_spans(cell),
+            )
+            for cell in table.get("cells") or []
+        ),
+        bounding_regions=_regions(table),
+        spans=_spans(table),
+    )
+
+
+# Projection of each element of the collections kept, by JSON name
+COLLECTIONS: dict[str, Callable[[Any], _Record]] = {
+    "pages": project_page,
+    "paragraphs": project_paragraph,
+    "tables": project_table,
+    "figures": project_figure,
+}
+SCALARS = ("content", "contentFormat", "modelId", "apiVersion", "stringIndexType")
+
+
+def project_result(result: Any) -> ResultProjection:
+    """
+    Project an AnalyzeResult (or its as_dict() form) onto compact records.
+
+    Projections pass through unchanged.
+    """
+    if isinstance(result, ResultProjection):
+        return result
+    return ResultProjection(
+        **{_snake_case(key): result.get(key) for key in SCALARS if result.get(key)},
+        **{
+            key: tuple(project(element) for element in result.get(key) or [])
+            for key, project in COLLECTIONS.items()
+        },
+    )
+
+
+def load_projection(file_path: str) -> ResultProjection:
+    """
+    Read a saved result JSON straight into a projection.
+
+    The file is parsed one array element at a time, and each element is
+    projected before the next one is read. Memory use stays bounded by the
+    largest page, not the whole document.
+    """
+    scalars: dict[str, Any] = {}
+    collections: dict[str, list] = {key: [] for key in COLLECTIONS}
+    with open(file_path, "r", encoding="utf-8") as f:
+        for key, value, is_element in iter_json_items(f):
+            if is_element and key in COLLECTIONS:
+                collections[key].append(COLLECTIONS[key](value))
+            elif not is_element and key in SCALARS:
+                scalars[_snake_case(key)] = value
+
+    return ResultProjection(
+        **scalars, **{key: tuple(records) for key, records in collections.items()}
+    )
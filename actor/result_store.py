@@ -0,0 +1,117 @@
+import os
+import json
+import shutil
+import hashlib
+from typing import TYPE_CHECKING, Optional
+from loguru import logger
+from actor.result_projection import ResultProjection, load_projection
+from actor.result_stream import write_json_stream
+
+if TYPE_CHECKING:
+    from azure.ai.documentintelligence.models import AnalyzeResult
+
+# Spans of every analysis are requested in code points, so they can be used to
+# slice result.content in Python whether or not the document was windowed
+STRING_INDEX_TYPE = "unicodeCodePoint"
+
+
+class AnalyzeResultStore:
+    """
+    On-disk store of Document Intelligence results.
+
+    Results are keyed by the hash of the input file content, the model id, the
+    output content format and the span encoding, so an unchanged file can be re-chunked, re-described or
+    re-exported without calling the service again.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self._digests: dict[tuple, str] = {}
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def file_digest(self, file_path: str, block_size: int = 1024 * 1024) -> str:
+        """
+        Return the SHA-256 hex digest of a file's content. Digests are memoized
+        per path, size and modification time, so repeated lookups are cheap.
+        """
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if memo_key in self._digests:
+            return self._digests[memo_key]
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        self._digests[memo_key] = digest.hexdigest()
+        return self._digests[memo_key]
+
+    def make_key(
+        self,
+        file_path: str,
+        output_content_format: str,
+        model_id: str = "prebuilt-layout",
+        pages: str = "",
+    ) -> str:
+        """
+        Build the store key for a file analyzed with the given settings. A page
+        range such as "1-50" keys the result of that window alone.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.file_digest(file_path).encode())
+        digest.update(
+            f"|{model_id}|{output_content_format}|{STRING_INDEX_TYPE}".encode()
+        )
+        if pages:
+            digest.update(f"|{pages}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional["AnalyzeResult"]:
+        """Rehydrate a stored result, or return None if it is not in the store."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        # The SDK is only needed to rebuild full models, not to load projections
+        from azure.ai.documentintelligence.models import AnalyzeResult
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return AnalyzeResult(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stored result {path}: {str(e)}")
+            return None
+
+    def load_projection(self, key: str) -> Optional[ResultProjection]:
+        """
+        Stream-parse a stored result into its projection, without building the
+        full model, or return None if it is not in the store.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            return load_projection(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stored result {path}: {str(e)}")
+            return None
+
+    def save(self, key: str, result: "AnalyzeResult"):
+        """Persist a result atomically, writing one page or element at a time."""
+        path = self._path(key)
+        write_json_stream(result, path)
+        logger.info(f"Analysis result stored at {path}")
+
+    def save_file(self, key: str, file_path: str):
+        """Store a saved result JSON file as is."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(file_path, path)
+
+    def export(self, key: str, file_path: str):
+        """Copy a stored result, in full, to file_path."""
+        shutil.copyfile(self._path(key), file_path)
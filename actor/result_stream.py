@@ -0,0 +1,163 @@
+import os
+import json
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Iterator, TextIO, Tuple
+
+# Characters read at a time; doubled while a single value does not fit
+READ_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Buffered reader that decodes one JSON value at a time from a text file."""
+
+    def __init__(self, f: TextIO, read_size: int = READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> bool:
+        """Append up to size characters; False once the file is exhausted."""
+        if self.eof:
+            return False
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays bounded
+        self.buffer = self.buffer[self.position :] + data
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it; "" at the end."""
+        while True:
+            while self.position < len(self.buffer):
+                if not self.buffer[self.position].isspace():
+                    return self.buffer[self.position]
+                self.position += 1
+            if not self._fill(self.read_size):
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected {char!r} but found {self.peek()!r} in JSON stream"
+            )
+        self.position += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+        self.peek()
+        size = self.read_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may continue in the file
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+
+def iter_json_items(f: TextIO) -> Iterator[Tuple[str, Any, bool]]:
+    """
+    Stream the members of a top-level JSON object.
+
+    Arrays are not decoded whole: each of their elements is yielded on its own,
+    so only one element is held in memory at a time.
+
+    Args:
+        f: Text file positioned at the start of a JSON object
+
+    Yields:
+        (key, value, is_element) tuples, where is_element is True for the
+        elements of an array member and False for any other member's value.
+        Empty arrays yield nothing.
+    """
+    reader = _JsonReader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield key, reader.value(), True
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                        continue
+                    reader.expect("]")
+                    break
+        else:
+            yield key, reader.value(), False
+
+        if reader.peek() == ",":
+            reader.expect(",")
+            continue
+        reader.expect("}")
+        return
+
+
+def _to_json(value: Any) -> Any:
+    """json.dumps default for SDK models and projection records."""
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_json_stream(result: Any, file_path: str):
+    """
+    Write an analysis result as JSON, one array element at a time.
+
+    Elements of top-level arrays (pages, paragraphs, tables, ...) are serialized
+    separately, one per line, so a full as_dict() copy of the result is never
+    built. The file is replaced atomically.
+
+    Args:
+        result: AnalyzeResult, dict, or object with as_dict()
+        file_path: Destination path
+    """
+    items = (
+        result.items() if isinstance(result, Mapping) else result.as_dict().items()
+    )
+
+    out_dir = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("{")
+            for member, (key, value) in enumerate(items):
+                if member:
+                    f.write(",")
+                f.write(f"\n{json.dumps(key)}: ")
+                if isinstance(value, (list, tuple)):
+                    f.write("[")
+                    for position, element in enumerate(value):
+                        f.write(",\n" if position else "\n")
+                        f.write(
+                            json.dumps(element, ensure_ascii=False, default=_to_json)
+                        )
+                    f.write("\n]")
+                else:
+                    f.write(json.dumps(value, ensure_ascii=False, default=_to_json))
+            f.write("\n}\n")
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,67 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Any, List
+from loguru import logger
+
+
+class StageTracker:
+    """
+    Tracks a fingerprint of each workflow stage's inputs and parameters.
+
+    A stage is up to date when its stored fingerprint matches the current one and
+    all of its outputs still exist, in which case the workflow can skip it and
+    reuse the files it produced on a previous run.
+    """
+
+    def __init__(self, state_path: str, enabled: bool = True):
+        self.state_path = state_path
+        self.enabled = enabled
+        self.stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    self.stages = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable stage state: {str(e)}")
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Hash any JSON-serializable inputs into a stable fingerprint."""
+        payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_current(self, stage: str, fingerprint: str, outputs: List[str]) -> bool:
+        """Whether the stage already ran with these inputs and its outputs exist."""
+        if not self.enabled:
+            return False
+
+        entry = self.stages.get(stage)
+        current = (
+            entry is not None
+            and entry.get("fingerprint") == fingerprint
+            and all(os.path.exists(path) for path in outputs)
+        )
+        if current:
+            logger.info(f"Stage '{stage}' is up to date, skipping")
+        return current
+
+    def mark(self, stage: str, fingerprint: str, outputs: List[str]):
+        """Record a completed stage and persist the state atomically."""
+        # Stages of one document may finish concurrently on different threads
+        with self._lock:
+            self.stages[stage] = {"fingerprint": fingerprint, "outputs": outputs}
+
+            state_dir = os.path.dirname(os.path.abspath(self.state_path))
+            fd, tmp_path = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.stages, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.state_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
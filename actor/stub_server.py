@@ -0,0 +1,192 @@
+import re
+import json
+import time
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+from loguru import logger
+from actor.fake_aoai_client import FakeAzureOpenAI
+
+ANALYZE_PATH = re.compile(r"^/documentintelligence/documentModels/([^/:]+):analyze$")
+RESULT_PATH = re.compile(
+    r"^/documentintelligence/documentModels/([^/]+)/analyzeResults/([^/]+)$"
+)
+CHAT_PATH = re.compile(r"^/openai/deployments/([^/]+)/chat/completions$")
+
+
+class StubServer:
+    """
+    Local HTTP server that imitates Document Intelligence and Azure OpenAI.
+
+    Analyze requests follow the service's long-running operation protocol (202
+    with Operation-Location, then a succeeded status carrying a canned
+    analyzeResult). Chat completions are answered by a FakeAzureOpenAI, so its
+    latency, quota and error settings apply, and its 429s are returned with
+    Retry-After. Point DOC_INTELLIGENCE_ENDPOINT and AZURE_OPENAI_ENDPOINT (or
+    the analyzers' endpoint arguments) at `endpoint` to exercise the sync and
+    async clients end to end without network access.
+
+        with StubServer(analyze_result_path="output/contoso_output.json") as stub:
+            analyzer = AsyncDocumentAnalyzer(
+                doc_endpoint=stub.endpoint, aoai_endpoint=stub.endpoint
+            )
+    """
+
+    def __init__(
+        self,
+        analyze_result: Optional[dict] = None,
+        analyze_result_path: Optional[str] = None,
+        chat_client: Optional[FakeAzureOpenAI] = None,
+        analysis_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            analyze_result: analyzeResult returned for every document
+            analyze_result_path: JSON file to load analyze_result from
+            chat_client: Fake client answering chat completions
+            analysis_latency: Seconds an analysis stays "running"
+            host: Interface to bind
+            port: Port to bind; 0 picks a free port
+        """
+        if analyze_result is None and analyze_result_path:
+            with open(analyze_result_path, "r", encoding="utf-8") as f:
+                analyze_result = json.load(f)
+        self.analyze_result = analyze_result or {"content": "", "pages": []}
+        self.chat_client = chat_client or FakeAzureOpenAI(latency=0.0)
+        self.analysis_latency = analysis_latency
+        self.requests = {"analyze": 0, "poll": 0, "chat": 0}
+        self._operations: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stub-server", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Stub server listening on {self.endpoint}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _submit(self, model_id: str) -> str:
+        operation_id = uuid.uuid4().hex
+        with self._lock:
+            self.requests["analyze"] += 1
+            self._operations[operation_id] = time.monotonic() + self.analysis_latency
+        return operation_id
+
+    def _status(self, operation_id: str) -> Optional[dict]:
+        with self._lock:
+            self.requests["poll"] += 1
+            ready_at = self._operations.get(operation_id)
+        if ready_at is None:
+            return None
+        if time.monotonic() < ready_at:
+            return {"status": "running"}
+        return {"status": "succeeded", "analyzeResult": self.analyze_result}
+
+    def _chat(self, payload: dict) -> dict:
+        with self._lock:
+            self.requests["chat"] += 1
+        response = self.chat_client.chat.completions.create(**payload)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model") or "stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": response.choices[0].message.content,
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": vars(response.usage),
+        }
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Optional[dict], headers=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                body = self._body()
+
+                match = ANALYZE_PATH.match(url.path)
+                if match:
+                    model_id = match.group(1)
+                    operation_id = stub._submit(model_id)
+                    location = (
+                        f"{stub.endpoint}/documentintelligence/documentModels/"
+                        f"{model_id}/analyzeResults/{operation_id}?{url.query}"
+                    )
+                    self._send(
+                        202,
+                        None,
+                        {"Operation-Location": location, "Retry-After": "0"},
+                    )
+                    return
+
+                if CHAT_PATH.match(url.path):
+                    try:
+                        self._send(200, stub._chat(json.loads(body or b"{}")))
+                    except Exception as e:
+                        status = getattr(e, "status_code", 500)
+                        headers = getattr(getattr(e, "response", None), "headers", {})
+                        self._send(status, {"error": {"message": str(e)}}, headers)
+                    return
+
+                self._send(404, {"error": {"message": f"No route for {url.path}"}})
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                match = RESULT_PATH.match(url.path)
+                status = stub._status(match.group(2)) if match else None
+                if status is None:
+                    self._send(404, {"error": {"message": f"No route for {url.path}"}})
+                    return
+                self._send(200, status, {"Retry-After": "0"})
+
+        return Handler
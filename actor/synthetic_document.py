@@ -0,0 +1,289 @@
+import random
+import fitz
+
+PAGE_WIDTH = 8.5
+PAGE_HEIGHT = 11.0
+MARGIN = 1.0
+FIGURE_HEIGHT = 2.5
+ROW_HEIGHT = 0.3
+GAP = 0.3
+
+WORDS = (
+    "revenue growth margin quarter forecast segment customer product market "
+    "operating expense region portfolio capital return strategy outlook"
+).split()
+
+
+def _polygon(x0: float, y0: float, x1: float, y1: float) -> list[float]:
+    """Clockwise polygon of a box in inches, as reported by Document Intelligence."""
+    return [x0, y0, x1, y0, x1, y1, x0, y1]
+
+
+class _ContentBuilder:
+    """Appends markdown and returns the span of each piece."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.length = 0
+
+    def add(self, text: str) -> dict:
+        span = {"offset": self.length, "length": len(text)}
+        self.parts.append(text)
+        self.length += len(text)
+        return span
+
+    def content(self) -> str:
+        return "".join(self.parts)
+
+
+def build_synthetic_document(
+    pdf_path: str,
+    pages: int = 5,
+    figures_per_page: int = 1,
+    tables_per_page: int = 1,
+    table_rows: int = 8,
+    table_columns: int = 4,
+    seed: int = 0,
+) -> dict:
+    """
+    Write a synthetic PDF and the AnalyzeResult Document Intelligence would
+    return for it.
+
+    Each page gets a heading, a paragraph, then figures (randomly colored vector
+    drawings) and tables (ruled grids), stacked top to bottom. Elements that do
+    not fit on the page are left out. The returned dict has markdown content
+    with <figure> blocks, HTML tables and page breaks, plus pages, figures and
+    tables with polygons in inches and spans into the content, so the whole
+    pipeline can run on it without the service.
+
+    Args:
+        pdf_path: Where to write the PDF
+        pages: Number of pages
+        figures_per_page: Figures drawn on each page
+        tables_per_page: Tables drawn on each page
+        table_rows: Rows per table, including the header row
+        table_columns: Columns per table
+        seed: Seed for text and drawings, so documents differ from each other
+
+    Returns:
+        AnalyzeResult as a dict, as from AnalyzeResult.as_dict()
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    builder = _ContentBuilder()
+    page_entries, figures, tables, paragraphs = [], [], [], []
+
+    for page_number in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH * 72, height=PAGE_HEIGHT * 72)
+        page_start = builder.length
+        if page_number > 1:
+            builder.add("\n\n<!-- PageBreak -->\n\n")
+
+        heading = f"Section {page_number}"
+        page.insert_text((MARGIN * 72, MARGIN * 72), heading, fontsize=16)
+        paragraphs.append(
+            {
+                "role": "sectionHeading",
+                "content": heading,
+                "spans": [builder.add(f"# {heading}")],
+            }
+        )
+        builder.add("\n\n")
+
+        sentence = " ".join(rng.choice(WORDS) for _ in range(40)).capitalize() + "."
+        page.insert_textbox(
+            fitz.Rect(
+                MARGIN * 72,
+                (MARGIN + 0.3) * 72,
+                (PAGE_WIDTH - MARGIN) * 72,
+                (MARGIN + 1.3) * 72,
+            ),
+            sentence,
+            fontsize=10,
+        )
+        paragraphs.append({"content": sentence, "spans": [builder.add(sentence)]})
+        builder.add("\n\n")
+        y = MARGIN + 1.5
+
+        elements = ["figure"] * figures_per_page + ["table"] * tables_per_page
+        for element in elements:
+            if element == "figure":
+                if y + FIGURE_HEIGHT + 0.4 > PAGE_HEIGHT - MARGIN:
+                    continue
+                y = _add_figure(page, page_number, y, rng, builder, figures)
+            else:
+                if y + table_rows * ROW_HEIGHT > PAGE_HEIGHT - MARGIN:
+                    continue
+                y = _add_table(
+                    page,
+                    page_number,
+                    y,
+                    rng,
+                    builder,
+                    tables,
+                    table_rows,
+                    table_columns,
+                )
+
+        page_entries.append(
+            {
+                "pageNumber": page_number,
+                "width": PAGE_WIDTH,
+                "height": PAGE_HEIGHT,
+                "unit": "inch",
+                "spans": [
+                    {"offset": page_start, "length": builder.length - page_start}
+                ],
+            }
+        )
+
+    doc.save(pdf_path)
+    doc.close()
+
+    return {
+        "apiVersion": "2024-11-30",
+        "modelId": "prebuilt-layout",
+        "stringIndexType": "utf16CodeUnit",
+        "content": builder.content(),
+        "contentFormat": "markdown",
+        "pages": page_entries,
+        "paragraphs": paragraphs,
+        "tables": tables,
+        "figures": figures,
+    }
+
+
+def _add_figure(
+    page: fitz.Page,
+    page_number: int,
+    y: float,
+    rng: random.Random,
+    builder: _ContentBuilder,
+    figures: list,
+) -> float:
+    """Draw a figure with a caption below it and record it; return the next y."""
+    x0, x1 = MARGIN + 0.5, PAGE_WIDTH - MARGIN - 0.5
+    y0, y1 = y, y + FIGURE_HEIGHT
+
+    shape = page.new_shape()
+    shape.draw_rect(fitz.Rect(x0 * 72, y0 * 72, x1 * 72, y1 * 72))
+    shape.finish(color=(0, 0, 0), fill=(rng.random(), rng.random(), rng.random()))
+    for _ in range(6):
+        cx = rng.uniform(x0 + 0.5, x1 - 0.5) * 72
+        cy = rng.uniform(y0 + 0.5, y1 - 0.5) * 72
+        shape.draw_circle(fitz.Point(cx, cy), rng.uniform(0.1, 0.5) * 72)
+        shape.finish(fill=(rng.random(), rng.random(), rng.random()))
+    shape.commit()
+
+    caption = f"Figure {len(figures) + 1}: {rng.choice(WORDS)} by {rng.choice(WORDS)}"
+    page.insert_text((x0 * 72, (y1 + 0.25) * 72), caption, fontsize=9)
+    caption_polygon = _polygon(x0, y1 + 0.1, x1, y1 + 0.3)
+
+    start = builder.length
+    builder.add("<figure>\n<figcaption>\n")
+    caption_span = builder.add(caption)
+    builder.add("\n</figcaption>\n\n</figure>")
+    figures.append(
+        {
+            "id": f"{page_number}.{len(figures) + 1}",
+            "boundingRegions": [
+                {"pageNumber": page_number, "polygon": _polygon(x0, y0, x1, y1)}
+            ],
+            "spans": [{"offset": start, "length": builder.length - start}],
+            "caption": {
+                "content": caption,
+                "boundingRegions": [
+                    {"pageNumber": page_number, "polygon": caption_polygon}
+                ],
+                "spans": [caption_span],
+            },
+        }
+    )
+    builder.add("\n\n")
+    return y1 + 0.4 + GAP
+
+
+def _add_table(
+    page: fitz.Page,
+    page_number: int,
+    y: float,
+    rng: random.Random,
+    builder: _ContentBuilder,
+    tables: list,
+    rows: int,
+    columns: int,
+) -> float:
+    """Draw a ruled table and record it with its cells; return the next y."""
+    x0, x1 = MARGIN, PAGE_WIDTH - MARGIN
+    column_width = (x1 - x0) / columns
+    y1 = y + rows * ROW_HEIGHT
+
+    shape = page.new_shape()
+    for row in range(rows + 1):
+        shape.draw_line(
+            fitz.Point(x0 * 72, (y + row * ROW_HEIGHT) * 72),
+            fitz.Point(x1 * 72, (y + row * ROW_HEIGHT) * 72),
+        )
+    for column in range(columns + 1):
+        shape.draw_line(
+            fitz.Point((x0 + column * column_width) * 72, y * 72),
+            fitz.Point((x0 + column * column_width) * 72, y1 * 72),
+        )
+    shape.finish(color=(0, 0, 0), width=0.5)
+    shape.commit()
+
+    start = builder.length
+    builder.add("<table>\n")
+    cells = []
+    for row in range(rows):
+        builder.add("<tr>")
+        for column in range(columns):
+            if row == 0:
+                text = f"{rng.choice(WORDS).title()} {column + 1}"
+            else:
+                text = f"{rng.uniform(0, 10_000):,.2f}"
+            cell_x0 = x0 + column * column_width
+            cell_y0 = y + row * ROW_HEIGHT
+            page.insert_text(
+                ((cell_x0 + 0.05) * 72, (cell_y0 + 0.2) * 72), text, fontsize=8
+            )
+
+            tag = "th" if row == 0 else "td"
+            builder.add(f"<{tag}>")
+            cells.append(
+                {
+                    "kind": "columnHeader" if row == 0 else "content",
+                    "rowIndex": row,
+                    "columnIndex": column,
+                    "content": text,
+                    "boundingRegions": [
+                        {
+                            "pageNumber": page_number,
+                            "polygon": _polygon(
+                                cell_x0,
+                                cell_y0,
+                                cell_x0 + column_width,
+                                cell_y0 + ROW_HEIGHT,
+                            ),
+                        }
+                    ],
+                    "spans": [builder.add(text)],
+                }
+            )
+            builder.add(f"</{tag}>")
+        builder.add("</tr>\n")
+    builder.add("</table>")
+
+    tables.append(
+        {
+            "rowCount": rows,
+            "columnCount": columns,
+            "cells": cells,
+            "boundingRegions": [
+                {"pageNumber": page_number, "polygon": _polygon(x0, y, x1, y1)}
+            ],
+            "spans": [{"offset": start, "length": builder.length - start}],
+        }
+    )
+    builder.add("\n\n")
+    return y1 + GAP
@@ -1,31 +1,132 @@
 import os
-import xlsxwriter
+import re
+import csv
+import json
+from typing import TYPE_CHECKING, Iterable, Tuple
 from loguru import logger
-from azure.ai.documentintelligence.models import AnalyzeResult
+
+if TYPE_CHECKING:
+    from azure.ai.documentintelligence.models import AnalyzeResult, DocumentTable
+
+# Excel limits sheet names to 31 characters, without []:*?/\
+SHEET_NAME_MAX_LENGTH = 31
+INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# (first row, first column, last row, last column, content) of a spanned cell
+MergedRange = Tuple[int, int, int, int, str]
 
 
 class TableProcessor:
-    """Handles table processing and Excel export."""
+    """
+    Handles table processing and export.
+
+    Each table is laid out once as a dense row-major grid, with spanned cells
+    recorded as merged ranges. Excel output streams whole rows in constant memory
+    mode; CSV, JSON Lines and Parquet exports reuse the same grid.
+    """
 
     def __init__(self, output_dir: str):
         self.output_dir = output_dir
 
-    def export_to_excel(self, result: AnalyzeResult, file_name: str):
+    def table_to_grid(
+        self, table: "DocumentTable"
+    ) -> Tuple[list[list[str]], list[MergedRange]]:
+        """
+        Lay out a table as a dense grid of cleaned cell contents.
+
+        Args:
+            table: Document Intelligence table
+
+        Returns:
+            Tuple of (rows of cell contents, merged ranges for spanned cells).
+            Cells covered by a span are left empty in the grid.
+        """
+        grid = [[""] * table.column_count for _ in range(table.row_count)]
+        merges: list[MergedRange] = []
+
+        for cell in table.cells:
+            content = self._clean_cell_content(cell.content)
+            grid[cell.row_index][cell.column_index] = content
+
+            last_row = min(cell.row_index + (cell.row_span or 1), table.row_count) - 1
+            last_column = (
+                min(cell.column_index + (cell.column_span or 1), table.column_count) - 1
+            )
+            if last_row > cell.row_index or last_column > cell.column_index:
+                merges.append(
+                    (cell.row_index, cell.column_index, last_row, last_column, content)
+                )
+
+        return grid, merges
+
+    def header_row_count(self, table: "DocumentTable") -> int:
+        """Number of leading rows made up of column header cells."""
+        header_rows = {
+            row
+            for cell in table.cells
+            if cell.kind == "columnHeader"
+            for row in range(cell.row_index, cell.row_index + (cell.row_span or 1))
+        }
+        count = 0
+        while count in header_rows:
+            count += 1
+        return count
+
+    def export(
+        self,
+        result: "AnalyzeResult",
+        file_name: str,
+        formats: Iterable[str] = ("xlsx",),
+    ) -> list[str]:
+        """
+        Export tables in each of the requested formats.
+
+        Args:
+            result: Document Intelligence analysis result
+            file_name: Base filename for the outputs
+            formats: Any of "xlsx", "csv", "jsonl" and "parquet"
+
+        Returns:
+            Paths of the files written
+        """
+        exporters = {
+            "xlsx": self.export_to_excel,
+            "csv": self.export_to_csv,
+            "jsonl": self.export_to_jsonl,
+            "parquet": self.export_to_parquet,
+        }
+
+        paths = []
+        for table_format in formats:
+            if table_format not in exporters:
+                logger.warning(f"Unknown table format: {table_format}")
+                continue
+            paths.extend(exporters[table_format](result, file_name))
+        return paths
+
+    def export_to_excel(self, result: "AnalyzeResult", file_name: str) -> list[str]:
         """
         Export tables from analysis result to Excel file.
 
         Args:
             result: Document Intelligence analysis result
             file_name: Base filename for the Excel output
+
+        Returns:
+            Paths of the files written
         """
         if not hasattr(result, "tables") or not result.tables:
             logger.warning("No tables found in the document.")
-            return
+            return []
 
         excel_output_file_name = f"{file_name}_tables.xlsx"
         excel_path = os.path.join(self.output_dir, excel_output_file_name)
 
-        workbook = xlsxwriter.Workbook(excel_path)
+        # Imported here so CSV and JSON Lines exports do not load it
+        import xlsxwriter
+
+        # Rows are flushed to disk as soon as a later row is written
+        workbook = xlsxwriter.Workbook(excel_path, {"constant_memory": True})
 
         try:
             for table_idx, table in enumerate(result.tables):
@@ -36,17 +137,110 @@ class TableProcessor:
         finally:
             workbook.close()
 
+        return [excel_path]
+
     def _process_table(self, workbook, table, table_idx: int, file_name: str):
         """Process a single table and add it to the workbook."""
-        worksheet = workbook.add_worksheet(name=f"{file_name}_{table_idx + 1}")
+        worksheet = workbook.add_worksheet(
+            name=self._sheet_name(file_name, table_idx)
+        )
 
         logger.info(
             f"Table #{table_idx} has {table.row_count} rows and {table.column_count} columns"
         )
 
-        for cell in table.cells:
-            cell_content = self._clean_cell_content(cell.content)
-            worksheet.write(cell.row_index, cell.column_index, cell_content)
+        grid, merges = self.table_to_grid(table)
+        merges_by_row: dict[int, list[MergedRange]] = {}
+        for merged in merges:
+            merges_by_row.setdefault(merged[0], []).append(merged)
+
+        # Constant memory mode requires rows, including merge anchors, in order
+        for row_index, row in enumerate(grid):
+            worksheet.write_row(row_index, 0, row)
+            for first_row, first_col, last_row, last_col, content in merges_by_row.get(
+                row_index, []
+            ):
+                worksheet.merge_range(
+                    first_row, first_col, last_row, last_col, content, None
+                )
+
+    def _sheet_name(self, file_name: str, table_idx: int) -> str:
+        """Build a valid, unique Excel sheet name for a table."""
+        suffix = f"_{table_idx + 1}"
+        base = INVALID_SHEET_CHARS.sub("_", file_name).strip("'")
+        return f"{base[: SHEET_NAME_MAX_LENGTH - len(suffix)]}{suffix}"
+
+    def export_to_csv(self, result: "AnalyzeResult", file_name: str) -> list[str]:
+        """Write each table to <file_name>_tables/<file_name>_table_<n>.csv."""
+        if not hasattr(result, "tables") or not result.tables:
+            return []
+
+        csv_dir = os.path.join(self.output_dir, f"{file_name}_tables")
+        os.makedirs(csv_dir, exist_ok=True)
+
+        paths = []
+        for table_idx, table in enumerate(result.tables):
+            grid, _ = self.table_to_grid(table)
+            path = os.path.join(csv_dir, f"{file_name}_table_{table_idx + 1}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerows(grid)
+            paths.append(path)
+
+        logger.info(f"{len(paths)} CSV files created in {csv_dir}")
+        return paths
+
+    def export_to_jsonl(self, result: "AnalyzeResult", file_name: str) -> list[str]:
+        """Write one JSON line per table row to <file_name>_tables.jsonl."""
+        if not hasattr(result, "tables") or not result.tables:
+            return []
+
+        path = os.path.join(self.output_dir, f"{file_name}_tables.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for table_idx, table in enumerate(result.tables):
+                grid, _ = self.table_to_grid(table)
+                header_rows = self.header_row_count(table)
+                for row_index, row in enumerate(grid):
+                    record = {
+                        "table": table_idx + 1,
+                        "row": row_index,
+                        "header": row_index < header_rows,
+                        "values": row,
+                    }
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        logger.info(f"JSON Lines file created: {path}")
+        return [path]
+
+    def export_to_parquet(self, result: "AnalyzeResult", file_name: str) -> list[str]:
+        """
+        Write all cells to <file_name>_tables.parquet in long format (table, row,
+        column, content). Requires pyarrow.
+        """
+        if not hasattr(result, "tables") or not result.tables:
+            return []
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.error("pyarrow is not installed, skipping Parquet export")
+            return []
+
+        columns: dict[str, list] = {"table": [], "row": [], "column": [], "content": []}
+        for table_idx, table in enumerate(result.tables):
+            grid, _ = self.table_to_grid(table)
+            for row_index, row in enumerate(grid):
+                for column_index, content in enumerate(row):
+                    columns["table"].append(table_idx + 1)
+                    columns["row"].append(row_index)
+                    columns["column"].append(column_index)
+                    columns["content"].append(content)
+
+        path = os.path.join(self.output_dir, f"{file_name}_tables.parquet")
+        pq.write_table(pa.table(columns), path)
+
+        logger.info(f"Parquet file created: {path}")
+        return [path]
 
     def _clean_cell_content(self, content: str) -> str:
         """Clean cell content by removing unwanted characters."""
@@ -0,0 +1,88 @@
+import json
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+# (offset in the original text, length replaced, length inserted)
+Edit = Tuple[int, int, int]
+
+
+class TextEdits:
+    """
+    Replacements made to a text, to map offsets between the edited text and the
+    original.
+
+    Edits are recorded in order of offset and do not overlap. Looking up an
+    offset costs O(log k) for k edits, independent of the text's length.
+    """
+
+    def __init__(self, edits: Optional[Iterable[Edit]] = None):
+        self.edits: List[Edit] = []
+        # Start of each edit in the original and in the edited text, and the
+        # shift after it
+        self._offsets: List[int] = []
+        self._starts: List[int] = []
+        self._shifts: List[int] = []
+        for offset, removed, inserted in edits or []:
+            self.record(offset, removed, inserted)
+
+    def record(self, offset: int, removed: int, inserted: int):
+        """Record that removed characters at offset were replaced by inserted."""
+        if self.edits and offset < self.edits[-1][0] + self.edits[-1][1]:
+            raise ValueError("Edits must be recorded in order and not overlap")
+        shift = self._shifts[-1] if self._shifts else 0
+        self.edits.append((offset, removed, inserted))
+        self._offsets.append(offset)
+        self._starts.append(offset + shift)
+        self._shifts.append(shift + inserted - removed)
+
+    def __len__(self) -> int:
+        return len(self.edits)
+
+    def to_original(self, offset: int, end: bool = False) -> int:
+        """
+        Offset in the original text of an offset in the edited text.
+
+        Offsets inside inserted text map to the start of the text it replaced,
+        or to its end when end is True (for the end of a span).
+        """
+        # An end offset is a boundary, so one at the start of an edit is before it
+        search = bisect_left if end else bisect_right
+        position = search(self._starts, offset) - 1
+        if position < 0:
+            return offset
+        start = self._starts[position]
+        original, removed, inserted = self.edits[position]
+        if end and offset <= start + inserted:
+            return original + removed
+        if not end and offset < start + inserted:
+            return original
+        return offset - self._shifts[position]
+
+    def to_edited(self, offset: int) -> int:
+        """
+        Offset in the edited text of an offset in the original.
+
+        Offsets inside replaced text map to the start of the text inserted there.
+        """
+        position = bisect_right(self._offsets, offset) - 1
+        if position < 0:
+            return offset
+        original, removed, _ = self.edits[position]
+        if offset < original + removed:
+            return self._starts[position]
+        return offset + self._shifts[position]
+
+    def to_span(self, offset: int, length: int) -> Tuple[int, int]:
+        """(offset, length) in the original text of a span of the edited text."""
+        start = self.to_original(offset)
+        end = self.to_original(offset + length, end=True) if length else start
+        return start, max(0, end - start)
+
+    def save(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.edits, f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "TextEdits":
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls(tuple(edit) for edit in json.load(f))
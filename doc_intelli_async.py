@@ -0,0 +1,446 @@
+import os
+import asyncio
+import timeit
+from typing import Iterable, Optional, Tuple
+import aiohttp
+import httpx
+from loguru import logger
+from openai import AsyncAzureOpenAI
+from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.ai.documentintelligence.aio import (
+    DocumentIntelligenceClient as AsyncDocumentIntelligenceClient,
+)
+from azure.ai.documentintelligence.models import AnalyzeResult
+
+from actor.async_img_desc_processor import AsyncImageDescriptionProcessor
+from actor.data_process_model import AnalyzeOptions, AnalyzeType
+from actor.result_merger import merge_analyze_results
+from actor.result_projection import ResultProjection, project_result
+from actor.stage_tracker import StageTracker
+from doc_intelli_workflow import DocumentAnalyzer
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class AsyncDocumentAnalyzer(DocumentAnalyzer):
+    """
+    Asynchronous DocumentAnalyzer for ingesting many documents in one event loop.
+
+    Document Intelligence polling and Azure OpenAI calls are awaited through the
+    aio clients instead of blocking a thread each. Both clients use pooled HTTP
+    sessions shared by every document. Within a document, figure descriptions
+    and table export run concurrently; across documents, up to
+    document_concurrency documents are in progress at once. CPU-bound steps
+    (rendering, chunking, table export) run in worker threads.
+
+    Use it as an async context manager, so the HTTP sessions are opened and
+    closed on the running loop:
+
+        async with AsyncDocumentAnalyzer("output") as analyzer:
+            results = await analyzer.analyze_many(options_list)
+    """
+
+    image_processor_class = AsyncImageDescriptionProcessor
+
+    def __init__(
+        self,
+        output_dir: str = "output",
+        document_concurrency: int = 8,
+        max_connections: int = 64,
+        doc_endpoint: Optional[str] = None,
+        aoai_endpoint: Optional[str] = None,
+        doc_client: Optional[AsyncDocumentIntelligenceClient] = None,
+        aoai_client: Optional[AsyncAzureOpenAI] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            output_dir: Output directory
+            document_concurrency: Documents analyzed at the same time
+            max_connections: Size of each pooled HTTP session
+            doc_endpoint: Document Intelligence endpoint, by default from
+                DOC_INTELLIGENCE_ENDPOINT (e.g. a local stub server)
+            aoai_endpoint: Azure OpenAI endpoint, by default from
+                AZURE_OPENAI_ENDPOINT
+            doc_client: Async Document Intelligence client to use instead
+            aoai_client: Async Azure OpenAI client to use instead
+            **kwargs: Other DocumentAnalyzer arguments
+        """
+        self.document_concurrency = max(1, document_concurrency)
+        self.max_connections = max(1, max_connections)
+        self.doc_endpoint = doc_endpoint or os.getenv("DOC_INTELLIGENCE_ENDPOINT")
+        self.aoai_endpoint = aoai_endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
+        self._injected_doc_client = doc_client
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+        self._owned_clients: list = []
+
+        super().__init__(output_dir, aoai_client=aoai_client, **kwargs)
+        self._documents = asyncio.Semaphore(self.document_concurrency)
+
+    def _create_document_client(self) -> Optional[AsyncDocumentIntelligenceClient]:
+        # Created in open(), once an event loop is running
+        return self._injected_doc_client
+
+    def _create_aoai_client(self) -> Optional[AsyncAzureOpenAI]:
+        # Created in open(), once an event loop is running
+        return None
+
+    async def open(self) -> "AsyncDocumentAnalyzer":
+        """
+        Create the pooled HTTP sessions and the clients that use them.
+
+        If creating any of them fails, those already created are closed.
+        """
+        try:
+            self._open_clients()
+        except BaseException:
+            owned = self._owned_clients
+            await self.close()
+            # Closed clients are created again by the next open()
+            if self.doc_client in owned:
+                self.doc_client = None
+            if self.aoai_client in owned:
+                self.aoai_client = None
+            raise
+        return self
+
+    def _open_clients(self):
+        if self.doc_client is None:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+            self.doc_client = AsyncDocumentIntelligenceClient(
+                endpoint=self.doc_endpoint,
+                credential=AzureKeyCredential(os.getenv("DOC_INTELLIGENCE_API_KEY")),
+                transport=AioHttpTransport(
+                    session=self._http_session, session_owner=False
+                ),
+            )
+            self._owned_clients.append(self.doc_client)
+
+        if self.aoai_client is None:
+            self._httpx_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                )
+            )
+            self.aoai_client = AsyncAzureOpenAI(
+                azure_endpoint=self.aoai_endpoint,
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                # Retries are handled by the RequestScheduler
+                max_retries=0,
+                http_client=self._httpx_client,
+            )
+            self._owned_clients.append(self.aoai_client)
+            self.image_processor.aoai_client = self.aoai_client
+
+    async def close(self):
+        """Close the clients and HTTP sessions created by open()."""
+        for client in self._owned_clients:
+            await client.close()
+        self._owned_clients = []
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+            self._httpx_client = None
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    async def __aenter__(self) -> "AsyncDocumentAnalyzer":
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def analyze_many(
+        self, options_list: Iterable[AnalyzeOptions]
+    ) -> list[Optional[ResultProjection]]:
+        """
+        Analyze documents concurrently.
+
+        Metrics of all documents are collected together and saved to
+        <output_dir>/async_metrics.json.
+
+        Args:
+            options_list: Analysis configuration options, one per document
+
+        Returns:
+            Results in the order of options_list; None for failed documents
+        """
+        self.metrics.reset()
+
+        async def run(options: AnalyzeOptions) -> Optional[ResultProjection]:
+            async with self._documents:
+                try:
+                    return await self.analyze(options)
+                except Exception as e:
+                    logger.error(
+                        f"Analysis of {options.input_file_location} failed: {str(e)}"
+                    )
+                    return None
+
+        results = await asyncio.gather(*(run(options) for options in options_list))
+        await asyncio.to_thread(
+            self.metrics.save, os.path.join(self.output_dir, "async_metrics.json")
+        )
+        return results
+
+    async def analyze(self, options: AnalyzeOptions) -> ResultProjection:
+        """
+        Analyze a document based on the provided options.
+
+        Unlike DocumentAnalyzer.analyze(), metrics are not reset or saved per
+        document, since documents share the recorder while they overlap.
+
+        Args:
+            options: Analysis configuration options
+
+        Returns:
+            Projection of the AnalyzeResult; the full result is kept in the
+            result store
+        """
+        logger.info(f"Starting analysis of {options.input_file_location}")
+
+        result = await self.arun_document_analysis(options)
+        options.result = result
+
+        stages = StageTracker(
+            os.path.join(self.output_dir, f"{options.file_name}_stages.json"),
+            enabled=options.incremental,
+        )
+        analysis_fingerprint = self.result_store.make_key(
+            options.input_file_location, options.output_content_format
+        )
+
+        await asyncio.to_thread(
+            self._raw_markdown_stage, options, stages, analysis_fingerprint
+        )
+        await self._apost_process(options, stages, analysis_fingerprint)
+        return result
+
+    async def arun_document_analysis(
+        self, options: AnalyzeOptions
+    ) -> ResultProjection:
+        """Coroutine version of run_document_analysis()."""
+        store_key = await asyncio.to_thread(
+            self.result_store.make_key,
+            options.input_file_location,
+            options.output_content_format,
+        )
+
+        with self.metrics.stage(
+            "document_analysis",
+            document=options.file_name,
+            bytes=os.path.getsize(options.input_file_location),
+        ) as stage:
+            if options.reuse_analysis:
+                projection = await asyncio.to_thread(
+                    self.result_store.load_projection, store_key
+                )
+                if projection is not None:
+                    logger.info(
+                        f"Reusing stored analysis for {options.input_file_location}"
+                    )
+                    stage["stored_result"] = True
+                    return projection
+
+            stage["stored_result"] = False
+            windows = await asyncio.to_thread(self._page_windows, options)
+            if windows:
+                windows_in_flight = asyncio.Semaphore(self.window_concurrency)
+
+                async def analyze_window(pages: str) -> AnalyzeResult:
+                    async with windows_in_flight:
+                        return await self._aanalyze_window(options, pages)
+
+                window_results = await asyncio.gather(
+                    *(analyze_window(pages) for pages in windows)
+                )
+                result = AnalyzeResult(
+                    merge_analyze_results(
+                        window_result.as_dict() for window_result in window_results
+                    )
+                )
+                stage["windows"] = len(windows)
+            else:
+                result, submit_seconds, polling_seconds = await self._abegin_analysis(
+                    options
+                )
+                stage["submit_seconds"] = submit_seconds
+                stage["polling_seconds"] = polling_seconds
+            stage["pages"] = len(getattr(result, "pages", None) or [])
+
+        await asyncio.to_thread(self.result_store.save, store_key, result)
+        return project_result(result)
+
+    async def _abegin_analysis(
+        self, options: AnalyzeOptions, pages: Optional[str] = None
+    ) -> Tuple[AnalyzeResult, float, float]:
+        """Coroutine version of _begin_analysis()."""
+        if pages:
+            body = await asyncio.to_thread(
+                self._window_body, options.input_file_location, pages
+            )
+        else:
+            body = await asyncio.to_thread(_read_bytes, options.input_file_location)
+
+        submit_start = timeit.default_timer()
+        poller = await self.doc_client.begin_analyze_document(
+            body=body, **self._analysis_request(options)
+        )
+        poll_start = timeit.default_timer()
+        result = await poller.result()
+        if pages:
+            result = self._window_result(result, pages)
+
+        return result, poll_start - submit_start, timeit.default_timer() - poll_start
+
+    async def _aanalyze_window(
+        self, options: AnalyzeOptions, pages: str
+    ) -> AnalyzeResult:
+        """Coroutine version of _analyze_window()."""
+        store_key = self.result_store.make_key(
+            options.input_file_location, options.output_content_format, pages=pages
+        )
+        if options.reuse_analysis:
+            result = await asyncio.to_thread(self.result_store.load, store_key)
+            if result is not None:
+                self.metrics.record(
+                    "analysis_window", pages=pages, stored_result=True, seconds=0.0
+                )
+                return result
+
+        for attempt in range(self.window_retries + 1):
+            try:
+                result, submit_seconds, polling_seconds = await self._abegin_analysis(
+                    options, pages
+                )
+                break
+            except Exception as e:
+                if attempt == self.window_retries:
+                    logger.error(f"Analysis of pages {pages} failed: {str(e)}")
+                    raise
+                delay = self._window_backoff(attempt)
+                logger.warning(
+                    f"Analysis of pages {pages} failed ({str(e)}), retry "
+                    f"{attempt + 1}/{self.window_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+        self.metrics.record(
+            "analysis_window",
+            pages=pages,
+            stored_result=False,
+            attempts=attempt + 1,
+            submit_seconds=submit_seconds,
+            polling_seconds=polling_seconds,
+            seconds=submit_seconds + polling_seconds,
+        )
+        await asyncio.to_thread(self.result_store.save, store_key, result)
+        return result
+
+    async def _apost_process(
+        self, options: AnalyzeOptions, stages: StageTracker, analysis_fingerprint: str
+    ):
+        """Run the requested post-processing steps of a document concurrently."""
+        if not options.result:
+            raise ValueError("No analysis result to process.")
+
+        if not options.analyze_type:
+            raise ValueError("No analyze type specified in options.")
+
+        steps = []
+        for analyze_type in options.analyze_type:
+            if analyze_type == AnalyzeType.IMG_DESCRIPTION:
+                steps.append(
+                    self._aprocess_image_descriptions(
+                        options, stages, analysis_fingerprint
+                    )
+                )
+            elif analyze_type == AnalyzeType.TABLE_PARSE:
+                steps.append(
+                    asyncio.to_thread(
+                        self._process_tables, options, stages, analysis_fingerprint
+                    )
+                )
+            elif analyze_type != AnalyzeType.CHUNKING:
+                logger.warning(f"Unknown analyze type: {analyze_type}")
+
+        await asyncio.gather(*steps)
+
+        # Chunking waits for the descriptions made in the same run
+        if AnalyzeType.CHUNKING in options.analyze_type:
+            await asyncio.to_thread(
+                self._process_chunking, options, stages, analysis_fingerprint
+            )
+
+    async def _aprocess_image_descriptions(
+        self, options: AnalyzeOptions, stages: StageTracker, analysis_fingerprint: str
+    ):
+        """Coroutine version of _process_image_descriptions()."""
+        logger.info("Processing image description analysis...")
+
+        figures_fingerprint, figure_outputs = self._figures_stage(
+            options, stages, analysis_fingerprint
+        )
+        if stages.is_current("figures", figures_fingerprint, figure_outputs):
+            markdown_content = await asyncio.to_thread(_read_text, figure_outputs[0])
+        else:
+            markdown_content = await self.image_processor.aprocess_figures(
+                options.result, options.input_file_location, options.file_name
+            )
+            # Figures whose description failed are requested again on the next run
+            if (
+                markdown_content is not None
+                and options.file_name not in self.image_processor.incomplete
+            ):
+                stages.mark("figures", figures_fingerprint, figure_outputs)
+
+        if not markdown_content:
+            logger.warning("No markdown content generated from image processing")
+            return
+        described_outputs = [figure_outputs[0], figure_outputs[2]]
+        stages.mark("described_markdown", analysis_fingerprint, described_outputs)
+
+        if (
+            options.chunking_type is not None
+            and AnalyzeType.CHUNKING not in options.analyze_type
+        ):
+            edits = self._load_edits(figure_outputs[2])
+            await asyncio.to_thread(
+                self._process_chunks, options, stages, markdown_content, edits
+            )
+
+
+def run_async_batch(
+    options_list: Iterable[AnalyzeOptions], output_dir: str = "output", **kwargs
+) -> list[Optional[ResultProjection]]:
+    """
+    Synchronous entry point: analyze documents with an AsyncDocumentAnalyzer.
+
+    Args:
+        options_list: Analysis configuration options, one per document
+        output_dir: Output directory
+        **kwargs: AsyncDocumentAnalyzer arguments
+
+    Returns:
+        Results in the order of options_list; None for failed documents
+    """
+
+    async def main():
+        async with AsyncDocumentAnalyzer(output_dir, **kwargs) as analyzer:
+            return await analyzer.analyze_many(options_list)
+
+    return asyncio.run(main())
@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import timeit
+import threading
+import multiprocessing
+from typing import Iterable, Optional
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from loguru import logger
+
+from actor.data_process_model import (
+    AnalyzeOptions,
+    AnalyzeType,
+    BatchStatus,
+    ChunkerConfig,
+    ChunkingType,
+)
+from doc_intelli_workflow import DocumentAnalyzer
+
+SUPPORTED_EXTENSIONS = (".pdf",)
+
+# One analyzer per worker process, created when the worker starts
+_worker_analyzer: Optional[DocumentAnalyzer] = None
+
+
+def _init_worker(output_dir: str, analyzer_args: dict):
+    global _worker_analyzer
+    _worker_analyzer = DocumentAnalyzer(output_dir, **analyzer_args)
+
+
+def _post_process_document(options: AnalyzeOptions) -> str:
+    """Run rendering, descriptions, tables and chunking for one document."""
+    # The analysis result was stored by the parent process, so this replays it
+    options.reuse_analysis = True
+    _worker_analyzer.analyze(options)
+    return options.input_file_location
+
+
+class BatchManifest:
+    """
+    Append-only JSON Lines log of per-document status.
+
+    The latest line for a document wins, so an interrupted batch can be resumed
+    by skipping documents already marked as done.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.statuses: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interruption
+                    continue
+                self.statuses[entry["path"]] = entry
+
+    def status(self, path: str) -> Optional[BatchStatus]:
+        entry = self.statuses.get(path)
+        return BatchStatus(entry["status"]) if entry else None
+
+    def update(self, path: str, status: BatchStatus, error: str = ""):
+        entry = {
+            "path": path,
+            "status": status.value,
+            "error": error,
+            "updated_at": time.time(),
+        }
+        with self._lock:
+            self.statuses[path] = entry
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def summary(self) -> dict:
+        counts = {}
+        for entry in self.statuses.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+class BatchAnalyzer:
+    """
+    Analyze a corpus of documents with separate concurrency limits per stage.
+
+    Document Intelligence calls are network-bound and run on a thread pool with
+    many requests in flight. Post-processing (rendering, descriptions, tables and
+    chunking) is CPU-heavy and runs on a process pool bounded by the core count.
+    Workers are configured like the batch's own analyzer, and share its Azure
+    OpenAI budget equally.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "output",
+        analysis_concurrency: int = 16,
+        processing_workers: Optional[int] = None,
+        analyze_type: Optional[list[AnalyzeType]] = None,
+        chunking_type: ChunkingType = ChunkingType.MARKDOWN_CHUNKING,
+        chunker_config: Optional[ChunkerConfig] = None,
+        manifest_path: Optional[str] = None,
+        analyzer_args: Optional[dict] = None,
+    ):
+        self.output_dir = output_dir
+        self.analysis_concurrency = max(1, analysis_concurrency)
+        self.processing_workers = processing_workers or os.cpu_count() or 1
+        self.analyze_type = analyze_type or [
+            AnalyzeType.TABLE_PARSE,
+            AnalyzeType.IMG_DESCRIPTION,
+        ]
+        self.chunking_type = chunking_type
+        self.chunker_config = chunker_config or ChunkerConfig()
+        # Arguments of every DocumentAnalyzer in the batch, sent to the workers,
+        # so they must be picklable
+        self.analyzer_args = analyzer_args or {}
+        self.analyzer = DocumentAnalyzer(output_dir, **self.analyzer_args)
+        self.manifest = BatchManifest(
+            manifest_path or os.path.join(output_dir, "batch_manifest.jsonl")
+        )
+
+    @staticmethod
+    def discover(source: str) -> list[str]:
+        """
+        List input files from a directory (recursively) or a manifest file.
+
+        A manifest is either a JSON list of paths or a text file with one path
+        per line. Relative paths are resolved against the manifest's directory.
+        """
+        if os.path.isdir(source):
+            files = []
+            for root, _, names in os.walk(source):
+                for name in names:
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        files.append(os.path.join(root, name))
+            return sorted(files)
+
+        with open(source, "r", encoding="utf-8") as f:
+            if source.lower().endswith(".json"):
+                paths = json.load(f)
+            else:
+                paths = [
+                    line.strip()
+                    for line in f
+                    if line.strip() and not line.startswith("#")
+                ]
+
+        base_dir = os.path.dirname(os.path.abspath(source))
+        return [
+            path if os.path.isabs(path) else os.path.join(base_dir, path)
+            for path in paths
+        ]
+
+    @staticmethod
+    def output_name(file_path: str, root: str) -> str:
+        """
+        Base name of a document's outputs, unique within the batch.
+
+        Documents in subdirectories of root are named after their relative path,
+        e.g. a/report.pdf as a__report, so files with the same name in different
+        directories do not overwrite each other. Documents outside root get a
+        digest of their path appended.
+        """
+        file_path = os.path.abspath(file_path)
+        relative = os.path.relpath(file_path, root)
+        if relative.startswith(os.pardir):
+            digest = hashlib.sha256(file_path.encode("utf-8")).hexdigest()[:8]
+            return f"{os.path.splitext(os.path.basename(file_path))[0]}_{digest}"
+        return os.path.splitext(relative)[0].replace(os.sep, "__")
+
+    @staticmethod
+    def _root(source: str | Iterable[str], files: list[str]) -> str:
+        """Directory that output names are relative to."""
+        if isinstance(source, str):
+            return os.path.abspath(
+                source if os.path.isdir(source) else os.path.dirname(source)
+            )
+        if not files:
+            return os.getcwd()
+        return os.path.commonpath(
+            [os.path.dirname(os.path.abspath(path)) for path in files]
+        )
+
+    def _make_options(self, file_path: str, root: str) -> AnalyzeOptions:
+        return AnalyzeOptions(
+            input_file_location=file_path,
+            file_name=self.output_name(file_path, root),
+            analyze_type=list(self.analyze_type),
+            chunking_type=self.chunking_type,
+            chunker_config=self.chunker_config,
+        )
+
+    def _worker_analyzer_args(self, workers: int) -> dict:
+        """
+        DocumentAnalyzer arguments of each post-processing worker.
+
+        Workers make all of the batch's Azure OpenAI calls, so each one gets an
+        equal share of the requests and tokens per minute.
+        """
+        budget = self.analyzer.aoai_scheduler
+        return {
+            **self.analyzer_args,
+            "requests_per_minute": budget.requests.capacity / workers,
+            "tokens_per_minute": budget.tokens.capacity / workers,
+        }
+
+    def _analyze(self, options: AnalyzeOptions) -> AnalyzeOptions:
+        """Run (or replay) Document Intelligence analysis for one document."""
+        self.analyzer.run_document_analysis(options)
+        return options
+
+    def run(self, source: str | Iterable[str]) -> dict:
+        """
+        Process every document that is not already marked done in the manifest.
+
+        Args:
+            source: Directory, manifest file, or iterable of file paths
+
+        Returns:
+            Count of documents per status
+        """
+        files = self.discover(source) if isinstance(source, str) else list(source)
+        root = self._root(source, files)
+        pending = [
+            path for path in files if self.manifest.status(path) != BatchStatus.DONE
+        ]
+        logger.info(
+            f"Batch of {len(files)} documents, {len(files) - len(pending)} already done"
+        )
+
+        workers = max(1, min(self.processing_workers, len(pending)))
+        with (
+            ThreadPoolExecutor(max_workers=self.analysis_concurrency) as analysis_pool,
+            # Spawned workers do not inherit the parent's threads, locks or clients
+            ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.output_dir, self._worker_analyzer_args(workers)),
+            ) as process_pool,
+        ):
+            in_flight: dict[Future, tuple[str, str]] = {}
+            for path in pending:
+                future = analysis_pool.submit(
+                    self._analyze, self._make_options(path, root)
+                )
+                in_flight[future] = ("analysis", path)
+
+            # Hand documents to the process pool as soon as their analysis is done
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"{stage} failed for {path}: {str(e)}")
+                        self.manifest.update(path, BatchStatus.FAILED, str(e))
+                        continue
+
+                    if stage == "analysis":
+                        self.manifest.update(path, BatchStatus.ANALYZED)
+                        next_future = process_pool.submit(
+                            _post_process_document, result
+                        )
+                        in_flight[next_future] = ("post-processing", path)
+                    else:
+                        self.manifest.update(path, BatchStatus.DONE)
+                        logger.info(f"Completed {path}")
+
+        summary = self.manifest.summary()
+        logger.info(f"Batch finished: {summary}")
+        return summary
+
+
+def run_batch(source: str, output_dir: str = "output", **kwargs) -> dict:
+    """
+    Process a directory or manifest of documents.
+
+    Args:
+        source: Directory or manifest file
+        output_dir: Output directory
+        **kwargs: Other BatchAnalyzer arguments
+
+    Returns:
+        Count of documents per status
+    """
+    logger.info(f"Starting batch analysis of {source}...")
+    start_time = timeit.default_timer()
+
+    summary = BatchAnalyzer(output_dir, **kwargs).run(source)
+
+    end_time = timeit.default_timer()
+    logger.info(f"Batch completed in {end_time - start_time:.2f} seconds")
+    return summary
+
+
+if __name__ == "__main__":
+    run_batch(sys.argv[1] if len(sys.argv) > 1 else "data")
@@ -0,0 +1,458 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from loguru import logger
+
+from actor.data_process_model import (
+    AnalyzeOptions,
+    AnalyzeType,
+    ChunkerConfig,
+    ChunkingType,
+    ChunkSource,
+)
+from actor.content_chunker import ContentChunkerFactory
+from actor.fake_aoai_client import FakeAzureOpenAI
+from actor.geometry_index import polygon_bounds
+from actor.image_budget import ImageBudget
+from actor.markdown_processor import MarkdownProcessor
+from actor.metrics import MetricsRecorder, percentile
+from actor.pdf_img_processor import PDFImageProcessor
+from actor.result_projection import ResultProjection, load_projection
+from actor.synthetic_document import build_synthetic_document
+from actor.table_processor import TableProcessor
+from actor.text_edits import TextEdits
+
+# Synthetic corpora, as arguments of build_synthetic_document
+SCENARIOS = {
+    "small": {"pages": 2, "figures_per_page": 1, "tables_per_page": 1},
+    "figure_heavy": {"pages": 10, "figures_per_page": 2, "tables_per_page": 0},
+    "table_heavy": {
+        "pages": 10,
+        "figures_per_page": 0,
+        "tables_per_page": 2,
+        "table_rows": 10,
+        "table_columns": 6,
+    },
+    "large": {"pages": 60, "figures_per_page": 1, "tables_per_page": 1},
+    "long": {"pages": 250, "figures_per_page": 1, "tables_per_page": 1},
+}
+
+# Recorded Document Intelligence output replayed as its own scenario
+RECORDED_SCENARIO = "recorded"
+RECORDED_DOCUMENT = ("data/contoso.pdf", "output/contoso_output.json")
+
+TABLE_FORMATS = ("xlsx", "csv", "jsonl")
+
+# Measurements compared with the baseline, and whether higher is better
+COMPARED_METRICS = {
+    "docs_per_sec": True,
+    "p95_seconds": False,
+    "peak_rss_mb": False,
+}
+
+
+def prepare_corpus(work_dir: str, scenario: str, documents: int) -> list[tuple]:
+    """
+    Return (pdf path, analyze result JSON path) pairs for a scenario.
+
+    Synthetic documents are seeded by their position, so they are generated once
+    and reused by later runs.
+    """
+    if scenario == RECORDED_SCENARIO:
+        if not all(os.path.exists(path) for path in RECORDED_DOCUMENT):
+            logger.warning(f"Recorded document {RECORDED_DOCUMENT} not found")
+            return []
+        return [RECORDED_DOCUMENT] * documents
+
+    corpus_dir = os.path.join(work_dir, "corpus", scenario)
+    os.makedirs(corpus_dir, exist_ok=True)
+
+    corpus = []
+    for index in range(documents):
+        pdf_path = os.path.join(corpus_dir, f"{scenario}_{index + 1}.pdf")
+        result_path = os.path.join(corpus_dir, f"{scenario}_{index + 1}.json")
+        if not (os.path.exists(pdf_path) and os.path.exists(result_path)):
+            result = build_synthetic_document(
+                pdf_path, seed=index, **SCENARIOS[scenario]
+            )
+            with open(result_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+        corpus.append((pdf_path, result_path))
+    return corpus
+
+
+def _load_result(result_path: str) -> ResultProjection:
+    # Stages consume projections, so they are benchmarked on projections too
+    return load_projection(result_path)
+
+
+def _file_name(pdf_path: str) -> str:
+    return os.path.splitext(os.path.basename(pdf_path))[0]
+
+
+def _figure_regions(result: ResultProjection) -> list[tuple]:
+    """(0-indexed page, bounding box in inches) of every figure region."""
+    regions = []
+    for figure in getattr(result, "figures", None) or []:
+        for region in figure.bounding_regions or []:
+            regions.append((region.page_number - 1, polygon_bounds(region.polygon)))
+    return regions
+
+
+def _bench_analyze(corpus: list[tuple], run_dir: str, latency: float) -> dict:
+    """
+    Time DocumentAnalyzer.analyze with stored results and a fake vision model.
+
+    Descriptions are cached across the run, so repeats of the same document
+    (as in the recorded scenario) measure the cached path.
+    """
+    from doc_intelli_workflow import DocumentAnalyzer
+
+    analyzer = DocumentAnalyzer(
+        run_dir, aoai_client=FakeAzureOpenAI(latency=latency)
+    )
+    seconds, stages = [], defaultdict(list)
+    for index, (pdf_path, result_path) in enumerate(corpus):
+        # Seeding the store makes analyze() replay the result without a request
+        analyzer.result_store.save_file(
+            analyzer.result_store.make_key(pdf_path, "markdown"), result_path
+        )
+        options = AnalyzeOptions(
+            input_file_location=pdf_path,
+            file_name=f"{_file_name(pdf_path)}_{index + 1}",
+            analyze_type=[AnalyzeType.TABLE_PARSE, AnalyzeType.IMG_DESCRIPTION],
+            reuse_analysis=True,
+            incremental=False,
+        )
+        start = time.perf_counter()
+        analyzer.analyze(options)
+        seconds.append(time.perf_counter() - start)
+        for stage in analyzer.metrics.report()["stages"]:
+            stages[stage["stage"]].append(stage["seconds"])
+    return {"seconds": seconds, "stages": stages}
+
+
+def _bench_pdf_image_processor(
+    corpus: list[tuple], run_dir: str, latency: float
+) -> dict:
+    """Time rendering and encoding every figure region of each document."""
+    budget = ImageBudget()
+    processor = PDFImageProcessor(metrics=MetricsRecorder(), budget=budget)
+    seconds = []
+    for pdf_path, result_path in corpus:
+        regions = _figure_regions(_load_result(result_path))
+        start = time.perf_counter()
+        for _ in processor.render_regions(
+            pdf_path, regions, encoder=budget.encode_pixmap
+        ):
+            pass
+        seconds.append(time.perf_counter() - start)
+    return {"seconds": seconds}
+
+
+def _bench_markdown_processor(
+    corpus: list[tuple], run_dir: str, latency: float
+) -> dict:
+    """Time figure description updates and streaming paragraphs to JSON Lines."""
+    seconds = []
+    for pdf_path, result_path in corpus:
+        result = _load_result(result_path)
+        descriptions = _figure_descriptions(result)
+        paragraphs = [
+            paragraph.as_dict()
+            for paragraph in getattr(result, "paragraphs", None) or []
+        ]
+        start = time.perf_counter()
+        MarkdownProcessor.update_figure_descriptions(result.content, descriptions)
+        MarkdownProcessor.stream_documents(
+            paragraphs, os.path.join(run_dir, f"{_file_name(pdf_path)}.jsonl")
+        )
+        seconds.append(time.perf_counter() - start)
+    return {"seconds": seconds}
+
+
+def _figure_descriptions(result: ResultProjection) -> dict[int, str]:
+    return {
+        index + 1: f"Description of figure {index + 1}"
+        for index in range(len(getattr(result, "figures", None) or []))
+    }
+
+
+def _chunker_benchmark(chunking_type: ChunkingType) -> Callable:
+    def bench(corpus: list[tuple], run_dir: str, latency: float) -> dict:
+        """
+        Time chunking each document's markdown with figure descriptions, as the
+        workflow does, including mapping chunks back to result.content.
+        """
+        chunker = ContentChunkerFactory.create(chunking_type, config=ChunkerConfig())
+        seconds = []
+        for pdf_path, result_path in corpus:
+            result = _load_result(result_path)
+            edits = TextEdits()
+            content = MarkdownProcessor.update_figure_descriptions(
+                result.content, _figure_descriptions(result), edits
+            )
+            source = ChunkSource(
+                content=content,
+                source=os.path.basename(pdf_path),
+                tables=getattr(result, "tables", None),
+                source_content=result.content,
+                pages=getattr(result, "pages", None),
+                edits=edits,
+            )
+            start = time.perf_counter()
+            for _ in chunker.iter_chunks(source):
+                pass
+            seconds.append(time.perf_counter() - start)
+        return {"seconds": seconds}
+
+    return bench
+
+
+def _bench_table_processor(
+    corpus: list[tuple], run_dir: str, latency: float
+) -> dict:
+    """Time exporting every table in each of TABLE_FORMATS."""
+    processor = TableProcessor(run_dir)
+    seconds = []
+    for index, (pdf_path, result_path) in enumerate(corpus):
+        result = _load_result(result_path)
+        start = time.perf_counter()
+        processor.export(result, f"{_file_name(pdf_path)}_{index + 1}", TABLE_FORMATS)
+        seconds.append(time.perf_counter() - start)
+    return {"seconds": seconds}
+
+
+COMPONENTS: dict[str, Callable] = {
+    "DocumentAnalyzer.analyze": _bench_analyze,
+    "PDFImageProcessor": _bench_pdf_image_processor,
+    "MarkdownProcessor": _bench_markdown_processor,
+    **{
+        f"ContentChunker.{chunking_type.value}": _chunker_benchmark(chunking_type)
+        for chunking_type in ChunkingType
+    },
+    "TableProcessor": _bench_table_processor,
+}
+
+
+def _max_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def _init_benchmark_worker():
+    # Per-figure and per-chunk logging would be part of the timings
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+
+def _run_component(
+    component: str, corpus: list[tuple], work_dir: str, latency: float
+) -> dict:
+    """Run one component benchmark in the current (fresh) process."""
+    # Keep the fake model's calls from being throttled by the request scheduler
+    os.environ["AZURE_OPENAI_REQUESTS_PER_MINUTE"] = "1000000"
+    os.environ["AZURE_OPENAI_TOKENS_PER_MINUTE"] = "1000000000"
+    # Results are replayed, but the clients still need settings to be created
+    os.environ.setdefault("DOC_INTELLIGENCE_ENDPOINT", "http://127.0.0.1")
+    os.environ.setdefault("DOC_INTELLIGENCE_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_OPENAI_DEPLOYMENT_NAME", "benchmark")
+
+    os.makedirs(work_dir, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix="run_", dir=work_dir)
+    rss_before = _max_rss_mb()
+    try:
+        measured = COMPONENTS[component](corpus, run_dir, latency)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    measured["peak_rss_mb"] = _max_rss_mb()
+    measured["rss_before_mb"] = rss_before
+    return measured
+
+
+def summarize(measured: dict) -> dict:
+    """Throughput, latency percentiles and memory of one component run."""
+    seconds = measured["seconds"]
+    total = sum(seconds)
+    summary = {
+        "documents": len(seconds),
+        "seconds": total,
+        "docs_per_sec": len(seconds) / total if total else 0.0,
+        "p50_seconds": percentile(seconds, 50) if seconds else 0.0,
+        "p95_seconds": percentile(seconds, 95) if seconds else 0.0,
+        "max_seconds": max(seconds, default=0.0),
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "rss_growth_mb": measured["peak_rss_mb"] - measured["rss_before_mb"],
+    }
+    if measured.get("stages"):
+        summary["stages"] = {
+            stage: {
+                "p50_seconds": percentile(values, 50),
+                "p95_seconds": percentile(values, 95),
+            }
+            for stage, values in measured["stages"].items()
+        }
+    return summary
+
+
+def run_benchmark(
+    scenarios: list[str],
+    documents: int = 5,
+    latency: float = 0.05,
+    work_dir: str = "output/benchmark",
+    components: Optional[list[str]] = None,
+) -> dict:
+    """
+    Benchmark each component on each scenario's corpus.
+
+    Every component runs in a freshly spawned process, so its peak RSS is not
+    inflated by the components measured before it.
+
+    Args:
+        scenarios: Names from SCENARIOS, or "recorded"
+        documents: Documents per scenario
+        latency: Seconds the fake vision model takes per call
+        work_dir: Directory for the corpus and temporary outputs
+        components: Names from COMPONENTS; defaults to all of them
+
+    Returns:
+        Report keyed by scenario, then component
+    """
+    report = {
+        "settings": {"documents": documents, "latency": latency},
+        "scenarios": {},
+    }
+    spawn = multiprocessing.get_context("spawn")
+
+    for scenario in scenarios:
+        corpus = prepare_corpus(work_dir, scenario, documents)
+        if not corpus:
+            continue
+
+        results = {}
+        for component in components or list(COMPONENTS):
+            logger.info(f"Benchmarking {component} on {scenario}...")
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=spawn, initializer=_init_benchmark_worker
+            ) as executor:
+                try:
+                    measured = executor.submit(
+                        _run_component,
+                        component,
+                        corpus,
+                        os.path.join(work_dir, "runs"),
+                        latency,
+                    ).result()
+                except Exception as e:
+                    logger.error(f"{component} failed on {scenario}: {str(e)}")
+                    continue
+            results[component] = summarize(measured)
+            logger.info(
+                f"{component} on {scenario}: "
+                f"{results[component]['docs_per_sec']:.2f} docs/sec, "
+                f"p95 {results[component]['p95_seconds']:.3f}s, "
+                f"peak RSS {results[component]['peak_rss_mb']:.0f} MB"
+            )
+        report["scenarios"][scenario] = results
+
+    return report
+
+
+def compare_to_baseline(
+    report: dict, baseline: dict, tolerance: float = 0.2
+) -> list[str]:
+    """
+    List measurements that are worse than the baseline by more than tolerance.
+
+    Args:
+        report: Report from run_benchmark()
+        baseline: Earlier report to compare against
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+
+    Returns:
+        One message per regression; empty when there are none
+    """
+    regressions = []
+    for scenario, results in report["scenarios"].items():
+        for component, summary in results.items():
+            expected = baseline.get("scenarios", {}).get(scenario, {}).get(component)
+            if not expected:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                old, new = expected.get(metric), summary.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (change < -tolerance) if higher_is_better else (change > tolerance):
+                    regressions.append(
+                        f"{scenario} / {component}: {metric} {old:.3f} -> "
+                        f"{new:.3f} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the preprocessing pipeline offline."
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=[*SCENARIOS, RECORDED_SCENARIO],
+        choices=[*SCENARIOS, RECORDED_SCENARIO],
+    )
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS))
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Fake vision model latency"
+    )
+    parser.add_argument("--work-dir", default="output/benchmark")
+    parser.add_argument("--baseline", default="output/benchmark/baseline.json")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output", default="output/benchmark/report.json")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.scenarios, args.documents, args.latency, args.work_dir, args.components
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report saved to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        logger.info(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.info("No baseline to compare against, use --save-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+    for regression in regressions:
+        logger.warning(f"Regression: {regression}")
+    if not regressions:
+        logger.info("No regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
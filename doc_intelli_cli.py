@@ -0,0 +1,226 @@
+import sys
+import argparse
+from typing import Optional
+
+from actor.data_process_model import (
+    AnalyzeType,
+    BatchStatus,
+    ChunkerConfig,
+    ChunkingType,
+)
+
+# Only the standard library and the data model are imported at startup. The
+# workflow, and through it the SDKs, PyMuPDF and langchain, is imported by the
+# subcommand that runs, and each stage imports what it needs from there on.
+
+TABLE_FORMATS = ["xlsx", "csv", "jsonl", "parquet"]
+CHUNKING_TYPES = [chunking_type.value for chunking_type in ChunkingType]
+
+
+def _document_arguments(parser: argparse.ArgumentParser):
+    """Arguments shared by the single-document subcommands."""
+    parser.add_argument("input", help="Document to analyze")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument(
+        "--result-store-dir",
+        help="Stored analysis results, by default <output-dir>/cache/analyze_results",
+    )
+    parser.add_argument(
+        "--no-reuse",
+        action="store_true",
+        help="Analyze again even if a stored result exists",
+    )
+    parser.add_argument(
+        "--no-incremental",
+        action="store_true",
+        help="Rerun every stage even if its outputs are up to date",
+    )
+    parser.add_argument(
+        "--pages-per-window",
+        type=int,
+        default=0,
+        help="Analyze PDFs in windows of this many pages",
+    )
+
+
+def _figure_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--figure-concurrency", type=int, default=4)
+    parser.add_argument("--figures-per-call", type=int, default=1)
+
+
+def _chunking_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--chunking",
+        default=ChunkingType.MARKDOWN_CHUNKING.value,
+        choices=CHUNKING_TYPES,
+    )
+    parser.add_argument("--chunk-size", type=int, default=ChunkerConfig.chunk_size)
+    parser.add_argument(
+        "--chunk-overlap", type=int, default=ChunkerConfig.chunk_overlap
+    )
+
+
+def _table_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--table-formats", nargs="+", default=["xlsx"], choices=TABLE_FORMATS
+    )
+
+
+def _chunker_config(args: argparse.Namespace) -> ChunkerConfig:
+    return ChunkerConfig(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+
+def _run_document(
+    args: argparse.Namespace,
+    analyze_type: list[AnalyzeType],
+    save_result: bool = False,
+    **option_args,
+):
+    """Run the workflow on args.input with the shared document arguments."""
+    from doc_intelli_workflow import run_workflow
+
+    analyzer_args = {"result_store_dir": args.result_store_dir}
+    if hasattr(args, "figure_concurrency"):
+        analyzer_args.update(
+            figure_concurrency=args.figure_concurrency,
+            figures_per_call=args.figures_per_call,
+        )
+    run_workflow(
+        args.input,
+        args.output_dir,
+        analyze_type=analyze_type,
+        save_result=save_result,
+        analyzer_args=analyzer_args,
+        reuse_analysis=not args.no_reuse,
+        incremental=not args.no_incremental,
+        pages_per_window=args.pages_per_window,
+        **option_args,
+    )
+
+
+def _analyze(args: argparse.Namespace) -> int:
+    _run_document(
+        args,
+        [AnalyzeType(analyze_type) for analyze_type in args.types],
+        save_result=not args.no_save_result,
+        chunking_type=ChunkingType(args.chunking),
+        chunker_config=_chunker_config(args),
+        table_formats=args.table_formats,
+    )
+    return 0
+
+
+def _describe(args: argparse.Namespace) -> int:
+    _run_document(args, [AnalyzeType.IMG_DESCRIPTION], chunking_type=None)
+    return 0
+
+
+def _tables(args: argparse.Namespace) -> int:
+    _run_document(args, [AnalyzeType.TABLE_PARSE], table_formats=args.table_formats)
+    return 0
+
+
+def _chunk(args: argparse.Namespace) -> int:
+    _run_document(
+        args,
+        [AnalyzeType.CHUNKING],
+        chunking_type=ChunkingType(args.chunking),
+        chunker_config=_chunker_config(args),
+    )
+    return 0
+
+
+def _batch(args: argparse.Namespace) -> int:
+    from doc_intelli_batch import run_batch
+
+    summary = run_batch(
+        args.source,
+        args.output_dir,
+        analysis_concurrency=args.analysis_concurrency,
+        processing_workers=args.workers,
+        analyze_type=[AnalyzeType(analyze_type) for analyze_type in args.types],
+        chunking_type=ChunkingType(args.chunking),
+        chunker_config=_chunker_config(args),
+        manifest_path=args.manifest,
+    )
+    return 1 if summary.get(BatchStatus.FAILED.value) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="doc-intelli",
+        description="Preprocess documents with Azure Document Intelligence.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser(
+        "analyze", help="Analyze a document and run every post-processing step"
+    )
+    _document_arguments(analyze)
+    analyze.add_argument(
+        "--types",
+        nargs="+",
+        default=[AnalyzeType.TABLE_PARSE.value, AnalyzeType.IMG_DESCRIPTION.value],
+        choices=[analyze_type.value for analyze_type in AnalyzeType],
+    )
+    analyze.add_argument(
+        "--no-save-result",
+        action="store_true",
+        help="Do not copy the analysis result to <name>_output.json",
+    )
+    _figure_arguments(analyze)
+    _chunking_arguments(analyze)
+    _table_arguments(analyze)
+    analyze.set_defaults(run=_analyze)
+
+    describe = commands.add_parser(
+        "describe", help="Describe figures and write the updated markdown"
+    )
+    _document_arguments(describe)
+    _figure_arguments(describe)
+    describe.set_defaults(run=_describe)
+
+    tables = commands.add_parser("tables", help="Export the document's tables")
+    _document_arguments(tables)
+    _table_arguments(tables)
+    tables.set_defaults(run=_tables)
+
+    chunk = commands.add_parser(
+        "chunk",
+        help="Chunk the described markdown of an earlier run, or the raw markdown",
+    )
+    _document_arguments(chunk)
+    _chunking_arguments(chunk)
+    chunk.set_defaults(run=_chunk)
+
+    batch = commands.add_parser(
+        "batch", help="Process a directory or manifest of documents"
+    )
+    batch.add_argument("source", help="Directory or manifest file")
+    batch.add_argument("--output-dir", default="output")
+    batch.add_argument(
+        "--manifest", help="Progress log, by default <output-dir>/batch_manifest.jsonl"
+    )
+    batch.add_argument("--analysis-concurrency", type=int, default=16)
+    batch.add_argument(
+        "--workers", type=int, help="Post-processing processes, by default one per core"
+    )
+    batch.add_argument(
+        "--types",
+        nargs="+",
+        default=[AnalyzeType.TABLE_PARSE.value, AnalyzeType.IMG_DESCRIPTION.value],
+        choices=[analyze_type.value for analyze_type in AnalyzeType],
+    )
+    _chunking_arguments(batch)
+    batch.set_defaults(run=_batch)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
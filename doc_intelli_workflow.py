@@ -1,61 +1,225 @@
 import os
-import json
+import time
+import random
 import timeit
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 from loguru import logger
-from openai import AzureOpenAI
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeResult
-
-from actor.data_process_model import AnalyzeOptions, AnalyzeType, ChunkingType
-from actor.aoai_img_desc_processor import ImageDescriptionProcessor
-from actor.content_chunker import ContentChunkerFactory
-from actor.pdf_img_processor import PDFImageProcessor
-from actor.markdown_processor import MarkdownProcessor
-from actor.table_processor import TableProcessor
+
+from actor.data_process_model import (
+    AnalyzeOptions,
+    AnalyzeType,
+    ChunkSource,
+)
+from actor.aoai_scheduler import RequestScheduler
+from actor.result_merger import merge_analyze_results, renumber_pages
+from actor.result_projection import ResultProjection, project_result
+from actor.result_store import STRING_INDEX_TYPE, AnalyzeResultStore
+from actor.stage_tracker import StageTracker
+from actor.text_edits import TextEdits
+from actor.metrics import MetricsRecorder
+
+# The SDKs, PyMuPDF, PIL, langchain and xlsxwriter are imported by the stages
+# that use them, so runs that only chunk or export tables start quickly
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+    from azure.ai.documentintelligence import DocumentIntelligenceClient
+    from azure.ai.documentintelligence.models import AnalyzeResult
+    from actor.aoai_img_desc_processor import ImageDescriptionProcessor
+    from actor.content_chunker import ContentChunker
+    from actor.description_cache import DescriptionCache
+    from actor.figure_triage import FigureTriage
+    from actor.image_budget import ImageBudget
+    from actor.markdown_processor import MarkdownProcessor
+    from actor.pdf_img_processor import PDFImageProcessor
 
 load_dotenv()
 
 
-class DocumentAnalyzer:
-    """Main class for analyzing documents using Azure Document Intelligence."""
+class _Lazy:
+    """
+    Attribute built by a method on first access, once per instance.
+
+    Assigning the attribute replaces it (e.g. with an injected client) before or
+    after it was built. Creation holds the instance's _lazy_lock, so threads
+    racing on first access share a single client.
+    """
+
+    def __init__(self, factory: Callable[[Any], Any]):
+        self.factory = factory
+        self.__doc__ = factory.__doc__
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        with instance._lazy_lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.factory(instance)
+        return instance.__dict__[self.name]
 
-    def __init__(self, output_dir: str = "output"):
+
+class DocumentAnalyzer:
+    """
+    Main class for analyzing documents using Azure Document Intelligence.
+
+    Service clients and processors are created on first use, so an analyzer
+    that replays a stored result to chunk or export tables never builds them.
+    """
+
+    # ImageDescriptionProcessor unless a subclass sets another
+    image_processor_class: Optional[type] = None
+
+    def __init__(
+        self,
+        output_dir: str = "output",
+        figure_concurrency: int = 4,
+        description_cache_path: Optional[str] = None,
+        result_store_dir: Optional[str] = None,
+        enable_tracing: bool = False,
+        image_budget: Optional["ImageBudget"] = None,
+        aoai_client: Optional["AzureOpenAI"] = None,
+        figures_per_call: int = 1,
+        triage: Optional["FigureTriage"] = None,
+        figure_corpus_index_path: Optional[str] = None,
+        window_concurrency: int = 4,
+        window_retries: int = 3,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
         self.output_dir = output_dir
+        self._lazy_lock = threading.RLock()
+        # Page windows of large PDFs analyzed in parallel, each retried on its own
+        self.window_concurrency = window_concurrency
+        self.window_retries = window_retries
         self._ensure_output_dir()
 
-        # Initialize Azure clients
-        self.doc_client = self._create_document_client()
-        self.aoai_client = self._create_aoai_client()
+        # Per-stage timings for the current document, shared by all processors
+        self.metrics = MetricsRecorder(enable_tracing=enable_tracing)
+
+        # Azure clients are created on first use unless injected
+        if aoai_client is not None:
+            self.aoai_client = aoai_client
+        # Azure OpenAI budget of this analyzer, by default the deployment's quota
+        self.aoai_scheduler = RequestScheduler(
+            requests_per_minute=requests_per_minute
+            or float(os.getenv("AZURE_OPENAI_REQUESTS_PER_MINUTE", 60)),
+            tokens_per_minute=tokens_per_minute
+            or float(os.getenv("AZURE_OPENAI_TOKENS_PER_MINUTE", 90_000)),
+        )
+
+        # Stored Document Intelligence results, reused while the input is unchanged
+        self.result_store = AnalyzeResultStore(
+            result_store_dir or os.path.join(self.output_dir, "cache", "analyze_results")
+        )
 
-        # Initialize processors
-        self.pdf_processor = PDFImageProcessor()
-        self.image_processor = ImageDescriptionProcessor(
-            self.aoai_client, self.pdf_processor, self.output_dir
+        # Processors are created on first use, from these settings
+        self.figure_concurrency = figure_concurrency
+        self.figures_per_call = figures_per_call
+        self.description_cache_path = description_cache_path or os.path.join(
+            self.output_dir, "cache", "figure_descriptions.db"
+        )
+        if image_budget is not None:
+            self.image_budget = image_budget
+        # Descriptions are only reused across documents when an index is given
+        self.figure_corpus_index_path = figure_corpus_index_path
+        if triage is not None:
+            self.triage = triage
+        # Chunkers are configured once and reused for every document
+        self._chunkers: dict[tuple, "ContentChunker"] = {}
+
+    @_Lazy
+    def doc_client(self) -> "DocumentIntelligenceClient":
+        """Document Intelligence client, created on first use."""
+        return self._create_document_client()
+
+    @_Lazy
+    def aoai_client(self) -> "AzureOpenAI":
+        """Azure OpenAI client, created on first use."""
+        return self._create_aoai_client()
+
+    @_Lazy
+    def image_budget(self) -> "ImageBudget":
+        from actor.image_budget import ImageBudget
+
+        return ImageBudget()
+
+    @_Lazy
+    def triage(self) -> "FigureTriage":
+        from actor.figure_triage import FigureTriage
+
+        return FigureTriage(corpus_index_path=self.figure_corpus_index_path)
+
+    @_Lazy
+    def pdf_processor(self) -> "PDFImageProcessor":
+        from actor.pdf_img_processor import PDFImageProcessor
+
+        return PDFImageProcessor(metrics=self.metrics, budget=self.image_budget)
+
+    @_Lazy
+    def description_cache(self) -> "DescriptionCache":
+        from actor.description_cache import DescriptionCache
+
+        return DescriptionCache(self.description_cache_path)
+
+    @_Lazy
+    def image_processor(self) -> "ImageDescriptionProcessor":
+        processor_class = self.image_processor_class
+        if processor_class is None:
+            from actor.aoai_img_desc_processor import ImageDescriptionProcessor
+
+            processor_class = ImageDescriptionProcessor
+        return processor_class(
+            self.aoai_client,
+            self.pdf_processor,
+            self.output_dir,
+            max_concurrency=self.figure_concurrency,
+            cache=self.description_cache,
+            metrics=self.metrics,
+            image_budget=self.image_budget,
+            scheduler=self.aoai_scheduler,
+            figures_per_call=self.figures_per_call,
+            triage=self.triage,
         )
-        self.md_processor = MarkdownProcessor()
 
-    def _create_document_client(self) -> DocumentIntelligenceClient:
+    @_Lazy
+    def md_processor(self) -> "MarkdownProcessor":
+        from actor.markdown_processor import MarkdownProcessor
+
+        return MarkdownProcessor()
+
+    def _create_document_client(self) -> "DocumentIntelligenceClient":
         """Create Azure Document Intelligence client."""
+        from azure.core.credentials import AzureKeyCredential
+        from azure.ai.documentintelligence import DocumentIntelligenceClient
+
         return DocumentIntelligenceClient(
             endpoint=os.getenv("DOC_INTELLIGENCE_ENDPOINT"),
             credential=AzureKeyCredential(os.getenv("DOC_INTELLIGENCE_API_KEY")),
         )
 
-    def _create_aoai_client(self) -> AzureOpenAI:
+    def _create_aoai_client(self) -> "AzureOpenAI":
         """Create Azure OpenAI client."""
+        from openai import AzureOpenAI
+
         return AzureOpenAI(
             azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+            # Retries are handled by the RequestScheduler
+            max_retries=0,
         )
 
     def _ensure_output_dir(self):
         """Ensure output directory exists."""
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def analyze(self, options: AnalyzeOptions) -> AnalyzeResult:
+    def analyze(self, options: AnalyzeOptions) -> ResultProjection:
         """
         Analyze a document based on the provided options.
 
@@ -63,44 +227,282 @@ class DocumentAnalyzer:
             options: Analysis configuration options
 
         Returns:
-            AnalyzeResult from Azure Document Intelligence
+            Projection of the AnalyzeResult; the full result is kept in the
+            result store
         """
         logger.info(f"Starting analysis of {options.input_file_location}")
+        self.metrics.reset()
 
         # Run document analysis
-        result = self._run_document_analysis(options)
+        result = self.run_document_analysis(options)
         options.result = result
 
+        stages = StageTracker(
+            os.path.join(self.output_dir, f"{options.file_name}_stages.json"),
+            enabled=options.incremental,
+        )
+        analysis_fingerprint = self.result_store.make_key(
+            options.input_file_location, options.output_content_format
+        )
+
         # Save raw markdown
-        self._save_raw_markdown(result, options.file_name)
+        self._raw_markdown_stage(options, stages, analysis_fingerprint)
 
         # Run post-processing
-        self._post_process(options)
+        self._post_process(options, stages, analysis_fingerprint)
+
+        # Save per-stage metrics
+        self.metrics.save(
+            os.path.join(self.output_dir, f"{options.file_name}_metrics.json")
+        )
 
         return result
 
-    def _run_document_analysis(self, options: AnalyzeOptions) -> AnalyzeResult:
-        """Run the actual document analysis."""
-        with open(options.input_file_location, "rb") as f:
+    def run_document_analysis(self, options: AnalyzeOptions) -> ResultProjection:
+        """
+        Run Document Intelligence analysis without post-processing, replaying a
+        stored result if present.
+
+        Post-processing only needs the projection, so the SDK model is dropped
+        once it has been stored, and stored results are parsed straight into one.
+        """
+        store_key = self.result_store.make_key(
+            options.input_file_location, options.output_content_format
+        )
+
+        with self.metrics.stage(
+            "document_analysis",
+            bytes=os.path.getsize(options.input_file_location),
+        ) as stage:
+            if options.reuse_analysis:
+                projection = self.result_store.load_projection(store_key)
+                if projection is not None:
+                    logger.info(
+                        f"Reusing stored analysis for {options.input_file_location}"
+                    )
+                    stage["stored_result"] = True
+                    return projection
+
+            stage["stored_result"] = False
+            windows = self._page_windows(options)
+            if windows:
+                from azure.ai.documentintelligence.models import AnalyzeResult
+
+                # Windows are merged in page order as soon as each one is ready,
+                # but post-processing starts once the whole document is merged
+                result = AnalyzeResult(
+                    merge_analyze_results(
+                        window_result.as_dict()
+                        for _, window_result in self.analyze_windows(options, windows)
+                    )
+                )
+                stage["windows"] = len(windows)
+            else:
+                result, submit_seconds, polling_seconds = self._begin_analysis(options)
+                stage["submit_seconds"] = submit_seconds
+                stage["polling_seconds"] = polling_seconds
+            stage["pages"] = len(getattr(result, "pages", None) or [])
+
+        self.result_store.save(store_key, result)
+        return project_result(result)
+
+    @staticmethod
+    def _analysis_request(options: AnalyzeOptions) -> dict:
+        """Keyword arguments of begin_analyze_document, apart from the body."""
+        return {
+            "model_id": "prebuilt-layout",
+            "content_type": "application/octet-stream",
+            "output_content_format": options.output_content_format,
+            "string_index_type": STRING_INDEX_TYPE,
+        }
+
+    @staticmethod
+    def _window_body(file_path: str, pages: str) -> bytes:
+        """
+        A PDF holding only the pages of a window, such as "51-100".
+
+        Each window uploads its own pages instead of the whole document.
+        """
+        import fitz
+
+        start, end = (int(page) for page in pages.split("-"))
+        with fitz.open(file_path) as doc, fitz.open() as window:
+            window.insert_pdf(doc, from_page=start - 1, to_page=end - 1)
+            return window.tobytes(garbage=3, deflate=True)
+
+    @staticmethod
+    def _window_result(result: "AnalyzeResult", pages: str) -> "AnalyzeResult":
+        """A window's result with the page numbers of the whole document."""
+        from azure.ai.documentintelligence.models import AnalyzeResult
+
+        first_page = int(pages.split("-")[0])
+        return AnalyzeResult(renumber_pages(result.as_dict(), first_page))
+
+    def _begin_analysis(
+        self, options: AnalyzeOptions, pages: Optional[str] = None
+    ) -> Tuple["AnalyzeResult", float, float]:
+        """
+        Submit the document (or a page range of it) and wait for the result.
+
+        Returns:
+            Tuple of (result, submit seconds, polling seconds)
+        """
+        if pages:
+            body = contextlib.nullcontext(
+                self._window_body(options.input_file_location, pages)
+            )
+        else:
+            body = open(options.input_file_location, "rb")
+
+        # Submitting includes uploading the file; polling waits for the service
+        submit_start = timeit.default_timer()
+        with body as f:
             poller = self.doc_client.begin_analyze_document(
-                "prebuilt-layout",
-                body=f,
-                content_type="application/octet-stream",
-                output_content_format=options.output_content_format,
+                body=f, **self._analysis_request(options)
             )
-        return poller.result()
+        poll_start = timeit.default_timer()
+        result = poller.result()
+        if pages:
+            result = self._window_result(result, pages)
 
-    def _save_raw_markdown(self, result: AnalyzeResult, file_name: str):
+        return result, poll_start - submit_start, timeit.default_timer() - poll_start
+
+    def _page_windows(self, options: AnalyzeOptions) -> list[str]:
+        """
+        Split a PDF into page ranges of options.pages_per_window pages.
+
+        Returns:
+            Page ranges such as ["1-50", "51-100"], or an empty list when the
+            document should be analyzed in one request
+        """
+        if options.pages_per_window <= 0:
+            return []
+        if not options.input_file_location.lower().endswith(".pdf"):
+            return []
+
+        import fitz
+
+        with fitz.open(options.input_file_location) as doc:
+            page_count = doc.page_count
+        if page_count <= options.pages_per_window:
+            return []
+
+        return [
+            f"{start}-{min(start + options.pages_per_window - 1, page_count)}"
+            for start in range(1, page_count + 1, options.pages_per_window)
+        ]
+
+    @staticmethod
+    def _window_backoff(attempt: int) -> float:
+        """Jittered exponential delay before retrying a failed window."""
+        return random.uniform(0, min(60.0, 2.0 * 2**attempt))
+
+    def _analyze_window(self, options: AnalyzeOptions, pages: str) -> "AnalyzeResult":
+        """Analyze one page window, retrying it alone if the request fails."""
+        store_key = self.result_store.make_key(
+            options.input_file_location, options.output_content_format, pages=pages
+        )
+        if options.reuse_analysis:
+            result = self.result_store.load(store_key)
+            if result is not None:
+                self.metrics.record(
+                    "analysis_window", pages=pages, stored_result=True, seconds=0.0
+                )
+                return result
+
+        for attempt in range(self.window_retries + 1):
+            try:
+                result, submit_seconds, polling_seconds = self._begin_analysis(
+                    options, pages
+                )
+                break
+            except Exception as e:
+                if attempt == self.window_retries:
+                    logger.error(f"Analysis of pages {pages} failed: {str(e)}")
+                    raise
+                delay = self._window_backoff(attempt)
+                logger.warning(
+                    f"Analysis of pages {pages} failed ({str(e)}), retry "
+                    f"{attempt + 1}/{self.window_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+        self.metrics.record(
+            "analysis_window",
+            pages=pages,
+            stored_result=False,
+            attempts=attempt + 1,
+            submit_seconds=submit_seconds,
+            polling_seconds=polling_seconds,
+            seconds=submit_seconds + polling_seconds,
+        )
+        # Stored per window, so a failed run only re-analyzes the missing windows
+        self.result_store.save(store_key, result)
+        return result
+
+    def analyze_windows(
+        self, options: AnalyzeOptions, windows: Optional[list[str]] = None
+    ) -> Iterator[Tuple[str, "AnalyzeResult"]]:
+        """
+        Analyze page windows concurrently and yield them in page order.
+
+        Each window is yielded as soon as it and all windows before it are done,
+        so callers can start working on the beginning of a long document while
+        later windows are still being analyzed.
+
+        Args:
+            options: Analysis configuration options
+            windows: Page ranges to analyze, by default split per
+                options.pages_per_window
+
+        Returns:
+            Iterator of (page range, AnalyzeResult) tuples
+        """
+        windows = windows if windows is not None else self._page_windows(options)
+        logger.info(
+            f"Analyzing {options.input_file_location} in {len(windows)} page windows"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.window_concurrency) as executor:
+            futures = [
+                executor.submit(self._analyze_window, options, pages)
+                for pages in windows
+            ]
+            try:
+                for pages, future in zip(windows, futures):
+                    yield pages, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _raw_markdown_stage(
+        self, options: AnalyzeOptions, stages: StageTracker, analysis_fingerprint: str
+    ):
+        """Save the raw markdown unless it is up to date."""
+        raw_path = os.path.join(self.output_dir, f"{options.file_name}_raw.md")
+        if not stages.is_current("raw_markdown", analysis_fingerprint, [raw_path]):
+            self._save_raw_markdown(options.result, options.file_name)
+            stages.mark("raw_markdown", analysis_fingerprint, [raw_path])
+
+    def _save_raw_markdown(self, result: ResultProjection, file_name: str):
         """Save the raw markdown content."""
         md_content = getattr(result, "content", "")
         raw_path = os.path.join(self.output_dir, f"{file_name}_raw.md")
 
         with open(raw_path, "w", encoding="utf-8") as f:
             f.write(md_content)
+        self.metrics.record(
+            "bytes_written", path=raw_path, bytes=os.path.getsize(raw_path)
+        )
 
         logger.info(f"Raw markdown saved to {raw_path}")
 
-    def _post_process(self, options: AnalyzeOptions):
+    def _post_process(
+        self,
+        options: AnalyzeOptions,
+        stages: Optional[StageTracker] = None,
+        analysis_fingerprint: str = "",
+    ):
         """Run post-processing based on analysis types."""
         if not options.result:
             raise ValueError("No analysis result to process.")
@@ -108,84 +510,294 @@ class DocumentAnalyzer:
         if not options.analyze_type:
             raise ValueError("No analyze type specified in options.")
 
-        for analyze_type in options.analyze_type:
+        if stages is None:
+            stages = StageTracker(
+                os.path.join(self.output_dir, f"{options.file_name}_stages.json"),
+                enabled=False,
+            )
+
+        # Chunking runs last, so it picks up descriptions made in the same run
+        for analyze_type in sorted(
+            options.analyze_type, key=lambda t: t == AnalyzeType.CHUNKING
+        ):
             if analyze_type == AnalyzeType.IMG_DESCRIPTION:
-                self._process_image_descriptions(options)
+                self._process_image_descriptions(options, stages, analysis_fingerprint)
             elif analyze_type == AnalyzeType.TABLE_PARSE:
-                self._process_tables(options)
+                self._process_tables(options, stages, analysis_fingerprint)
+            elif analyze_type == AnalyzeType.CHUNKING:
+                self._process_chunking(options, stages, analysis_fingerprint)
             else:
                 logger.warning(f"Unknown analyze type: {analyze_type}")
 
-    def _process_image_descriptions(self, options: AnalyzeOptions):
+    def _process_image_descriptions(
+        self,
+        options: AnalyzeOptions,
+        stages: StageTracker,
+        analysis_fingerprint: str,
+    ):
         """Process image descriptions and chunking."""
         logger.info("Processing image description analysis...")
 
-        # Generate image descriptions
-        markdown_content = self.image_processor.process_figures(
-            options.result, options.input_file_location, options.file_name
+        # Generate image descriptions, unless the analysis and prompt are unchanged
+        figures_fingerprint, figure_outputs = self._figures_stage(
+            options, stages, analysis_fingerprint
         )
+        if stages.is_current("figures", figures_fingerprint, figure_outputs):
+            with open(figure_outputs[0], "r", encoding="utf-8") as f:
+                markdown_content = f.read()
+        else:
+            markdown_content = self.image_processor.process_figures(
+                options.result, options.input_file_location, options.file_name
+            )
+            # Figures whose description failed are requested again on the next run
+            if (
+                markdown_content is not None
+                and options.file_name not in self.image_processor.incomplete
+            ):
+                stages.mark("figures", figures_fingerprint, figure_outputs)
 
         if not markdown_content:
             logger.warning("No markdown content generated from image processing")
             return
+        # Lets a later chunk-only run find the markdown described for this analysis
+        described_outputs = [figure_outputs[0], figure_outputs[2]]
+        stages.mark("described_markdown", analysis_fingerprint, described_outputs)
+
+        # Chunked by the chunking type when it is requested too
+        if (
+            options.chunking_type is not None
+            and AnalyzeType.CHUNKING not in options.analyze_type
+        ):
+            edits = self._load_edits(figure_outputs[2])
+            self._process_chunks(options, stages, markdown_content, edits)
+
+    def _process_chunking(
+        self,
+        options: AnalyzeOptions,
+        stages: StageTracker,
+        analysis_fingerprint: str,
+    ):
+        """
+        Chunk the markdown with figure descriptions when a run described this
+        analysis, and the raw markdown otherwise.
+        """
+        if options.chunking_type is None:
+            logger.warning("No chunking type specified in options.")
+            return
+
+        described = stages.stages.get("described_markdown", {})
+        updated_paths = described.get("outputs") or []
+        if described.get("fingerprint") == analysis_fingerprint and all(
+            os.path.exists(path) for path in updated_paths
+        ):
+            logger.info(f"Chunking described markdown {updated_paths[0]}")
+            with open(updated_paths[0], "r", encoding="utf-8") as f:
+                markdown_content = f.read()
+            edits_path = updated_paths[1] if len(updated_paths) > 1 else None
+            edits = self._load_edits(edits_path)
+        else:
+            logger.info("Chunking raw markdown")
+            markdown_content = getattr(options.result, "content", "")
+            edits = None
+
+        if not markdown_content:
+            logger.warning("No markdown content to chunk")
+            return
+
+        self._process_chunks(options, stages, markdown_content, edits)
+
+    def _figures_stage(
+        self, options: AnalyzeOptions, stages: StageTracker, analysis_fingerprint: str
+    ) -> Tuple[str, list[str]]:
+        """
+        Fingerprint and outputs of the figure description stage.
 
+        Returns:
+            Tuple of (fingerprint, [updated markdown path, descriptions path,
+            edits path])
+        """
+        figures_fingerprint = stages.fingerprint(
+            analysis_fingerprint, self.image_processor.params()
+        )
+        figure_outputs = [
+            os.path.join(self.output_dir, f"{options.file_name}_updated.md"),
+            os.path.join(
+                self.output_dir, f"{options.file_name}_figure_descriptions.json"
+            ),
+            os.path.join(self.output_dir, f"{options.file_name}_updated_edits.json"),
+        ]
+        return figures_fingerprint, figure_outputs
+
+    @staticmethod
+    def _load_edits(file_path: Optional[str]) -> Optional[TextEdits]:
+        """The figure edits saved with an updated markdown, if there are any."""
+        if file_path is None or not os.path.exists(file_path):
+            return None
+        return TextEdits.load(file_path)
+
+    def _process_chunks(
+        self,
+        options: AnalyzeOptions,
+        stages: StageTracker,
+        markdown_content: str,
+        edits: Optional[TextEdits] = None,
+    ):
+        """Chunk the updated markdown and stream the chunks to disk."""
         # Process content chunking
         logger.info("Processing content chunking...")
-        chunker = ContentChunkerFactory.create(options.chunking_type, markdown_content)
-        chunks = chunker.chunk()
+        chunker = self._get_chunker(options)
+        source = self._chunk_source(options, markdown_content, edits)
 
-        # Save chunks
         chunk_file_path = os.path.join(
-            self.output_dir, f"{options.file_name}_chunks.json"
+            self.output_dir, f"{options.file_name}_chunks.jsonl"
+        )
+        chunks_fingerprint = stages.fingerprint(
+            markdown_content,
+            options.chunking_type,
+            chunker.params(),
+            source.source,
+            source.first_page,
+            source.source_content,
+            edits.edits if edits is not None else None,
+        )
+        if stages.is_current("chunks", chunks_fingerprint, [chunk_file_path]):
+            return
+
+        # Stream chunks to disk as they are produced
+        with self.metrics.stage(
+            "chunking", chunking_type=options.chunking_type.value
+        ) as stage:
+            chunk_count = self.md_processor.stream_documents(
+                chunker.iter_chunks(source), chunk_file_path
+            )
+            stage["chunks"] = chunk_count
+        self.metrics.record(
+            "bytes_written",
+            path=chunk_file_path,
+            bytes=os.path.getsize(chunk_file_path),
         )
-        self.md_processor.save_documents(chunks, chunk_file_path)
+        stages.mark("chunks", chunks_fingerprint, [chunk_file_path])
 
-        logger.info(f"Generated {len(chunks)} chunks saved to {chunk_file_path}")
+        logger.info(f"Generated {chunk_count} chunks saved to {chunk_file_path}")
 
-    def _process_tables(self, options: AnalyzeOptions):
-        """Process table parsing to Excel."""
+    def _get_chunker(self, options: AnalyzeOptions) -> "ContentChunker":
+        """Return the chunker for the options' chunking type and configuration."""
+        from actor.content_chunker import ContentChunkerFactory
+
+        key = (options.chunking_type, options.chunker_config)
+        if key not in self._chunkers:
+            self._chunkers[key] = ContentChunkerFactory.create(
+                options.chunking_type, config=options.chunker_config
+            )
+        return self._chunkers[key]
+
+    def _chunk_source(
+        self,
+        options: AnalyzeOptions,
+        content: str,
+        edits: Optional[TextEdits] = None,
+    ) -> ChunkSource:
+        """Describe a document's content for chunking, with its provenance."""
+        result = options.result
+        pages = getattr(result, "pages", None) or []
+        return ChunkSource(
+            content=content,
+            source=os.path.basename(options.input_file_location),
+            first_page=pages[0].page_number if pages else 1,
+            tables=getattr(result, "tables", None),
+            source_content=getattr(result, "content", None),
+            pages=pages,
+            edits=edits,
+        )
+
+    def _process_tables(
+        self,
+        options: AnalyzeOptions,
+        stages: StageTracker,
+        analysis_fingerprint: str,
+    ):
+        """Export parsed tables in the requested formats."""
         logger.info("Processing table parsing analysis...")
 
         if not hasattr(options.result, "tables") or not options.result.tables:
             logger.warning("No tables found in the document.")
             return
 
-        table_processor = TableProcessor(self.output_dir)
-        table_processor.export_to_excel(options.result, options.file_name)
+        tables_fingerprint = stages.fingerprint(
+            analysis_fingerprint, sorted(options.table_formats)
+        )
+        # The number of CSV files depends on the tables, so reuse the stored list
+        table_paths = stages.stages.get("tables", {}).get("outputs")
+        if table_paths and stages.is_current("tables", tables_fingerprint, table_paths):
+            return
 
+        from actor.table_processor import TableProcessor
 
-def run_workflow():
-    """Main execution function."""
+        with self.metrics.stage("tables", tables=len(options.result.tables)):
+            table_processor = TableProcessor(self.output_dir)
+            table_paths = table_processor.export(
+                options.result, options.file_name, options.table_formats
+            )
+        for path in table_paths:
+            self.metrics.record("bytes_written", path=path, bytes=os.path.getsize(path))
+        stages.mark("tables", tables_fingerprint, table_paths)
+
+
+def run_workflow(
+    input_file_path: str = os.path.join("data", "contoso.pdf"),
+    output_dir: str = "output",
+    analyze_type: Optional[list[AnalyzeType]] = None,
+    save_result: bool = True,
+    analyzer_args: Optional[dict] = None,
+    **option_args,
+) -> ResultProjection:
+    """
+    Analyze one document and run the requested post-processing.
+
+    Args:
+        input_file_path: Document to analyze
+        output_dir: Output directory
+        analyze_type: Post-processing steps, by default table export and figure
+            descriptions (which are then chunked)
+        save_result: Copy the stored analysis result to <name>_output.json
+        analyzer_args: Other DocumentAnalyzer arguments
+        **option_args: Other AnalyzeOptions fields, e.g. chunking_type
+
+    Returns:
+        Projection of the AnalyzeResult
+    """
     logger.info("Starting document analysis...")
     start_time = timeit.default_timer()
 
-    # Setup
-    input_dir_base = "data"
-    input_sample_file = "contoso.pdf"
-    input_file_path = os.path.join(input_dir_base, input_sample_file)
-    output_dir_base = "output"
     file_name = os.path.splitext(os.path.basename(input_file_path))[0]
 
     # Create analyzer and options
-    analyzer = DocumentAnalyzer(output_dir_base)
+    analyzer = DocumentAnalyzer(output_dir, **(analyzer_args or {}))
     options = AnalyzeOptions(
         input_file_location=input_file_path,
         file_name=file_name,
-        analyze_type=[AnalyzeType.TABLE_PARSE, AnalyzeType.IMG_DESCRIPTION],
-        chunking_type=ChunkingType.MARKDOWN_CHUNKING,
+        analyze_type=analyze_type
+        or [AnalyzeType.TABLE_PARSE, AnalyzeType.IMG_DESCRIPTION],
+        **option_args,
     )
 
     # Run analysis
     result = analyzer.analyze(options)
 
-    # Save result
-    output_file_path = os.path.join(output_dir_base, f"{file_name}_output.json")
-    with open(output_file_path, "w", encoding="utf-8") as f:
-        json.dump(result.as_dict(), f, indent=4)
+    if save_result:
+        # Copied from the store rather than serialized again
+        output_file_path = os.path.join(output_dir, f"{file_name}_output.json")
+        analyzer.result_store.export(
+            analyzer.result_store.make_key(
+                input_file_path, options.output_content_format
+            ),
+            output_file_path,
+        )
+        logger.info(f"Result saved to {output_file_path}")
 
     end_time = timeit.default_timer()
     logger.info(f"Analysis completed in {end_time - start_time:.2f} seconds")
-    logger.info(f"Result saved to {output_file_path}")
+    return result
 
 
 if __name__ == "__main__":
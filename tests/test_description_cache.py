@@ -0,0 +1,34 @@
+from actor.description_cache import DescriptionCache
+
+
+def _accessed_at(cache: DescriptionCache, key: str) -> float:
+    return cache._conn.execute(
+        "SELECT accessed_at FROM descriptions WHERE key = ?", (key,)
+    ).fetchone()[0]
+
+
+def test_hits_are_written_in_batches(tmp_path):
+    cache = DescriptionCache(str(tmp_path / "cache.db"))
+    cache.set("figure", "A bar chart")
+    stored = _accessed_at(cache, "figure")
+
+    assert cache.get("figure") == "A bar chart"
+    assert _accessed_at(cache, "figure") == stored
+
+    cache.flush()
+    assert _accessed_at(cache, "figure") > stored
+    cache.close()
+
+
+def test_eviction_uses_pending_hits(tmp_path):
+    cache = DescriptionCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("old", "first")
+    cache.set("new", "second")
+    cache.get("old")
+    cache.set("newest", "third")
+
+    cache.evict()
+
+    assert cache.get("old") == "first"
+    assert cache.get("new") is None
+    cache.close()
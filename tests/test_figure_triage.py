@@ -0,0 +1,62 @@
+import itertools
+import os
+
+import pytest
+
+from actor.figure_triage import FigureTriage
+from actor.geometry_index import polygon_bounds
+from actor.pdf_img_processor import PDFImageProcessor
+from actor.result_projection import load_projection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_PATH = os.path.join(ROOT, "data", "contoso.pdf")
+RESULT_PATH = os.path.join(ROOT, "output", "contoso_output.json")
+
+
+@pytest.fixture(scope="module")
+def contoso_signatures():
+    """Signature of each contoso figure, rendered as the description step does."""
+    triage = FigureTriage()
+    result = load_projection(RESULT_PATH)
+    regions = []
+    for figure in result.figures:
+        region = figure.bounding_regions[0]
+        regions.append((region.page_number - 1, polygon_bounds(region.polygon)))
+    rendered = PDFImageProcessor().render_regions(
+        PDF_PATH, regions, encoder=triage.inspect
+    )
+    return {position + 1: signature for position, signature in rendered}
+
+
+def test_repeated_logo_is_a_duplicate(contoso_signatures):
+    triage = FigureTriage()
+    seen = {}
+
+    decisions = {
+        figure: triage.classify(signature, str(figure), seen)
+        for figure, signature in sorted(contoso_signatures.items())
+    }
+
+    assert decisions[9].action == "duplicate"
+    assert decisions[9].duplicate_of == "7"
+
+
+def test_distinct_figures_are_not_duplicates(contoso_signatures):
+    max_hash_distance = FigureTriage().max_hash_distance
+
+    for (first, a), (second, b) in itertools.combinations(
+        sorted(contoso_signatures.items()), 2
+    ):
+        if {first, second} == {7, 9}:
+            continue
+        assert (a.phash ^ b.phash).bit_count() > max_hash_distance, (first, second)
+
+
+def test_corpus_is_not_shared_without_an_index(contoso_signatures):
+    triage = FigureTriage()
+    signature = contoso_signatures[7]
+    triage.remember(f"{signature.phash:016x}", "Contoso logo")
+
+    decision = triage.classify(signature, "7", {})
+
+    assert decision.action == "describe"
@@ -0,0 +1,39 @@
+from actor.result_merger import WINDOW_SEPARATOR, merge_analyze_results, renumber_pages
+
+
+def _window(text: str, figures: int) -> dict:
+    """A window result with one page and its figures, numbered from page 1."""
+    region = {"pageNumber": 1, "polygon": [0, 0, 1, 0, 1, 1, 0, 1]}
+    return {
+        "content": text,
+        "pages": [{"pageNumber": 1, "spans": [{"offset": 0, "length": len(text)}]}],
+        "figures": [
+            {
+                "id": f"1.{index + 1}",
+                "boundingRegions": [region],
+                "spans": [{"offset": 0, "length": len(text)}],
+            }
+            for index in range(figures)
+        ],
+    }
+
+
+def test_figure_ids_are_unique_across_windows():
+    windows = [
+        renumber_pages(_window("first", 2), 1),
+        renumber_pages(_window("second", 1), 2),
+    ]
+
+    merged = merge_analyze_results(windows)
+
+    assert [figure["id"] for figure in merged["figures"]] == ["1.1", "1.2", "2.1"]
+
+
+def test_spans_are_shifted_into_the_merged_content():
+    merged = merge_analyze_results([_window("first", 0), _window("second", 0)])
+
+    span = merged["pages"][1]["spans"][0]
+    assert merged["content"] == "first" + WINDOW_SEPARATOR + "second"
+    assert merged["content"][span["offset"] : span["offset"] + span["length"]] == (
+        "second"
+    )
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from actor.content_chunker import ContentChunkerFactory
+from actor.data_process_model import ChunkerConfig, ChunkingType, ChunkSource
+from actor.markdown_processor import MarkdownProcessor
+from actor.text_edits import TextEdits
+
+PAGE_COUNT = 400
+
+
+def _document(page_count: int):
+    """Markdown with a figure per page, and pages with spans like result.pages."""
+    parts, pages = [], []
+    offset = 0
+    for page_number in range(1, page_count + 1):
+        page = (
+            f"# Section {page_number}\n\n"
+            + f"Paragraph {page_number} of the report. " * 20
+            + "\n\n<figure>\n\nFigure text on page "
+            + f"{page_number}\n\n</figure>\n\n"
+            + f"Closing paragraph {page_number}.\n\n"
+        )
+        if page_number < page_count:
+            page += "<!-- PageBreak -->\n\n"
+        span = {"offset": offset, "length": len(page)}
+        pages.append({"pageNumber": page_number, "spans": [span]})
+        parts.append(page)
+        offset += len(page)
+    return "".join(parts), pages
+
+
+def test_to_original_maps_around_and_inside_edits():
+    # "abcXYZdef" -> "abc" + "12345" + "def": XYZ at 3 was replaced by 5 characters
+    edits = TextEdits([(3, 3, 5)])
+
+    assert edits.to_original(0) == 0
+    assert edits.to_original(2) == 2
+    assert edits.to_original(3) == 3
+    assert edits.to_original(5) == 3
+    assert edits.to_original(8) == 6
+    assert edits.to_original(10) == 8
+    assert edits.to_span(0, 3) == (0, 3)
+    assert edits.to_span(4, 2) == (3, 3)
+    assert edits.to_span(8, 3) == (6, 3)
+
+
+def test_record_rejects_overlapping_edits():
+    edits = TextEdits([(10, 5, 2)])
+
+    with pytest.raises(ValueError):
+        edits.record(12, 1, 1)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    edits = TextEdits([(3, 3, 5), (20, 0, 4)])
+    file_path = tmp_path / "edits.json"
+
+    edits.save(str(file_path))
+
+    assert TextEdits.load(str(file_path)).edits == edits.edits
+
+
+def test_chunk_spans_of_a_long_document_map_to_result_content():
+    source_content, pages = _document(PAGE_COUNT)
+    descriptions = {
+        index: f"Description of figure {index}. " * 10
+        for index in range(1, PAGE_COUNT + 1)
+    }
+    edits = TextEdits()
+    content = MarkdownProcessor.update_figure_descriptions(
+        source_content, descriptions, edits
+    )
+    assert len(edits) == PAGE_COUNT
+
+    chunker = ContentChunkerFactory.create(
+        ChunkingType.RECURSIVE_CHUNKING,
+        config=ChunkerConfig(chunk_size=500, chunk_overlap=0),
+    )
+    source = ChunkSource(
+        content=content,
+        source="report.pdf",
+        source_content=source_content,
+        pages=pages,
+        edits=edits,
+    )
+    started = time.perf_counter()
+    chunks = list(chunker.iter_chunks(source))
+    elapsed = time.perf_counter() - started
+
+    # Mapping is O(n log k): a few hundred pages chunk in well under a second
+    assert elapsed < 10
+    assert len(chunks) > PAGE_COUNT
+    for chunk in chunks:
+        span = chunk.metadata["span"]
+        text = source_content[span["offset"] : span["offset"] + span["length"]]
+        if "Description of figure" not in chunk.page_content:
+            assert text == chunk.page_content
+        if text.startswith("# Section "):
+            page_number = int(text[len("# Section ") :].split("\n")[0])
+            assert chunk.metadata["page_number"] == page_number
+
+
+def test_to_edited_maps_original_offsets_forward():
+    edits = TextEdits([(3, 3, 5)])
+
+    assert edits.to_edited(2) == 2
+    assert edits.to_edited(4) == 3
+    assert edits.to_edited(6) == 8
+    assert edits.to_edited(8) == 10